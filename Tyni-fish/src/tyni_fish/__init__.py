@@ -1,5 +1,35 @@
-__all__ = ["AgentRunner", "Policy", "ToolRegistry"]
+from __future__ import annotations
 
-from .agent import AgentRunner
-from .policy import Policy
-from .tools.registry import ToolRegistry
+from typing import TYPE_CHECKING, Any
+
+__all__ = ["AgentRunner", "Policy", "Session", "ToolRegistry"]
+
+# Public names are imported on first access, so `import tyni_fish` (and CLI
+# commands that do not run the agent) stay cheap.
+_LAZY = {
+    "AgentRunner": ".agent",
+    "Policy": ".policy",
+    "Session": ".session",
+    "ToolRegistry": ".tools.registry",
+}
+
+if TYPE_CHECKING:
+    from .agent import AgentRunner
+    from .policy import Policy
+    from .session import Session
+    from .tools.registry import ToolRegistry
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
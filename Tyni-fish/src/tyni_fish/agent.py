@@ -1,19 +1,48 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
+import queue
+import threading
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Coroutine,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
+from .budget import BudgetExceeded, RunBudget
+from .context import ContextWindow, estimate_tokens, message_tokens
+from .executor import ToolExecutor
+from .metrics import REGISTRY, MetricsRegistry, RunTimings, start_profiler_from_env
+from .plugins import load_provider, load_tool
 from .policy import Policy
-from .tracing import TraceWriter
-from .providers.base import Action, FinalAction, Provider, ToolAction
-from .providers.dummy import DummyProvider
-from .providers.openai_compat import OpenAICompatProvider
-from .tools.base import ToolError
+from .providers.base import (
+    FinalAction,
+    Message,
+    Provider,
+    TokenCallback,
+    ToolAction,
+    ToolBatchAction,
+    action_json,
+    call_provider,
+    can_stream,
+)
+from .tools.base import Tool
 from .tools.builtins import default_registry
+from .tools.cache import ToolResultCache, tool_cache_key
 from .tools.registry import ToolRegistry
+from .tracing import RawJSON, TracePipeline, TraceWriter
+
+T = TypeVar("T")
 
 
 SYSTEM_PROMPT = """You are an agent that must output a single JSON object representing the next action.
@@ -21,23 +50,33 @@ SYSTEM_PROMPT = """You are an agent that must output a single JSON object repres
 Allowed action shapes:
 1) Tool call:
   {"type":"tool","name":"<tool_name>","args":{...}}
-2) Final answer:
+2) Several independent tool calls, run in parallel:
+  {"type":"tools","calls":[{"name":"<tool_name>","args":{...}}, ...]}
+3) Final answer:
   {"type":"final","content":"..."} 
 
 Rules:
 - Use tools only when needed.
 - If you use a tool, be explicit and minimal in args.
 - Never invent tool results.
+- Batch tool calls only when they do not depend on each other.
 - If you can answer directly, return type=final.
 """
 
+# Estimated prompt cost of the system message, for input-token budgets.
+SYSTEM_PROMPT_TOKENS = message_tokens({"content": SYSTEM_PROMPT})
 
-def _run_with_timeout(fn, timeout_secs: int):
-    import concurrent.futures
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-        fut = ex.submit(fn)
-        return fut.result(timeout=timeout_secs)
+@dataclass
+class RunResult:
+    output: str
+    steps: int
+    tool_calls: int
+    run_id: Optional[str] = None
+    # Where the run spent its time (see `RunTimings.summary`).
+    timings: Optional[Dict[str, Any]] = None
+    # Token and time totals (see `RunBudget.to_dict`).
+    usage: Optional[Dict[str, Any]] = None
 
 
 @dataclass
@@ -48,6 +87,27 @@ class AgentRunner:
     workspace_dir: str = "workspace"
     trace_dir: str = "traces"
     tracing: bool = True
+    tool_workers: int = 8
+    executor: Optional[ToolExecutor] = None
+    trace_pipeline: Optional[TracePipeline] = None
+    metrics: Optional[MetricsRegistry] = None
+    tool_cache_size: int = 1024
+    tool_cache: Optional[ToolResultCache] = None
+
+    def __post_init__(self) -> None:
+        # One long-lived executor per runner, shared by every run and event loop.
+        if self.executor is None:
+            self.executor = ToolExecutor(workers=self.tool_workers)
+        if self.metrics is None:
+            self.metrics = REGISTRY
+        # Memoizes pure / fingerprinted tools; `tool_cache_size=0` disables it.
+        if self.tool_cache is None and self.tool_cache_size > 0:
+            self.tool_cache = ToolResultCache(max_entries=self.tool_cache_size)
+        start_profiler_from_env()
+        self._trace_lock = threading.Lock()
+        # Guards the (policy, tools) pair so a run never sees half of a reload.
+        self._config_lock = threading.Lock()
+        self._workspace_ready = False
 
     @staticmethod
     def from_config(
@@ -56,67 +116,456 @@ class AgentRunner:
         policy: Optional[Policy] = None,
         workspace_dir: str = "workspace",
         trace_dir: str = "traces",
+        tool_workers: Optional[int] = None,
+        cache: Optional[str] = None,
+        record: Optional[str] = None,
     ) -> "AgentRunner":
+        """Build a runner from names and env vars.
+
+        `cache` (or `TYNI_CACHE`) wraps the provider in a response cache:
+        `memory`, or a sqlite file path that survives across processes.
+        `record` (or `TYNI_RECORD`) appends every provider call to a cassette
+        for `--provider replay`; cache hits are not recorded.
+        Providers and allow-listed tools that are not built in are loaded from
+        entry points (see `plugins.py`); nothing else is imported.
+        """
         policy = policy or Policy.from_env()
-        tools = default_registry(workspace_dir=workspace_dir)
-        provider = _make_provider(provider_name)
-        return AgentRunner(policy=policy, tools=tools, provider=provider, workspace_dir=workspace_dir, trace_dir=trace_dir)
+        tools = AgentRunner.build_tools(policy, workspace_dir=workspace_dir)
+        provider = load_provider(provider_name)
+        record = record or os.getenv("TYNI_RECORD")
+        if record:
+            from .providers.replay import RecordingProvider
+
+            provider = RecordingProvider(inner=provider, path=record)
+        cache = cache or os.getenv("TYNI_CACHE")
+        if cache:
+            from .providers.cache import CachingProvider, ResponseCache
+
+            provider = CachingProvider(inner=provider, cache=ResponseCache.from_spec(cache))
+        tool_workers = tool_workers or int(os.getenv("TYNI_TOOL_WORKERS", "8"))
+        return AgentRunner(
+            policy=policy,
+            tools=tools,
+            provider=provider,
+            workspace_dir=workspace_dir,
+            trace_dir=trace_dir,
+            tool_workers=tool_workers,
+            tool_cache_size=int(os.getenv("TYNI_TOOL_CACHE_SIZE", "1024")),
+        )
+
+    @staticmethod
+    def build_tools(policy: Policy, *, workspace_dir: str = "workspace") -> ToolRegistry:
+        """Built-in tools plus entry-point plugins for allow-listed names that are not built in."""
+        tools = default_registry(workspace_dir=workspace_dir, max_read_bytes=policy.max_read_bytes)
+        for name in sorted(policy.allow_tools - set(tools.tools)):
+            tool = load_tool(name, workspace_dir=workspace_dir)
+            if tool is not None:
+                tools.register(tool)
+        return tools
+
+    def reconfigure(
+        self, *, policy: Optional[Policy] = None, tools: Optional[ToolRegistry] = None
+    ) -> None:
+        """Swap the policy and/or tool registry atomically.
+
+        Runs already in flight keep the pair they started with; only runs
+        started afterwards see the new one. A new registry empties the tool
+        result cache, since cached results depend on how the old tools were
+        configured (e.g. `read_file`'s byte cap).
+        """
+        with self._config_lock:
+            if policy is not None:
+                self.policy = policy
+            if tools is not None:
+                self.tools = tools
+                if self.tool_cache is not None:
+                    self.tool_cache.clear()
+
+    def run(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        """Blocking wrapper around `arun` for scripts and the CLI."""
+        return self._run_sync(self.arun(user_input, max_steps=max_steps, on_token=on_token))
+
+    def stream(self, user_input: str, *, max_steps: Optional[int] = None) -> Iterator[str]:
+        """Yield final-answer tokens as they are produced (run happens in a thread)."""
+        q: "queue.Queue[Any]" = queue.Queue()
+        done = object()
+
+        def work() -> None:
+            try:
+                self.run(user_input, max_steps=max_steps, on_token=q.put)
+            except BaseException as e:
+                q.put(e)
+            finally:
+                q.put(done)
+
+        threading.Thread(target=work, daemon=True).start()
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def astream(
+        self, user_input: str, *, max_steps: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Async iterator over final-answer tokens."""
+        loop = asyncio.get_running_loop()
+        q: "asyncio.Queue[Any]" = asyncio.Queue()
+        done = object()
+
+        def on_token(token: str) -> None:
+            # Sync providers stream from a worker thread.
+            loop.call_soon_threadsafe(q.put_nowait, token)
+
+        task = asyncio.ensure_future(self.arun(user_input, max_steps=max_steps, on_token=on_token))
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(q.put_nowait, done))
+        try:
+            while True:
+                item = await q.get()
+                if item is done:
+                    break
+                yield item
+            await task
+        finally:
+            task.cancel()
+
+    def run_many(
+        self, inputs: Iterable[str], *, max_steps: Optional[int] = None, concurrency: int = 100
+    ) -> List[str | BaseException]:
+        return self._run_sync(self.arun_many(inputs, max_steps=max_steps, concurrency=concurrency))
+
+    async def arun_many(
+        self, inputs: Iterable[str], *, max_steps: Optional[int] = None, concurrency: int = 100
+    ) -> List[str | BaseException]:
+        """Multiplex many independent sessions on the current event loop.
+
+        At most `concurrency` runs are in flight at once. Results come back in
+        input order; a failed run yields its exception instead of a string.
+        """
+        sem = asyncio.Semaphore(max(1, concurrency))
 
-    def run(self, user_input: str, *, max_steps: Optional[int] = None) -> str:
-        os.makedirs(self.workspace_dir, exist_ok=True)
+        async def one(text: str) -> str:
+            async with sem:
+                return await self.arun(text, max_steps=max_steps)
 
-        policy = self.policy.with_overrides(max_steps=max_steps) if max_steps is not None else self.policy
-        trace = TraceWriter(trace_dir=self.trace_dir) if self.tracing else None
+        return await asyncio.gather(*(one(text) for text in inputs), return_exceptions=True)
 
-        messages: List[Dict[str, str]] = [{"role": "user", "content": user_input}]
+    def run_result(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> RunResult:
+        return self._run_sync(self.arun_result(user_input, max_steps=max_steps, on_token=on_token))
+
+    def _run_sync(self, coro: Coroutine[Any, Any, T]) -> T:
+        """`asyncio.run` for the blocking wrappers.
+
+        Runs only ask the trace writer to flush; a blocking caller also waits
+        for it, so the trace is on disk when the call returns.
+        """
+        try:
+            return asyncio.run(coro)
+        finally:
+            pipeline = self.trace_pipeline
+            if self.tracing and pipeline is not None and pipeline.flush_on_run_end:
+                pipeline.flush()
+
+    async def arun(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        """Run the agent loop.
+
+        With `on_token`, the final answer is delivered incrementally when the
+        provider can stream (and in one piece when it cannot).
+        """
+        return (await self.arun_result(user_input, max_steps=max_steps, on_token=on_token)).output
+
+    async def arun_result(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+        context: Optional[ContextWindow] = None,
+        trace: Optional[TraceWriter] = None,
+    ) -> RunResult:
+        """Like `arun`, plus step and tool-call counts.
+
+        `context` continues an existing history (the turn and its final answer
+        are appended to it) and `trace` reuses a trace handle; `Session` uses both.
+        """
+        if not self._workspace_ready:
+            os.makedirs(self.workspace_dir, exist_ok=True)
+            self._workspace_ready = True
+
+        with self._config_lock:
+            policy, registry = self.policy, self.tools
+        if max_steps is not None:
+            policy = policy.with_overrides(max_steps=max_steps)
+        if trace is None and self.tracing:
+            trace = self.new_trace()
+        try:
+            return await self._loop(user_input, policy, registry, trace, on_token, context)
+        except BaseException as e:
+            if trace:
+                trace.write({"event": "error", "error": f"{type(e).__name__}: {e}"})
+            raise
+        finally:
+            if trace:
+                trace.end()
+
+    async def _loop(
+        self,
+        user_input: str,
+        policy: Policy,
+        registry: ToolRegistry,
+        trace: Optional[TraceWriter],
+        on_token: Optional[TokenCallback],
+        context: Optional[ContextWindow],
+    ) -> RunResult:
+        if context is None:
+            context = self.new_context(policy)
+        context.append(Message("user", user_input))
         if trace:
-            trace.write({"event": "start", "provider": getattr(self.provider, "name", "unknown"), "policy": policy.__dict__})
+            trace.write(
+                {
+                    "event": "start",
+                    "provider": getattr(self.provider, "name", "unknown"),
+                    "policy": policy.to_dict(),
+                }
+            )
+
+        timings = RunTimings()
+        budget = RunBudget(policy)
+        trace_secs = trace.write_secs if trace else 0.0
+        result: Optional[RunResult] = None
+        try:
+            result = await self._steps(context, policy, registry, trace, on_token, timings, budget)
+            return result
+        except BudgetExceeded as e:
+            self.metrics.inc("tyni_budget_exceeded_total", kind=e.kind)
+            raise
+        finally:
+            if trace:
+                timings.trace_secs = trace.write_secs - trace_secs
+            summary = timings.summary()
+            usage = budget.to_dict()
+            self.metrics.observe("tyni_run_seconds", summary["wall_secs"])
+            self.metrics.inc("tyni_runs_total", outcome="ok" if result is not None else "error")
+            self.metrics.inc("tyni_tokens_total", usage["input_tokens"], direction="input")
+            self.metrics.inc("tyni_tokens_total", usage["output_tokens"], direction="output")
+            if result is not None:
+                result.timings = summary
+                result.usage = usage
+            if trace:
+                trace.write({"event": "context", **context.stats()})
+                if self.tool_cache is not None:
+                    trace.write(
+                        {
+                            "event": "summary",
+                            **summary,
+                            "usage": usage,
+                            "tool_cache": self.tool_cache.stats(),
+                        }
+                    )
+                else:
+                    trace.write({"event": "summary", **summary, "usage": usage})
 
+    async def _steps(
+        self,
+        context: ContextWindow,
+        policy: Policy,
+        registry: ToolRegistry,
+        trace: Optional[TraceWriter],
+        on_token: Optional[TokenCallback],
+        timings: RunTimings,
+        budget: RunBudget,
+    ) -> RunResult:
+        provider_name = getattr(self.provider, "name", "unknown")
+        tool_calls = 0
         for step in range(policy.max_steps):
-            action = self.provider.next_action(system=SYSTEM_PROMPT, messages=messages)
+            context.compact()
+            prompt_tokens = context.total_tokens + SYSTEM_PROMPT_TOKENS
+            budget.check_prompt(prompt_tokens)
+            remaining = budget.remaining_secs()
+            t0 = time.perf_counter()
+            try:
+                call = call_provider(
+                    self.provider,
+                    system=SYSTEM_PROMPT,
+                    messages=context.messages,
+                    on_token=on_token,
+                )
+                action = await (call if remaining is None else asyncio.wait_for(call, remaining))
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and budget.remaining_secs() == 0:
+                    budget.check()  # the run is out of time: raises BudgetExceeded
+                self.metrics.inc("tyni_provider_errors_total", provider=provider_name)
+                raise
+            finally:
+                provider_secs = time.perf_counter() - t0
+                timings.provider_secs += provider_secs
+                timings.provider_calls += 1
+                self.metrics.observe("tyni_provider_seconds", provider_secs, provider=provider_name)
+            budget.add_call(
+                action.usage,
+                prompt_tokens=prompt_tokens,
+                output_tokens=estimate_tokens(action_json(action)),
+            )
             if trace:
-                trace.write({"event": "action", "step": step, "action": _action_to_dict(action)})
+                trace.write(
+                    {
+                        "event": "action",
+                        "step": step,
+                        "action": RawJSON(action_json(action)),
+                        "usage": budget.totals(),
+                    }
+                )
 
             if isinstance(action, FinalAction):
                 if trace:
                     trace.write({"event": "final", "step": step})
-                return action.content
+                if on_token is not None and not can_stream(self.provider):
+                    on_token(action.content)
+                timings.steps.append({"provider_secs": round(provider_secs, 6)})
+                context.append(Message("assistant", action.content))
+                return RunResult(
+                    output=action.content,
+                    steps=step + 1,
+                    tool_calls=tool_calls,
+                    run_id=trace.run_id if trace else None,
+                )
 
-            if isinstance(action, ToolAction):
-                if action.name not in policy.allow_tools:
-                    raise RuntimeError(f"Tool not allowed by policy: {action.name}")
-                tool = self.tools.get(action.name)
+            if isinstance(action, (ToolAction, ToolBatchAction)):
+                calls = [action] if isinstance(action, ToolAction) else list(action.calls)
+                for call in calls:
+                    if call.name not in policy.allow_tools:
+                        raise RuntimeError(f"Tool not allowed by policy: {call.name}")
+                tools = [registry.get(call.name) for call in calls]
+                # The answer is not final, so an exhausted token budget stops here.
+                budget.check()
 
-                def call():
-                    return tool(**(action.args or {}))
-
-                try:
-                    result = _run_with_timeout(call, policy.tool_timeout_secs)
-                except Exception as e:
-                    result = f"TOOL_ERROR: {e}"
+                # Independent calls run concurrently; each keeps its own timeout,
+                # cut short by whatever the run and tool budgets have left.
+                timeout_secs = budget.tool_timeout()
+                t0 = time.perf_counter()
+                outcomes = await asyncio.gather(
+                    *(
+                        self._call_tool(tool, call.args or {}, policy, timeout_secs)
+                        for tool, call in zip(tools, calls, strict=True)
+                    )
+                )
+                results = [result for result, _ in outcomes]
+                tool_secs = time.perf_counter() - t0
+                budget.add_tool_secs(tool_secs)
+                tool_calls += len(calls)
+                timings.tool_secs += tool_secs
+                timings.tool_calls += len(calls)
+                timings.tool_errors += sum(1 for r in results if r.startswith("TOOL_ERROR"))
+                timings.tool_cache_hits += sum(1 for _, cached in outcomes if cached)
+                timings.steps.append(
+                    {"provider_secs": round(provider_secs, 6), "tool_secs": round(tool_secs, 6)}
+                )
 
                 if trace:
-                    trace.write({"event": "tool_result", "step": step, "tool": action.name, "result": result})
+                    for i, (call, (result, cached)) in enumerate(zip(calls, outcomes, strict=True)):
+                        event = {
+                            "event": "tool_result",
+                            "step": step,
+                            "tool": call.name,
+                            "result": result,
+                        }
+                        if len(calls) > 1:
+                            event["index"] = i
+                        if cached:
+                            event["cached"] = True
+                        trace.write(event)
 
-                messages.append({"role": "assistant", "content": json.dumps(_action_to_dict(action))})
-                messages.append({"role": "tool", "content": result})
+                context.append(Message("assistant", action_json(action)))
+                context.extend([Message("tool", result) for result in results])
                 continue
 
             raise RuntimeError(f"Unknown action type: {action}")
 
         raise RuntimeError("Max steps exceeded")
 
+    async def _call_tool(
+        self, tool: Tool, args: Dict[str, Any], policy: Policy, timeout_secs: Optional[float] = None
+    ) -> Tuple[str, bool]:
+        """Run one tool call -> (result, served_from_cache).
+
+        Failures and timeouts come back as TOOL_ERROR text and are not cached.
+        """
+        key = tool_cache_key(tool, args) if self.tool_cache is not None else None
+        if key is not None:
+            hit = self.tool_cache.get(key)
+            if hit is not None:
+                self.metrics.inc("tyni_tool_cache_hits_total", tool=tool.name)
+                return hit, True
+            self.metrics.inc("tyni_tool_cache_misses_total", tool=tool.name)
+        t0 = time.perf_counter()
+        result = await self._invoke_tool(tool, args, policy, timeout_secs)
+        self.metrics.observe("tyni_tool_seconds", time.perf_counter() - t0, tool=tool.name)
+        if result.startswith("TOOL_ERROR"):
+            self.metrics.inc("tyni_tool_errors_total", tool=tool.name)
+        elif key is not None and self.tools.tools.get(tool.name) is tool:
+            # A run still on a replaced registry must not refill the cache with old-config results.
+            self.tool_cache.put(key, result)
+        return result, False
+
+    async def _invoke_tool(
+        self, tool: Tool, args: Dict[str, Any], policy: Policy, timeout_secs: Optional[float] = None
+    ) -> str:
+        timeout_secs = policy.tool_timeout_secs if timeout_secs is None else timeout_secs
+        try:
+            acall = getattr(tool, "acall", None)
+            if acall is not None:
+                return await asyncio.wait_for(acall(**args), timeout=timeout_secs)
+            return await self.executor.arun(
+                tool,
+                args,
+                timeout_secs=timeout_secs,
+                limit=policy.tool_concurrency.get(tool.name),
+                isolate=tool.name in policy.isolate_tools,
+            )
+        except asyncio.TimeoutError:
+            return f"TOOL_ERROR: timed out after {timeout_secs:g}s"
+        except Exception as e:
+            return f"TOOL_ERROR: {e}"
+
+    def new_context(self, policy: Optional[Policy] = None) -> ContextWindow:
+        policy = policy or self.policy
+        return ContextWindow(
+            max_tokens=policy.max_context_tokens,
+            max_tool_output_tokens=policy.max_tool_output_tokens,
+        )
+
+    def new_trace(self, run_id: str = "") -> TraceWriter:
+        return TraceWriter(trace_dir=self.trace_dir, run_id=run_id, pipeline=self._pipeline())
 
-def _action_to_dict(action: Action) -> Dict[str, Any]:
-    if isinstance(action, ToolAction):
-        return {"type": "tool", "name": action.name, "args": action.args}
-    return {"type": "final", "content": action.content}
+    def _pipeline(self) -> TracePipeline:
+        # Created on first traced run so untraced runners never start a flusher thread.
+        with self._trace_lock:
+            if self.trace_pipeline is None:
+                self.trace_pipeline = TracePipeline.from_env(trace_dir=self.trace_dir)
+            return self.trace_pipeline
 
+    def close(self) -> None:
+        self.executor.close()
+        if self.trace_pipeline is not None:
+            self.trace_pipeline.close()
 
-def _make_provider(provider_name: str) -> Provider:
-    name = provider_name.strip().lower()
-    if name in {"dummy", "test"}:
-        return DummyProvider()
-    if name in {"openai", "openai-compat", "oai"}:
-        return OpenAICompatProvider()
-    raise ValueError(f"Unknown provider: {provider_name}")
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from .agent import AgentRunner
+
+# (line index, decoded line); an undecodable line carries its `ValueError`.
+Item = Tuple[int, Any]
+
+
+def iter_items(path: str, *, skip: Optional[Set[int]] = None) -> Iterator[Item]:
+    """Stream `(line index, object)` pairs from a JSONL file.
+
+    Each line is an object with `input` (plus optional `id`, `max_steps`) or
+    a bare JSON string. Blank lines are not counted. A line that is not JSON
+    is yielded with its decode error, so `run_item` reports it for that index
+    instead of the whole job failing.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        index = -1
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            index += 1
+            if skip and index in skip:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield index, e
+                continue
+            yield index, ({"input": obj} if isinstance(obj, str) else obj)
+
+
+def run_item(
+    runner: AgentRunner, index: int, obj: Any, max_steps: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run one input; any problem with it, bad input included, gives an `ok: false` row."""
+    t0 = time.perf_counter()
+    row: Dict[str, Any] = {"index": index, "id": index}
+    try:
+        if isinstance(obj, ValueError):
+            raise obj
+        if not isinstance(obj, dict):
+            raise TypeError(f"expected an object or a string, got {type(obj).__name__}")
+        row["id"] = obj.get("id", index)
+        res = runner.run_result(str(obj["input"]), max_steps=obj.get("max_steps", max_steps))
+        row.update(ok=True, output=res.output, steps=res.steps, tool_calls=res.tool_calls)
+        if res.usage:
+            row.update(
+                input_tokens=res.usage["input_tokens"], output_tokens=res.usage["output_tokens"]
+            )
+    except Exception as e:
+        row.update(ok=False, error=f"{type(e).__name__}: {e}")
+    row["latency_secs"] = round(time.perf_counter() - t0, 6)
+    return row
+
+
+def load_checkpoint(output_path: str) -> Set[int]:
+    """Indices already in `output_path`; a torn last line (crash mid-write) is cut off."""
+    done: Set[int] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    for line in data[:end].splitlines():
+        try:
+            done.add(int(json.loads(line)["index"]))
+        except (ValueError, KeyError, TypeError):
+            continue
+    return done
+
+
+_worker_runner: Optional[AgentRunner] = None
+_worker_max_steps: Optional[int] = None
+
+
+def _init_worker(
+    provider_name: str, cache: Optional[str], tracing: bool, max_steps: Optional[int]
+) -> None:
+    global _worker_runner, _worker_max_steps
+    _worker_runner = AgentRunner.from_config(provider_name=provider_name, cache=cache)
+    _worker_runner.tracing = tracing
+    _worker_max_steps = max_steps
+
+
+def _run_chunk(chunk: List[Item]) -> List[Dict[str, Any]]:
+    assert _worker_runner is not None
+    return [run_item(_worker_runner, index, obj, _worker_max_steps) for index, obj in chunk]
+
+
+def _chunks(items: Iterator[Item], size: int) -> Iterator[List[Item]]:
+    chunk: List[Item] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class BatchStats:
+    done: int = 0
+    ok: int = 0
+    errors: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        return {
+            "done": self.done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "wall_secs": round(wall, 3),
+            "items_per_sec": round(self.done / wall, 2) if wall > 0 else 0.0,
+        }
+
+
+@dataclass(eq=False)
+class BatchRunner:
+    """Fan a JSONL stream of independent inputs out over a process pool.
+
+    Every worker process keeps one warm `AgentRunner` (built by
+    `AgentRunner.from_config` in the pool initializer) and receives inputs in
+    chunks of `chunk_size`. Results go to a JSONL file in input order
+    (`ordered`) or as they complete; at most `workers * 4` chunks are in
+    flight, so memory stays flat however large the input is.
+
+    The output file doubles as the checkpoint: rerunning with `resume` skips
+    indices already written. `workers=0` runs inline (no pool).
+    """
+
+    provider_name: str = "dummy"
+    cache: Optional[str] = None
+    workers: Optional[int] = None
+    chunk_size: int = 8
+    ordered: bool = True
+    tracing: bool = True
+    max_steps: Optional[int] = None
+    progress_secs: float = 5.0
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def run(self, input_path: str, output_path: str, *, resume: bool = True) -> Dict[str, Any]:
+        done = load_checkpoint(output_path) if resume else set()
+        stats = BatchStats(skipped=len(done))
+        items = iter_items(input_path, skip=done)
+        parent = os.path.dirname(output_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        workers = (os.cpu_count() or 1) if self.workers is None else self.workers
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            last_report = time.monotonic()
+
+            def write(rows: List[Dict[str, Any]]) -> None:
+                nonlocal last_report
+                for row in rows:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    stats.done += 1
+                    if row["ok"]:
+                        stats.ok += 1
+                    else:
+                        stats.errors += 1
+                out.flush()
+                if time.monotonic() - last_report >= self.progress_secs:
+                    last_report = time.monotonic()
+                    os.fsync(out.fileno())
+                    if self.on_progress is not None:
+                        self.on_progress(stats.summary())
+
+            if workers <= 0:
+                self._run_inline(items, write)
+            else:
+                self._run_pool(items, write, workers)
+        summary = stats.summary()
+        if self.on_progress is not None:
+            self.on_progress(summary)
+        return summary
+
+    def _run_inline(
+        self, items: Iterator[Item], write: Callable[[List[Dict[str, Any]]], None]
+    ) -> None:
+        runner = AgentRunner.from_config(provider_name=self.provider_name, cache=self.cache)
+        runner.tracing = self.tracing
+        try:
+            for index, obj in items:
+                write([run_item(runner, index, obj, self.max_steps)])
+        finally:
+            runner.close()
+
+    def _run_pool(
+        self, items: Iterator[Item], write: Callable[[List[Dict[str, Any]]], None], workers: int
+    ) -> None:
+        window = workers * 4
+        pending: Set["concurrent.futures.Future[List[Dict[str, Any]]]"] = set()
+        # Ordered mode: indices submitted but not yet written, and finished rows waiting their turn.
+        expected: Deque[int] = deque()
+        buffered: Dict[int, Dict[str, Any]] = {}
+
+        def drain() -> None:
+            nonlocal pending
+            finished, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in finished:
+                rows = future.result()
+                if not self.ordered:
+                    write(rows)
+                    continue
+                buffered.update((row["index"], row) for row in rows)
+            ready = []
+            while expected and expected[0] in buffered:
+                ready.append(buffered.pop(expected.popleft()))
+            if ready:
+                write(ready)
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.provider_name, self.cache, self.tracing, self.max_steps),
+        ) as ex:
+            for chunk in _chunks(items, self.chunk_size):
+                # Bound both in-flight chunks and (ordered) rows held back behind a slow one.
+                while len(pending) >= window or len(expected) >= window * self.chunk_size:
+                    drain()
+                pending.add(ex.submit(_run_chunk, chunk))
+                if self.ordered:
+                    expected.extend(index for index, _ in chunk)
+            while pending:
+                drain()
+
+
+def add_batch_args(p) -> None:
+    p.add_argument(
+        "--input", required=True, help="JSONL inputs: {'input': ..., 'id'?: ...} or bare strings."
+    )
+    p.add_argument("--output", required=True, help="JSONL results (also the resume checkpoint).")
+    p.add_argument("--provider", default=os.getenv("TYNI_PROVIDER", "dummy"), help="Provider name.")
+    p.add_argument("--cache", default=None, help="Response cache: 'memory' or a sqlite path.")
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count; 0: inline).",
+    )
+    p.add_argument("--chunk-size", type=int, default=8, help="Inputs sent to a worker at a time.")
+    p.add_argument("--unordered", action="store_true", help="Write results as they complete.")
+    p.add_argument(
+        "--no-resume", action="store_true", help="Start over instead of skipping finished inputs."
+    )
+    p.add_argument("--max-steps", type=int, default=None, help="Default max steps per input.")
+    p.add_argument("--no-trace", action="store_true", help="Disable tracing in workers.")
+    p.add_argument(
+        "--progress-secs", type=float, default=5.0, help="Progress report interval (stderr)."
+    )
+
+
+def run_from_args(args) -> int:
+    runner = BatchRunner(
+        provider_name=args.provider,
+        cache=args.cache,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        ordered=not args.unordered,
+        tracing=not args.no_trace,
+        max_steps=args.max_steps,
+        progress_secs=args.progress_secs,
+        on_progress=lambda s: print(
+            f"[batch] {s['done']} done ({s['errors']} errors, {s['skipped']} resumed) "
+            f"{s['items_per_sec']}/s in {s['wall_secs']}s",
+            file=sys.stderr,
+        ),
+    )
+    summary = runner.run(args.input, args.output, resume=not args.no_resume)
+    print(json.dumps(summary))
+    return 0 if summary["errors"] == 0 else 1
@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .agent import AgentRunner
+from .executor import ToolExecutor
+from .policy import Policy
+from .providers.base import Provider
+from .providers.mock import MockProvider
+from .tools import arith
+from .tools.builtins import EchoTool, default_registry
+
+
+@dataclass
+class BenchConfig:
+    runs: int = 200
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    concurrency: List[int] = field(default_factory=lambda: [1, 8, 64])
+    # Latency injected for the throughput section, where overlap is the point.
+    throughput_latency_ms: float = 20.0
+    tool_calls: int = 2000
+    startup_runs: int = 5
+    conversation_turns: int = 200
+    # Cassette recorded with `--record`; adds a `replay` section (production-shaped workload).
+    replay: Optional[str] = None
+    replay_latency_scale: float = 1.0
+    calc_exprs: List[str] = field(
+        default_factory=lambda: [
+            "19*7",
+            "(1+2)*3-4/5",
+            "2**10 % 7",
+            "-3.5*(2+8)//3",
+            "((12+7)*(3-1))**2",
+        ]
+    )
+
+
+def _runner(workdir: str, provider: Provider, *, tracing: bool) -> AgentRunner:
+    return AgentRunner(
+        policy=Policy(max_steps=16),
+        tools=default_registry(workspace_dir=f"{workdir}/workspace"),
+        provider=provider,
+        workspace_dir=f"{workdir}/workspace",
+        trace_dir=f"{workdir}/traces",
+        tracing=tracing,
+    )
+
+
+def _provider(cfg: BenchConfig, latency_ms: Optional[float] = None) -> MockProvider:
+    return MockProvider(
+        latency_secs=(cfg.latency_ms if latency_ms is None else latency_ms) / 1000,
+        jitter_secs=cfg.jitter_ms / 1000,
+        error_rate=cfg.error_rate,
+    )
+
+
+def bench_loop(cfg: BenchConfig, workdir: str, *, tracing: bool) -> Dict[str, float]:
+    """Per-step runtime overhead: wall time minus injected provider latency."""
+    provider = _provider(cfg)
+    runner = _runner(workdir, provider, tracing=tracing)
+    steps = errors = 0
+    runner.run_result("warmup")
+    provider.injected_secs = 0.0
+    t0 = time.perf_counter()
+    for _ in range(cfg.runs):
+        try:
+            steps += runner.run_result("bench").steps
+        except Exception:
+            errors += 1
+    wall = time.perf_counter() - t0
+    runner.close()
+    overhead = wall - provider.injected_secs
+    return {
+        "runs": cfg.runs,
+        "errors": errors,
+        "steps": steps,
+        "wall_secs": round(wall, 4),
+        "per_step_overhead_us": round(overhead / max(steps, 1) * 1e6, 2),
+        "per_run_overhead_us": round(overhead / cfg.runs * 1e6, 2),
+    }
+
+
+def bench_tool_dispatch(cfg: BenchConfig) -> Dict[str, float]:
+    """Cost of going through the ToolExecutor versus calling the tool directly."""
+    tool = EchoTool()
+    t0 = time.perf_counter()
+    for _ in range(cfg.tool_calls):
+        tool(text="x")
+    direct = (time.perf_counter() - t0) / cfg.tool_calls
+
+    ex = ToolExecutor(workers=4)
+    ex.run(tool, {"text": "x"}, timeout_secs=5)
+    t0 = time.perf_counter()
+    for _ in range(cfg.tool_calls):
+        ex.run(tool, {"text": "x"}, timeout_secs=5)
+    via_executor = (time.perf_counter() - t0) / cfg.tool_calls
+    ex.close()
+    return {
+        "direct_us": round(direct * 1e6, 2),
+        "executor_us": round(via_executor * 1e6, 2),
+        "dispatch_overhead_us": round((via_executor - direct) * 1e6, 2),
+    }
+
+
+def bench_calc(cfg: BenchConfig) -> Dict[str, float]:
+    """The calc engine (cold compile and cached) versus the old `eval` path."""
+    n = max(cfg.tool_calls // len(cfg.calc_exprs), 1)
+    exprs = cfg.calc_exprs * n
+
+    t0 = time.perf_counter()
+    for expr in exprs:
+        eval(expr, {"__builtins__": {}}, {})
+    via_eval = (time.perf_counter() - t0) / len(exprs)
+
+    arith.compile_expr.cache_clear()
+    t0 = time.perf_counter()
+    for expr in cfg.calc_exprs:
+        arith.evaluate(expr)
+    cold = (time.perf_counter() - t0) / len(cfg.calc_exprs)
+
+    t0 = time.perf_counter()
+    for expr in exprs:
+        arith.evaluate(expr)
+    cached = (time.perf_counter() - t0) / len(exprs)
+    return {
+        "eval_us": round(via_eval * 1e6, 2),
+        "arith_cold_us": round(cold * 1e6, 2),
+        "arith_cached_us": round(cached * 1e6, 2),
+    }
+
+
+def _importtime(module: str) -> Tuple[int, int]:
+    """(cumulative microseconds, modules imported) for `import module` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = count = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not line.startswith("import time:"):
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # header line
+        count += 1
+        if parts[2].strip() == module:
+            total = cumulative
+    return total, count
+
+
+def bench_startup(cfg: BenchConfig) -> Dict[str, float]:
+    """Cold import cost of the package, CLI and agent.
+
+    Measured with `-X importtime`; the median of `startup_runs` runs.
+    """
+    out: Dict[str, float] = {}
+    for key, module in (
+        ("package", "tyni_fish"),
+        ("cli", "tyni_fish.cli"),
+        ("agent", "tyni_fish.agent"),
+    ):
+        samples = [_importtime(module) for _ in range(max(cfg.startup_runs, 1))]
+        out[f"{key}_import_us"] = statistics.median(s[0] for s in samples)
+        out[f"{key}_modules"] = samples[-1][1]
+    return out
+
+
+def bench_memory(cfg: BenchConfig, workdir: str) -> Dict[str, float]:
+    """Heap growth retained across runs (leaks show up here) and peak usage."""
+    runner = _runner(workdir, _provider(cfg, latency_ms=0), tracing=True)
+    runner.run_result("warmup")
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(cfg.runs):
+        try:
+            runner.run_result("bench")
+        except Exception:
+            pass
+    if runner.trace_pipeline is not None:
+        runner.trace_pipeline.flush()
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    runner.close()
+    return {
+        "growth_bytes_per_run": round((after - before) / cfg.runs, 1),
+        "peak_bytes": peak,
+    }
+
+
+def bench_conversation(cfg: BenchConfig, workdir: str) -> Dict[str, float]:
+    """A long multi-turn session: request-building cost per turn and heap usage."""
+    from .agent import SYSTEM_PROMPT
+    from .providers.openai_compat import OpenAICompatProvider
+    from .session import Session
+
+    runner = _runner(workdir, _provider(cfg, latency_ms=0), tracing=True)
+    session = Session(runner=runner)
+    builder = OpenAICompatProvider(base_url="http://127.0.0.1:1/v1", api_key="bench", model="bench")
+    build_secs = 0.0
+    gc.collect()
+    tracemalloc.start()
+    for turn in range(cfg.conversation_turns):
+        session.send(f"turn {turn}: 19*7")
+        t0 = time.perf_counter()
+        builder._build_request(SYSTEM_PROMPT, session.messages)
+        build_secs += time.perf_counter() - t0
+    if runner.trace_pipeline is not None:
+        runner.trace_pipeline.flush()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    messages = len(session.messages)
+    session.close()
+    runner.close()
+    return {
+        "turns": cfg.conversation_turns,
+        "messages": messages,
+        "request_build_us": round(build_secs / cfg.conversation_turns * 1e6, 2),
+        "retained_bytes": current,
+        "peak_bytes": peak,
+    }
+
+
+def bench_throughput(cfg: BenchConfig, workdir: str) -> Dict[str, float]:
+    """Runs/sec with the given number of sessions multiplexed on one loop."""
+    out: Dict[str, float] = {}
+    for c in cfg.concurrency:
+        provider = _provider(cfg, latency_ms=cfg.throughput_latency_ms)
+        runner = _runner(workdir, provider, tracing=True)
+        n = max(cfg.runs, c * 2)
+        t0 = time.perf_counter()
+        results = runner.run_many(["bench"] * n, concurrency=c)
+        wall = time.perf_counter() - t0
+        runner.close()
+        ok = sum(1 for r in results if not isinstance(r, BaseException))
+        out[f"c{c}_runs_per_sec"] = round(ok / wall, 2)
+    return out
+
+
+def bench_replay(cfg: BenchConfig, workdir: str) -> Dict[str, float]:
+    """Runs/sec replaying a recorded cassette: its inputs, responses and (scaled) latencies."""
+    from .providers.replay import ReplayProvider
+
+    out: Dict[str, float] = {}
+    for c in cfg.concurrency:
+        provider = ReplayProvider(path=cfg.replay, latency_scale=cfg.replay_latency_scale)
+        inputs = provider.inputs()
+        if not inputs:
+            raise ValueError(f"{cfg.replay}: no recorded inputs to replay")
+        n = max(cfg.runs, c * 2, len(inputs))
+        runner = _runner(workdir, provider, tracing=True)
+        t0 = time.perf_counter()
+        results = runner.run_many([inputs[i % len(inputs)] for i in range(n)], concurrency=c)
+        wall = time.perf_counter() - t0
+        runner.close()
+        ok = sum(1 for r in results if not isinstance(r, BaseException))
+        out[f"c{c}_runs_per_sec"] = round(ok / wall, 2)
+        out["errors"] = out.get("errors", 0) + n - ok
+        out["misses"] = out.get("misses", 0) + provider.misses
+    return out
+
+
+def run_bench(cfg: BenchConfig) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="tyni-bench-")
+    try:
+        untraced = bench_loop(cfg, workdir, tracing=False)
+        traced = bench_loop(cfg, workdir, tracing=True)
+        results = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": cfg.runs,
+                "latency_ms": cfg.latency_ms,
+                "jitter_ms": cfg.jitter_ms,
+                "error_rate": cfg.error_rate,
+            },
+            "loop": {
+                "per_step_overhead_us": untraced["per_step_overhead_us"],
+                "per_step_overhead_traced_us": traced["per_step_overhead_us"],
+                "tracing_cost_per_step_us": round(
+                    traced["per_step_overhead_us"] - untraced["per_step_overhead_us"], 2
+                ),
+                "errors": traced["errors"] + untraced["errors"],
+            },
+            "tool_dispatch": bench_tool_dispatch(cfg),
+            "calc": bench_calc(cfg),
+            "startup": bench_startup(cfg),
+            "memory": bench_memory(cfg, workdir),
+            "conversation": bench_conversation(cfg, workdir),
+            "throughput": bench_throughput(cfg, workdir),
+        }
+        if cfg.replay:
+            results["replay"] = bench_replay(cfg, workdir)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], *, threshold: float = 0.2
+) -> List[str]:
+    """Regressions beyond `threshold` (relative).
+
+    Throughput and replay are better when higher; the rest when lower.
+    """
+    regressions = []
+    for section, metrics in current.items():
+        if section == "meta" or not isinstance(metrics, dict):
+            continue
+        for key, value in metrics.items():
+            base = baseline.get(section, {}).get(key)
+            if (
+                not isinstance(value, (int, float))
+                or not isinstance(base, (int, float))
+                or base <= 0
+            ):
+                continue
+            change = (value - base) / base
+            worse = -change if section in {"throughput", "replay"} else change
+            if key not in {"errors", "misses"} and worse > threshold:
+                regressions.append(f"{section}.{key}: {base} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    p = argparse.ArgumentParser(prog="tyni-fish bench", description="Benchmark the agent loop.")
+    add_bench_args(p)
+    return run_from_args(p.parse_args(argv))
+
+
+def add_bench_args(p) -> None:
+    p.add_argument("--runs", type=int, default=200, help="Runs per measurement.")
+    p.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Injected provider latency per step."
+    )
+    p.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency."
+    )
+    p.add_argument(
+        "--error-rate", type=float, default=0.0, help="Probability a provider call fails."
+    )
+    p.add_argument(
+        "--concurrency", default="1,8,64", help="Comma-separated session counts for throughput."
+    )
+    p.add_argument(
+        "--replay", default=None, help="Also benchmark replaying this recorded cassette."
+    )
+    p.add_argument(
+        "--replay-latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiply recorded latencies (0: none).",
+    )
+    p.add_argument("--save", default=None, help="Write results as a JSON baseline.")
+    p.add_argument("--compare", default=None, help="Baseline JSON to compare against.")
+    p.add_argument(
+        "--threshold", type=float, default=0.2, help="Relative regression budget (default 20%%)."
+    )
+
+
+def run_from_args(args) -> int:
+    cfg = BenchConfig(
+        runs=args.runs,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        concurrency=[int(c) for c in args.concurrency.split(",") if c.strip()],
+        replay=args.replay,
+        replay_latency_scale=args.replay_latency_scale,
+    )
+    results = run_bench(cfg)
+    print(json.dumps(results, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), threshold=args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from .policy import Policy
+from .providers.base import Usage
+
+
+class BudgetExceeded(RuntimeError):
+    """A per-run budget ran out.
+
+    `kind` is `input_tokens`, `output_tokens`, `run_secs` or `tool_secs`;
+    `usage` holds the run's totals at the point it stopped.
+    """
+
+    def __init__(
+        self, kind: str, used: float, limit: float, usage: Optional[Dict[str, Any]] = None
+    ) -> None:
+        super().__init__(f"Budget exceeded: {kind} {used:g} > {limit:g}")
+        self.kind = kind
+        self.used = used
+        self.limit = limit
+        self.usage = usage or {}
+
+
+@dataclass(eq=False)
+class RunBudget:
+    """Live accounting of one run against its policy's budgets.
+
+    Token counts come from the provider's reported `Usage`; calls without one
+    (dummy/mock providers, streams cut short) are counted from the same
+    estimate `ContextWindow` uses and tallied in `estimated_calls`.
+    """
+
+    policy: Policy
+    input_tokens: int = 0
+    output_tokens: int = 0
+    provider_calls: int = 0
+    estimated_calls: int = 0
+    tool_secs: float = 0.0
+    _t0: float = field(default_factory=time.monotonic, repr=False)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._t0
+
+    def remaining_secs(self) -> Optional[float]:
+        """Wall-clock time left for this run, or None without `max_run_secs`."""
+        if self.policy.max_run_secs is None:
+            return None
+        return max(0.0, self.policy.max_run_secs - self.elapsed())
+
+    def tool_timeout(self) -> float:
+        """The policy's per-tool timeout, shortened to what the run and tool budgets have left."""
+        timeout = float(self.policy.tool_timeout_secs)
+        remaining = self.remaining_secs()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        if self.policy.max_tool_secs is not None:
+            timeout = min(timeout, max(0.0, self.policy.max_tool_secs - self.tool_secs))
+        return timeout
+
+    def check_prompt(self, prompt_tokens: int) -> None:
+        """Before a provider call: stop if ~`prompt_tokens` more would overrun the input budget."""
+        self.check()
+        limit = self.policy.max_input_tokens
+        if limit is not None and self.input_tokens + prompt_tokens > limit:
+            raise self._exceeded("input_tokens", self.input_tokens + prompt_tokens, limit)
+
+    def add_call(self, usage: Optional[Usage], *, prompt_tokens: int, output_tokens: int) -> None:
+        """Count one provider call; the estimates are used when `usage` is None."""
+        self.provider_calls += 1
+        if usage is None:
+            self.estimated_calls += 1
+            usage = Usage(input_tokens=prompt_tokens, output_tokens=output_tokens)
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+
+    def add_tool_secs(self, secs: float) -> None:
+        self.tool_secs += secs
+
+    def check(self) -> None:
+        """Raise `BudgetExceeded` if any budget is used up."""
+        p = self.policy
+        if p.max_input_tokens is not None and self.input_tokens > p.max_input_tokens:
+            raise self._exceeded("input_tokens", self.input_tokens, p.max_input_tokens)
+        if p.max_output_tokens is not None and self.output_tokens > p.max_output_tokens:
+            raise self._exceeded("output_tokens", self.output_tokens, p.max_output_tokens)
+        if p.max_tool_secs is not None and self.tool_secs >= p.max_tool_secs:
+            raise self._exceeded("tool_secs", round(self.tool_secs, 6), p.max_tool_secs)
+        if p.max_run_secs is not None and self.elapsed() >= p.max_run_secs:
+            raise self._exceeded("run_secs", round(self.elapsed(), 6), p.max_run_secs)
+
+    def totals(self) -> Dict[str, int]:
+        """Running token totals (written on each `action` trace event)."""
+        return {"input_tokens": self.input_tokens, "output_tokens": self.output_tokens}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "provider_calls": self.provider_calls,
+            "estimated_calls": self.estimated_calls,
+            "tool_secs": round(self.tool_secs, 6),
+            "run_secs": round(self.elapsed(), 6),
+        }
+
+    def _exceeded(self, kind: str, used: float, limit: float) -> BudgetExceeded:
+        return BudgetExceeded(kind, used, limit, usage=self.to_dict())
@@ -4,41 +4,135 @@ import argparse
 import json
 import os
 import sys
+from typing import List, Optional
 
-from .agent import AgentRunner
-from .policy import Policy
+from .plugins import load_target
 
+# Subcommands whose arguments live next to their implementation:
+# (help, argument builder, handler). Their modules are imported only when the
+# subcommand is selected, so `--help` and unrelated commands start fast.
+_COMMANDS = {
+    "evals": (
+        "Run smoke evals.",
+        "tyni_fish.evals.harness:add_eval_args",
+        "tyni_fish.evals.harness:run_from_args",
+    ),
+    "traces": (
+        "Index and query the traces directory.",
+        "tyni_fish.trace_index:add_traces_args",
+        "tyni_fish.trace_index:run_from_args",
+    ),
+    "bench": (
+        "Benchmark the agent loop against a mock provider.",
+        "tyni_fish.bench:add_bench_args",
+        "tyni_fish.bench:run_from_args",
+    ),
+    "batch": (
+        "Run a JSONL file of inputs across a process pool.",
+        "tyni_fish.batch:add_batch_args",
+        "tyni_fish.batch:run_from_args",
+    ),
+}
 
-def main() -> None:
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    selected = next((a for a in argv if not a.startswith("-")), None)
     parser = argparse.ArgumentParser(prog="tyni-fish", description="Tyni Fish agent template.")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     p_run = sub.add_parser("run", help="Run one-shot input through the agent.")
     p_run.add_argument("--input", required=True, help="User input string.")
-    p_run.add_argument("--provider", default=os.getenv("TYNI_PROVIDER", "dummy"), help="Provider: dummy|openai-compat")
+    p_run.add_argument(
+        "--provider", default=None, help="Provider: dummy|openai-compat|router|replay"
+    )
     p_run.add_argument("--max-steps", type=int, default=None, help="Override max steps for this run.")
     p_run.add_argument("--no-trace", action="store_true", help="Disable tracing.")
+    p_run.add_argument("--cache", default=None, help="Response cache: 'memory' or a sqlite path.")
+    p_run.add_argument(
+        "--timings", action="store_true", help="Print where the run spent its time (stderr)."
+    )
 
-    p_chat = sub.add_parser("chat", help="Interactive chat (single-turn loop).")
-    p_chat.add_argument("--provider", default=os.getenv("TYNI_PROVIDER", "dummy"), help="Provider: dummy|openai-compat")
+    p_chat = sub.add_parser("chat", help="Interactive multi-turn chat.")
+    p_chat.add_argument(
+        "--provider", default=None, help="Provider: dummy|openai-compat|router|replay"
+    )
     p_chat.add_argument("--no-trace", action="store_true", help="Disable tracing.")
+    p_chat.add_argument("--stream", action="store_true", help="Print the answer token by token.")
+    p_chat.add_argument("--cache", default=None, help="Response cache: 'memory' or a sqlite path.")
+
+    p_serve = sub.add_parser("serve", help="Serve the agent over HTTP/JSON.")
+    p_serve.add_argument(
+        "--host", default=os.getenv("TYNI_HOST", "127.0.0.1"), help="Bind address."
+    )
+    p_serve.add_argument(
+        "--port", type=int, default=int(os.getenv("TYNI_PORT", "8080")), help="Bind port."
+    )
+    p_serve.add_argument(
+        "--provider", default=None, help="Provider: dummy|openai-compat|mock|router|replay"
+    )
+    p_serve.add_argument("--cache", default=None, help="Response cache: 'memory' or a sqlite path.")
+    p_serve.add_argument(
+        "--concurrency", type=int, default=None, help="Runs executing at once (default 16)."
+    )
+    p_serve.add_argument(
+        "--queue",
+        type=int,
+        default=None,
+        help="Requests allowed to wait; beyond that, 503 (default 64).",
+    )
+    p_serve.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=None,
+        help="Max seconds a request waits for a slot (default 30).",
+    )
+    p_serve.add_argument(
+        "--sessions", default=None, help="Directory for suspended sessions (enables session_id)."
+    )
+    p_serve.add_argument("--no-trace", action="store_true", help="Disable tracing.")
+
+    for p_cmd in (p_run, p_chat, p_serve):
+        p_cmd.add_argument(
+            "--config",
+            default=os.getenv("TYNI_CONFIG"),
+            help="JSON config (e.g. configs/tyni_fish.json); chat and serve reload it on change.",
+        )
+        p_cmd.add_argument(
+            "--record",
+            default=None,
+            help="Append provider calls to a cassette (replay with --provider replay).",
+        )
+
+    for name, (help_text, add_args, _) in _COMMANDS.items():
+        p_cmd = sub.add_parser(name, help=help_text)
+        if name == selected:
+            load_target(add_args)(p_cmd)
+
+    args = parser.parse_args(argv)
 
-    p_evals = sub.add_parser("evals", help="Run smoke evals.")
-    p_evals.add_argument("--dataset", default="evals/datasets/smoke.jsonl", help="Path to JSONL dataset.")
-    p_evals.add_argument("--provider", default="dummy", help="Provider for evals (default dummy).")
+    if args.cmd in _COMMANDS:
+        result = load_target(_COMMANDS[args.cmd][2])(args)
+        if args.cmd == "evals":
+            sys.exit(0 if result else 1)
+        if args.cmd in {"bench", "batch"}:
+            sys.exit(result)
+        return
 
-    args = parser.parse_args()
+    runner, config = _make_runner(args)
 
     if args.cmd == "run":
-        runner = AgentRunner.from_config(provider_name=args.provider)
-        runner.tracing = not args.no_trace
-        out = runner.run(args.input, max_steps=args.max_steps)
-        print(out)
+        result = runner.run_result(args.input, max_steps=args.max_steps)
+        print(result.output)
+        if args.timings:
+            print(json.dumps(result.timings, indent=2), file=sys.stderr)
         return
 
     if args.cmd == "chat":
-        runner = AgentRunner.from_config(provider_name=args.provider)
-        runner.tracing = not args.no_trace
+        from .session import Session
+
+        watcher = _watch_config(args, config, runner)
+        session = Session(runner=runner)
         print("Tyni Fish chat. Type 'exit' to quit.")
         while True:
             try:
@@ -49,18 +143,108 @@ def main() -> None:
                 continue
             if line.lower() in {"exit", "quit"}:
                 break
+            if args.stream:
+                try:
+                    session.send(line, on_token=lambda t: print(t, end="", flush=True))
+                    print()
+                except Exception as e:
+                    print(f"ERROR: {e}")
+                continue
             try:
-                out = runner.run(line)
+                out = session.send(line)
             except Exception as e:
                 out = f"ERROR: {e}"
             print(out)
+        if watcher is not None:
+            watcher.close()
+        return
+
+    if args.cmd == "serve":
+        import asyncio
+
+        from .server import AgentServer
+        from .session import SessionStore
+
+        server = AgentServer(
+            runner=runner,
+            host=args.host,
+            port=args.port,
+            max_concurrency=_pick(args.concurrency, config and config.server_concurrency, 16),
+            max_queue=_pick(args.queue, config and config.server_queue, 64),
+            queue_timeout_secs=_pick(
+                args.queue_timeout, config and config.server_queue_timeout_secs, 30.0
+            ),
+            sessions=SessionStore(runner=runner, directory=args.sessions)
+            if args.sessions
+            else None,
+        )
+        watcher = _watch_config(args, config, runner, server)
+        print(f"Serving on http://{args.host}:{args.port}")
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if watcher is not None:
+                watcher.close()
+            server.close()
+            runner.close()
         return
 
-    if args.cmd == "evals":
-        from .evals.harness import run_dataset
 
-        ok = run_dataset(args.dataset, provider_name=args.provider)
-        sys.exit(0 if ok else 1)
+def _pick(*values):
+    """First value that is not None (command-line flag, config file, default)."""
+    return next(v for v in values if v is not None)
+
+
+def _make_runner(args):
+    """Runner for run/chat/serve: from `--config` when given, else from env vars."""
+    if args.config:
+        from .config import build_runner, load_config
+
+        config = load_config(args.config)
+        runner = build_runner(
+            config, provider_name=args.provider, cache=args.cache, record=args.record
+        )
+    else:
+        from .agent import AgentRunner
+
+        config = None
+        runner = AgentRunner.from_config(
+            provider_name=args.provider or os.getenv("TYNI_PROVIDER", "dummy"),
+            cache=args.cache,
+            record=args.record,
+        )
+    if args.no_trace:
+        runner.tracing = False
+    return runner, config
+
+
+def _watch_config(args, config, runner, server=None):
+    """Hot-reload `--config` into the running runner (and server limits)."""
+    if config is None:
+        return None
+    from .config import RESTART_ONLY, ConfigWatcher, apply_config
+
+    def on_change(new, old):
+        apply_config(runner, new)
+        if args.no_trace:
+            runner.tracing = False
+        if server is not None:
+            server.set_limits(
+                max_concurrency=_pick(
+                    args.concurrency, new.server_concurrency, server.max_concurrency
+                ),
+                max_queue=_pick(args.queue, new.server_queue, server.max_queue),
+                queue_timeout_secs=_pick(
+                    args.queue_timeout, new.server_queue_timeout_secs, server.queue_timeout_secs
+                ),
+            )
+        ignored = [name for name in new.changed(old) if name in RESTART_ONLY]
+        note = f" (restart to apply: {', '.join(ignored)})" if ignored else ""
+        print(f"[config] reloaded {args.config}{note}", file=sys.stderr)
+
+    return ConfigWatcher(args.config, config, on_change).start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .policy import Policy
+
+if TYPE_CHECKING:
+    from .agent import AgentRunner
+
+# Section -> {key: expected type}; anything else in the file is rejected.
+_SECTIONS: Dict[str, Dict[str, Any]] = {
+    "tracing": {"enabled": bool, "trace_dir": str},
+    "executor": {"tool_workers": int, "max_queue": int},
+    "cache": {"response": (str, type(None)), "response_size": int, "tool_results": int},
+    "http_pool": {"max_per_host": int, "idle_timeout_secs": (int, float), "max_retries": int},
+    "server": {"concurrency": int, "queue": int, "queue_timeout_secs": (int, float)},
+}
+_TOP_LEVEL = {"provider", "policy", "workspace_dir", *_SECTIONS}
+
+# Fields that only take effect when the process starts; reloads ignore them.
+RESTART_ONLY = ("provider", "trace_dir", "response_cache", "http_max_per_host")
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Runtime settings loaded from `configs/tyni_fish.json`.
+
+    Keys present in the file win; absent ones fall back to the environment
+    (`Policy.from_env`, `TYNI_TOOL_WORKERS`, `TYNI_CACHE`, ...) and then to
+    defaults. `None` leaves a component's own default alone.
+    """
+
+    provider: str = "dummy"
+    policy: Policy = field(default_factory=Policy)
+    tracing: bool = True
+    trace_dir: str = "traces"
+    workspace_dir: str = "workspace"
+    tool_workers: int = 8
+    tool_max_queue: int = 256
+    tool_cache_size: int = 1024
+    response_cache: Optional[str] = None
+    response_cache_size: Optional[int] = None
+    http_max_per_host: Optional[int] = None
+    http_idle_timeout_secs: Optional[float] = None
+    http_max_retries: Optional[int] = None
+    server_concurrency: Optional[int] = None
+    server_queue: Optional[int] = None
+    server_queue_timeout_secs: Optional[float] = None
+
+    def changed(self, other: "RuntimeConfig") -> List[str]:
+        """Names of the fields that differ from `other`."""
+        return [
+            f.name
+            for f in dataclasses.fields(self)
+            if getattr(self, f.name) != getattr(other, f.name)
+        ]
+
+
+def parse_config(data: Dict[str, Any]) -> RuntimeConfig:
+    """Validate a config document and build a `RuntimeConfig` (ValueError on bad input)."""
+    if not isinstance(data, dict):
+        raise ValueError("config: expected a JSON object")
+    unknown = set(data) - _TOP_LEVEL
+    if unknown:
+        raise ValueError(f"config: unknown keys {sorted(unknown)}")
+    s = {name: _section(data, name, spec) for name, spec in _SECTIONS.items()}
+    cache = s["cache"]
+    return RuntimeConfig(
+        provider=str(data.get("provider") or os.getenv("TYNI_PROVIDER", "dummy")),
+        policy=_policy(data.get("policy", {})),
+        tracing=s["tracing"].get("enabled", True),
+        trace_dir=s["tracing"].get("trace_dir", "traces"),
+        workspace_dir=str(data.get("workspace_dir", "workspace")),
+        tool_workers=s["executor"].get("tool_workers", int(os.getenv("TYNI_TOOL_WORKERS", "8"))),
+        tool_max_queue=s["executor"].get("max_queue", 256),
+        tool_cache_size=cache.get("tool_results", int(os.getenv("TYNI_TOOL_CACHE_SIZE", "1024"))),
+        response_cache=cache["response"]
+        if "response" in cache
+        else os.getenv("TYNI_CACHE") or None,
+        response_cache_size=cache.get("response_size"),
+        http_max_per_host=s["http_pool"].get("max_per_host"),
+        http_idle_timeout_secs=s["http_pool"].get("idle_timeout_secs"),
+        http_max_retries=s["http_pool"].get("max_retries"),
+        server_concurrency=s["server"].get("concurrency"),
+        server_queue=s["server"].get("queue"),
+        server_queue_timeout_secs=s["server"].get("queue_timeout_secs"),
+    )
+
+
+def load_config(path: str) -> RuntimeConfig:
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"config: {path}: {e}") from None
+    return parse_config(data)
+
+
+def _section(data: Dict[str, Any], name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    section = data.get(name, {})
+    if not isinstance(section, dict):
+        raise ValueError(f"config: {name} must be an object")
+    for key, value in section.items():
+        if key not in spec:
+            raise ValueError(f"config: unknown key {name}.{key}")
+        expected = spec[key]
+        # bool is an int subclass; only accept it where a bool is expected.
+        if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+            raise ValueError(f"config: {name}.{key} has the wrong type ({type(value).__name__})")
+    return section
+
+
+def _policy(section: Dict[str, Any]) -> Policy:
+    if not isinstance(section, dict):
+        raise ValueError("config: policy must be an object")
+    names = {f.name for f in dataclasses.fields(Policy)}
+    unknown = set(section) - names
+    if unknown:
+        raise ValueError(f"config: unknown policy keys {sorted(unknown)}")
+    values = dict(section)
+    for key in ("allow_tools", "isolate_tools"):
+        if key in values:
+            values[key] = set(values[key])
+    if "tool_concurrency" in values:
+        values["tool_concurrency"] = dict(values["tool_concurrency"])
+    return dataclasses.replace(Policy.from_env(), **values)
+
+
+def build_runner(
+    config: RuntimeConfig,
+    *,
+    provider_name: Optional[str] = None,
+    cache: Optional[str] = None,
+    record: Optional[str] = None,
+) -> AgentRunner:
+    """An `AgentRunner` set up from `config`; arguments override the file."""
+    from .agent import AgentRunner
+
+    _apply_http_pools(config, startup=True)
+    runner = AgentRunner.from_config(
+        provider_name=provider_name or config.provider,
+        policy=config.policy,
+        workspace_dir=config.workspace_dir,
+        trace_dir=config.trace_dir,
+        tool_workers=config.tool_workers,
+        cache=cache or config.response_cache,
+        record=record,
+    )
+    runner.tracing = config.tracing
+    runner.executor.resize(max_queue=config.tool_max_queue)
+    if runner.tool_cache is not None:
+        runner.tool_cache.resize(config.tool_cache_size)
+    _apply_response_cache(runner, config)
+    return runner
+
+
+def apply_config(runner: AgentRunner, config: RuntimeConfig) -> None:
+    """Apply a reloaded config to a live runner.
+
+    Policy and tool registry are swapped together (`AgentRunner.reconfigure`,
+    which also empties the tool result cache), so runs in flight finish with
+    the old pair. Executor and cache sizes change in place; `RESTART_ONLY`
+    fields are left alone.
+    """
+    from .agent import AgentRunner
+
+    tools = AgentRunner.build_tools(config.policy, workspace_dir=config.workspace_dir)
+    if config.workspace_dir != runner.workspace_dir:
+        runner.workspace_dir = config.workspace_dir
+        runner._workspace_ready = False
+    runner.reconfigure(policy=config.policy, tools=tools)
+    runner.tracing = config.tracing
+    runner.executor.resize(workers=config.tool_workers, max_queue=config.tool_max_queue)
+    if runner.tool_cache is not None:
+        runner.tool_cache.resize(config.tool_cache_size)
+    _apply_response_cache(runner, config)
+    _apply_http_pools(config, startup=False)
+
+
+def _apply_response_cache(runner: AgentRunner, config: RuntimeConfig) -> None:
+    cache = getattr(runner.provider, "cache", None)
+    if config.response_cache_size is not None and cache is not None and hasattr(cache, "resize"):
+        cache.resize(config.response_cache_size)
+
+
+def _apply_http_pools(config: RuntimeConfig, *, startup: bool) -> None:
+    settings = {
+        "idle_timeout_secs": config.http_idle_timeout_secs,
+        "max_retries": config.http_max_retries,
+        # Per-host slots are created on first use, so this one only applies at startup.
+        "max_per_host": config.http_max_per_host if startup else None,
+    }
+    settings = {k: v for k, v in settings.items() if v is not None}
+    if not settings:
+        return
+    from .providers.http_pool import default_async_pool, default_pool
+
+    for pool in (default_pool(), default_async_pool()):
+        for key, value in settings.items():
+            setattr(pool, key, value)
+
+
+@dataclass(eq=False)
+class ConfigWatcher:
+    """Polls a config file and calls `on_change(new, old)` when it changes.
+
+    The file's mtime and size are checked every `interval_secs` from a daemon
+    thread. A file that fails to parse is skipped (counted in `errors`, the
+    message kept in `last_error`) and the previous config stays active.
+    """
+
+    path: str
+    config: RuntimeConfig
+    on_change: Callable[[RuntimeConfig, RuntimeConfig], None]
+    interval_secs: float = 1.0
+
+    reloads: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+    last_error: Optional[str] = field(default=None, init=False)
+    _stamp: Optional[Tuple[int, int]] = field(default=None, init=False, repr=False)
+    _stop: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._stamp = self._stat()
+
+    def start(self) -> "ConfigWatcher":
+        self._thread = threading.Thread(target=self._loop, name="tyni-config", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def check(self) -> bool:
+        """Reload now if the file changed; True when a new config was applied."""
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            new = load_config(self.path)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            self.last_error = str(e)
+            return False
+        old = self.config
+        if new == old:
+            return False
+        try:
+            self.on_change(new, old)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        self.config = new
+        self.reloads += 1
+        return True
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_secs):
+            self.check()
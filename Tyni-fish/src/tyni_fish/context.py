@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .providers.base import Message
+
+# Rough chat-format cost of a message beyond its content (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+# Headroom reserved for the note that replaces collapsed turns.
+_NOTE_TOKENS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token); no tokenizer dependency."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of `text` within roughly `max_tokens`."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    omitted = len(text) - head - tail
+    end = text[len(text) - tail :] if tail else ""
+    return f"{text[:head]}\n...[truncated {omitted} chars]...\n{end}"
+
+
+@dataclass
+class ContextWindow:
+    """Message history with a running token estimate and a budget.
+
+    - Tool results longer than `max_tool_output_tokens` are cut to head + tail
+      when appended.
+    - Before each provider call, `compact()` collapses the oldest turns
+      (an assistant action plus its tool results) into one short note until
+      the history fits `max_tokens`. Earlier conversation turns go first,
+      then the current turn's oldest steps. The first user message, the
+      latest one and the last `keep_recent_turns` (>= 1) turns are always kept.
+
+    `None` limits disable the corresponding stage.
+    """
+
+    max_tokens: Optional[int] = None
+    max_tool_output_tokens: Optional[int] = None
+    keep_recent_turns: int = 1
+    messages: List[Dict[str, str]] = field(default_factory=list)
+
+    total_tokens: int = field(default=0, init=False)
+    saved_tokens: int = field(default=0, init=False)
+    saved_bytes: int = field(default=0, init=False)
+    truncated: int = field(default=0, init=False)
+    collapsed: int = field(default=0, init=False)
+    _tokens: List[int] = field(default_factory=list, init=False, repr=False)
+    _collapsed_tools: Counter = field(default_factory=Counter, init=False, repr=False)
+    _has_note: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        existing, self.messages = self.messages, []
+        for message in existing:
+            self.append(message)
+
+    def append(self, message: Dict[str, str]) -> None:
+        message = Message.of(message)
+        if self.max_tool_output_tokens is not None and message.get("role") == "tool":
+            content = message.get("content", "")
+            short = truncate_text(content, self.max_tool_output_tokens)
+            if short is not content:
+                self.truncated += 1
+                self.saved_tokens += estimate_tokens(content) - estimate_tokens(short)
+                self.saved_bytes += len(content.encode("utf-8")) - len(short.encode("utf-8"))
+                message = Message(message["role"], short)
+        self.messages.append(message)
+        tokens = message_tokens(message)
+        self._tokens.append(tokens)
+        self.total_tokens += tokens
+
+    def extend(self, messages: List[Dict[str, str]]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def compact(self) -> None:
+        """Collapse old turns until the history fits `max_tokens` (if possible)."""
+        if self.max_tokens is None or self.total_tokens <= self.max_tokens:
+            return
+        first = 2 if self._has_note else 1
+        n = len(self.messages)
+        # The current turn starts at the latest user message (not the note); it is always kept.
+        turn = next((i for i in range(n - 1, first - 1, -1) if self._role(i) == "user"), 0)
+        starts = [i for i in range(max(first, turn + 1), n) if self._role(i) == "assistant"]
+        # Candidate cuts as `[start, end)` ranges to drop, smallest first:
+        # earlier turns message by message, then this turn's oldest steps.
+        candidates = [
+            [(first, end)] for end in range(first + 1, turn + 1) if self._role(end) != "tool"
+        ]
+        earlier = [(first, turn)] if turn > first else []
+        recent = len(starts) - self.keep_recent_turns + 1
+        candidates += [earlier + [(starts[0], end)] for end in starts[1:recent]]
+        if not candidates:
+            return
+        drop = candidates[-1]
+        for ranges in candidates:
+            freed = sum(sum(self._tokens[a:b]) for a, b in ranges)
+            if self.total_tokens - freed + _NOTE_TOKENS <= self.max_tokens:
+                drop = ranges
+                break
+        dropped = {i for a, b in drop for i in range(a, b)}
+        for i in sorted(dropped):
+            if self._role(i) == "assistant":
+                self._collapsed_tools.update(_tool_names(self.messages[i].get("content", "")))
+        self.collapsed += len(dropped)
+        # The previous note (if any) is replaced by an updated one.
+        dropped.update(range(1, first))
+        removed = [self.messages[i] for i in sorted(dropped)]
+        keep = [i for i in range(1, len(self.messages)) if i not in dropped]
+        note = Message("user", self._note_text())
+        self.messages[:] = [self.messages[0], note] + [self.messages[i] for i in keep]
+        self._tokens = [self._tokens[0], message_tokens(note)] + [self._tokens[i] for i in keep]
+        self._has_note = True
+        self.total_tokens = sum(self._tokens)
+        self.saved_tokens += sum(message_tokens(m) for m in removed) - message_tokens(note)
+        self.saved_bytes += sum(len(m.get("content", "").encode("utf-8")) for m in removed) - len(
+            note["content"].encode("utf-8")
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self.messages),
+            "tokens": self.total_tokens,
+            "saved_tokens": self.saved_tokens,
+            "saved_bytes": self.saved_bytes,
+            "truncated": self.truncated,
+            "collapsed": self.collapsed,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens,
+            "max_tool_output_tokens": self.max_tool_output_tokens,
+            "keep_recent_turns": self.keep_recent_turns,
+            "messages": self.messages,
+            "saved_tokens": self.saved_tokens,
+            "saved_bytes": self.saved_bytes,
+            "truncated": self.truncated,
+            "collapsed": self.collapsed,
+            "collapsed_tools": dict(self._collapsed_tools),
+            "has_note": self._has_note,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "ContextWindow":
+        ctx = ContextWindow(
+            max_tokens=data.get("max_tokens"),
+            max_tool_output_tokens=data.get("max_tool_output_tokens"),
+            keep_recent_turns=int(data.get("keep_recent_turns", 1)),
+            messages=list(data.get("messages", [])),
+        )
+        ctx.saved_tokens = int(data.get("saved_tokens", 0))
+        ctx.saved_bytes = int(data.get("saved_bytes", 0))
+        ctx.truncated = int(data.get("truncated", 0))
+        ctx.collapsed = int(data.get("collapsed", 0))
+        ctx._collapsed_tools.update(data.get("collapsed_tools", {}))
+        ctx._has_note = bool(data.get("has_note", False))
+        return ctx
+
+    def _role(self, i: int) -> str:
+        return self.messages[i].get("role", "")
+
+    def _note_text(self) -> str:
+        tools = ", ".join(
+            f"{name} x{n}" if n > 1 else name for name, n in sorted(self._collapsed_tools.items())
+        )
+        text = (
+            f"[context] {self.collapsed} earlier messages were omitted to fit the context budget."
+        )
+        return f"{text} Tools already called: {tools}." if tools else text
+
+
+def _tool_names(content: str) -> List[str]:
+    try:
+        action = json.loads(content)
+    except ValueError:
+        return []
+    if not isinstance(action, dict):
+        return []
+    if action.get("type") == "tool":
+        return [str(action.get("name", ""))]
+    if action.get("type") == "tools":
+        return [str(c.get("name", "")) for c in action.get("calls", []) if isinstance(c, dict)]
+    return []
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
 import json
-from dataclasses import dataclass
-from typing import List, Optional
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from ..agent import AgentRunner
+from ..budget import BudgetExceeded
 
 
 @dataclass
@@ -15,60 +20,321 @@ class Case:
     max_steps: Optional[int] = None
 
 
-def _load_cases(path: str) -> List[Case]:
-    cases: List[Case] = []
+@dataclass
+class CaseResult:
+    id: str
+    ok: bool
+    output: str
+    latency_secs: float
+    steps: int = 0
+    tool_calls: int = 0
+    expected_contains: Optional[List[str]] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    budget_exceeded: Optional[str] = None
+
+
+def parse_shard(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """`"i/n"` -> (i, n); cases whose line index % n == i belong to shard i."""
+    if not spec:
+        return None
+    i, _, n = spec.partition("/")
+    shard = (int(i), int(n))
+    if shard[1] <= 0 or not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"Invalid shard {spec!r}: expected i/n with 0 <= i < n")
+    return shard
+
+
+def iter_cases(path: str, *, shard: Optional[Tuple[int, int]] = None) -> Iterator[Case]:
+    """Stream cases from a JSONL file without loading it whole."""
     with open(path, "r", encoding="utf-8") as f:
+        index = -1
         for line in f:
             line = line.strip()
             if not line:
                 continue
+            index += 1
+            if shard is not None and index % shard[1] != shard[0]:
+                continue
             obj = json.loads(line)
-            cases.append(
-                Case(
-                    id=str(obj["id"]),
-                    input=str(obj["input"]),
-                    expected_contains=list(obj.get("expected_contains", [])),
-                    max_steps=obj.get("max_steps"),
-                )
+            yield Case(
+                id=str(obj["id"]),
+                input=str(obj["input"]),
+                expected_contains=list(obj.get("expected_contains", [])),
+                max_steps=obj.get("max_steps"),
+            )
+
+
+def _load_cases(path: str) -> List[Case]:
+    return list(iter_cases(path))
+
+
+def _check(case: Case, out: str) -> bool:
+    return all(s in out for s in case.expected_contains)
+
+
+def _result(
+    case: Case,
+    ok: bool,
+    out: str,
+    latency_secs: float,
+    steps: int,
+    tool_calls: int,
+    usage: Dict[str, Any],
+    exceeded: Optional[str],
+) -> CaseResult:
+    return CaseResult(
+        case.id,
+        ok,
+        out,
+        latency_secs,
+        steps,
+        tool_calls,
+        case.expected_contains,
+        input_tokens=int(usage.get("input_tokens", 0)),
+        output_tokens=int(usage.get("output_tokens", 0)),
+        budget_exceeded=exceeded,
+    )
+
+
+def eval_case(runner: AgentRunner, case: Case) -> CaseResult:
+    t0 = time.perf_counter()
+    steps = tool_calls = 0
+    usage: Dict[str, Any] = {}
+    exceeded = None
+    try:
+        res = runner.run_result(case.input, max_steps=case.max_steps)
+        out, steps, tool_calls, usage = res.output, res.steps, res.tool_calls, res.usage or {}
+        ok = _check(case, out)
+    except Exception as e:
+        out = f"ERROR: {e}"
+        ok = False
+        if isinstance(e, BudgetExceeded):
+            usage, exceeded = e.usage, e.kind
+    return _result(case, ok, out, time.perf_counter() - t0, steps, tool_calls, usage, exceeded)
+
+
+async def aeval_case(runner: AgentRunner, case: Case) -> CaseResult:
+    t0 = time.perf_counter()
+    steps = tool_calls = 0
+    usage: Dict[str, Any] = {}
+    exceeded = None
+    try:
+        res = await runner.arun_result(case.input, max_steps=case.max_steps)
+        out, steps, tool_calls, usage = res.output, res.steps, res.tool_calls, res.usage or {}
+        ok = _check(case, out)
+    except Exception as e:
+        out = f"ERROR: {e}"
+        ok = False
+        if isinstance(e, BudgetExceeded):
+            usage, exceeded = e.usage, e.kind
+    return _result(case, ok, out, time.perf_counter() - t0, steps, tool_calls, usage, exceeded)
+
+
+_worker_runner: Optional[AgentRunner] = None
+
+
+def _init_worker(provider_name: str, cache: Optional[str]) -> None:
+    global _worker_runner
+    _worker_runner = AgentRunner.from_config(provider_name=provider_name, cache=cache)
+
+
+def _eval_in_worker(case: Case) -> CaseResult:
+    assert _worker_runner is not None
+    return eval_case(_worker_runner, case)
+
+
+def _bounded_map(
+    ex: concurrent.futures.Executor,
+    fn: Callable[[Case], CaseResult],
+    cases: Iterable[Case],
+    window: int,
+) -> Iterator[CaseResult]:
+    """Submit at most `window` cases ahead; yield results as they complete."""
+    pending: set = set()
+    for case in cases:
+        pending.add(ex.submit(fn, case))
+        if len(pending) >= window:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
             )
-    return cases
+            yield from (f.result() for f in done)
+    for f in concurrent.futures.as_completed(pending):
+        yield f.result()
 
 
-def run_dataset(path: str, *, provider_name: str = "dummy") -> bool:
-    runner = AgentRunner.from_config(provider_name=provider_name)
-    total = 0
-    passed = 0
+async def _run_async(
+    runner: AgentRunner,
+    cases: Iterable[Case],
+    workers: int,
+    on_result: Callable[[CaseResult], None],
+) -> None:
+    sem = asyncio.Semaphore(workers)
+    tasks = set()
 
-    for case in _load_cases(path):
-        total += 1
+    async def one(case: Case) -> None:
         try:
-            out = runner.run(case.input, max_steps=case.max_steps)
-            ok = all(s in out for s in case.expected_contains)
-        except Exception as e:
-            out = f"ERROR: {e}"
-            ok = False
-
-        status = "PASS" if ok else "FAIL"
-        print(f"[{status}] {case.id}")
-        if not ok:
-            print("  output:", out)
-            print("  expected_contains:", case.expected_contains)
+            on_result(await aeval_case(runner, case))
+        finally:
+            sem.release()
+
+    for case in cases:
+        await sem.acquire()
+        task = asyncio.ensure_future(one(case))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile.
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(results: List[CaseResult], wall_secs: float) -> dict:
+    latencies = sorted(r.latency_secs for r in results)
+    total = len(results)
+    return {
+        "total": total,
+        "passed": sum(r.ok for r in results),
+        "wall_secs": round(wall_secs, 4),
+        "cases_per_sec": round(total / wall_secs, 2) if wall_secs > 0 else 0.0,
+        "latency_p50": round(_percentile(latencies, 50), 4),
+        "latency_p95": round(_percentile(latencies, 95), 4),
+        "latency_p99": round(_percentile(latencies, 99), 4),
+        "latency_mean": round(sum(latencies) / total, 4) if total else 0.0,
+        "steps": sum(r.steps for r in results),
+        "tool_calls": sum(r.tool_calls for r in results),
+        "input_tokens": sum(r.input_tokens for r in results),
+        "output_tokens": sum(r.output_tokens for r in results),
+        "budget_exceeded": sum(1 for r in results if r.budget_exceeded),
+    }
+
+
+def run_dataset(
+    path: str,
+    *,
+    provider_name: str = "dummy",
+    cache: Optional[str] = None,
+    workers: int = 1,
+    mode: str = "thread",
+    shard: Optional[str] = None,
+    results_path: Optional[str] = None,
+    report_path: Optional[str] = None,
+) -> bool:
+    """Run a JSONL dataset and print PASS/FAIL per case plus an aggregate report.
+
+    `workers` > 1 runs cases concurrently (`mode`: thread | process | async);
+    results then arrive in completion order. Cases that depend on each other
+    (e.g. write then read a note) need `workers=1`.
+    """
+    cases = iter_cases(path, shard=parse_shard(shard))
+    runner = (
+        None
+        if mode == "process" and workers > 1
+        else AgentRunner.from_config(provider_name=provider_name, cache=cache)
+    )
+    results: List[CaseResult] = []
+    out_file = open(results_path, "w", encoding="utf-8") if results_path else None
+
+    def record(r: CaseResult) -> None:
+        results.append(r)
+        status = "PASS" if r.ok else "FAIL"
+        print(
+            f"[{status}] {r.id} (steps={r.steps}, tool_calls={r.tool_calls}, "
+            f"latency={r.latency_secs * 1000:.1f}ms)"
+        )
+        if not r.ok:
+            print("  output:", r.output)
+            print("  expected_contains:", r.expected_contains)
+        if out_file is not None:
+            row = asdict(r)
+            row.pop("expected_contains")
+            out_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    t0 = time.perf_counter()
+    try:
+        if workers <= 1:
+            for case in cases:
+                record(eval_case(runner, case))
+        elif mode == "async":
+            asyncio.run(_run_async(runner, cases, workers, record))
+        elif mode == "process":
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(provider_name, cache)
+            ) as ex:
+                for r in _bounded_map(ex, _eval_in_worker, cases, workers * 4):
+                    record(r)
+        elif mode == "thread":
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+                for r in _bounded_map(ex, lambda c: eval_case(runner, c), cases, workers * 4):
+                    record(r)
         else:
-            passed += 1
+            raise ValueError(f"Unknown eval mode: {mode}")
+    finally:
+        if out_file is not None:
+            out_file.close()
+    report = summarize(results, time.perf_counter() - t0)
+
+    print(f"Result: {report['passed']}/{report['total']} passed")
+    print(f"Steps: {report['steps']} total, {report['tool_calls']} tool calls")
+    print(
+        f"Tokens: {report['input_tokens']} in, {report['output_tokens']} out; "
+        f"{report['budget_exceeded']} runs stopped by a budget"
+    )
+    print(
+        f"Latency: p50={report['latency_p50'] * 1000:.1f}ms "
+        f"p95={report['latency_p95'] * 1000:.1f}ms p99={report['latency_p99'] * 1000:.1f}ms; "
+        f"{report['cases_per_sec']} cases/sec"
+    )
+    if runner is not None and hasattr(runner.provider, "stats"):
+        print("Provider:", runner.provider.stats())
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report["passed"] == report["total"]
+
+
+def add_eval_args(p) -> None:
+    p.add_argument("--dataset", default="evals/datasets/smoke.jsonl", help="Path to JSONL dataset.")
+    p.add_argument("--provider", default="dummy", help="Provider for evals (default dummy).")
+    p.add_argument("--cache", default=None, help="Response cache: 'memory' or a sqlite path.")
+    p.add_argument(
+        "--workers", type=int, default=1, help="Concurrent cases (default 1: sequential, in order)."
+    )
+    p.add_argument(
+        "--mode", default="thread", choices=["thread", "process", "async"], help="Worker model."
+    )
+    p.add_argument("--shard", default=None, help="Run shard i/n of the dataset (e.g. 0/4).")
+    p.add_argument("--results", default=None, help="Write per-case results as JSONL.")
+    p.add_argument("--report", default=None, help="Write the aggregate report as JSON.")
+
 
-    print(f"Result: {passed}/{total} passed")
-    return passed == total
+def run_from_args(args) -> bool:
+    return run_dataset(
+        args.dataset,
+        provider_name=args.provider,
+        cache=args.cache,
+        workers=args.workers,
+        mode=args.mode,
+        shard=args.shard,
+        results_path=args.results,
+        report_path=args.report,
+    )
 
 
 def main() -> None:
     import argparse
 
     p = argparse.ArgumentParser()
-    p.add_argument("--dataset", default="evals/datasets/smoke.jsonl")
-    p.add_argument("--provider", default="dummy")
+    add_eval_args(p)
     args = p.parse_args()
 
-    ok = run_dataset(args.dataset, provider_name=args.provider)
+    ok = run_from_args(args)
     raise SystemExit(0 if ok else 1)
 
 
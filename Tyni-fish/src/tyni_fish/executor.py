@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .tools.base import Tool, ToolError
+
+
+@dataclass
+class _Job:
+    name: str
+    fn: Callable[[], str]
+    future: concurrent.futures.Future
+
+
+@dataclass
+class ToolExecutor:
+    """Long-lived engine that runs tool calls for a runner.
+
+    - `workers` daemon threads pull jobs from one queue; at most `max_queue`
+      jobs may wait, further submissions fail fast with a ToolError.
+    - Per-tool concurrency limits park excess calls in a side queue instead of
+      blocking a worker.
+    - A timed-out call frees its caller immediately. The thread still stuck in
+      it is written off and replaced (up to `max_stuck`), so capacity survives
+      runaway tools. `isolate=True` runs the call in a child process that is
+      killed on timeout, for tools that must really stop.
+    """
+
+    workers: int = 8
+    max_queue: int = 256
+    max_stuck: int = 32
+    # Grace period for isolated calls: the worker kills the child itself.
+    isolate_grace_secs: float = 1.0
+
+    _queue: "queue.SimpleQueue[Optional[_Job]]" = field(
+        default_factory=queue.SimpleQueue, init=False, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _live: int = field(default=0, init=False)
+    _stuck: int = field(default=0, init=False)
+    _pending: int = field(default=0, init=False)
+    _active: Dict[str, int] = field(
+        default_factory=lambda: defaultdict(int), init=False, repr=False
+    )
+    _parked: Dict[str, Deque[_Job]] = field(
+        default_factory=lambda: defaultdict(deque), init=False, repr=False
+    )
+    _closed: bool = field(default=False, init=False)
+
+    def submit(
+        self,
+        tool: Tool,
+        args: Dict[str, Any],
+        *,
+        timeout_secs: float,
+        limit: Optional[int] = None,
+        isolate: bool = False,
+    ) -> concurrent.futures.Future:
+        if isolate:
+            fn = lambda: _run_isolated(tool, args, timeout_secs)  # noqa: E731
+        else:
+            fn = lambda: tool(**args)  # noqa: E731
+        job = _Job(name=tool.name, fn=fn, future=concurrent.futures.Future())
+
+        with self._lock:
+            if self._closed:
+                raise ToolError("tool executor is closed")
+            if self._pending >= self.max_queue:
+                raise ToolError(f"tool executor saturated ({self._pending} calls queued)")
+            self._pending += 1
+            if limit is not None and self._active[job.name] >= limit:
+                self._parked[job.name].append(job)
+            else:
+                self._active[job.name] += 1
+                self._queue.put(job)
+            self._spawn_locked()
+        return job.future
+
+    def run(
+        self,
+        tool: Tool,
+        args: Dict[str, Any],
+        *,
+        timeout_secs: float,
+        limit: Optional[int] = None,
+        isolate: bool = False,
+    ) -> str:
+        """Blocking call with timeout (raises TimeoutError)."""
+        fut = self.submit(tool, args, timeout_secs=timeout_secs, limit=limit, isolate=isolate)
+        wait = timeout_secs + (self.isolate_grace_secs if isolate else 0)
+        try:
+            return fut.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            self.abandon(fut)
+            raise TimeoutError(f"timed out after {timeout_secs}s") from None
+
+    async def arun(
+        self,
+        tool: Tool,
+        args: Dict[str, Any],
+        *,
+        timeout_secs: float,
+        limit: Optional[int] = None,
+        isolate: bool = False,
+    ) -> str:
+        fut = self.submit(tool, args, timeout_secs=timeout_secs, limit=limit, isolate=isolate)
+        wait = timeout_secs + (self.isolate_grace_secs if isolate else 0)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout=wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.abandon(fut)
+            raise
+
+    def abandon(self, fut: concurrent.futures.Future) -> None:
+        """Give up on a call: drop it if still queued, else write off its thread."""
+        if fut.cancel():
+            return
+        if fut.done():
+            return
+        with self._lock:
+            self._stuck += 1
+            self._spawn_locked()
+        fut.add_done_callback(self._unstick)
+
+    def resize(self, *, workers: Optional[int] = None, max_queue: Optional[int] = None) -> None:
+        """Change capacity live. Extra threads start at once; surplus ones
+        retire as they finish their current job."""
+        with self._lock:
+            if workers is not None:
+                self.workers = max(1, workers)
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if not self._closed and self._live:
+                self._spawn_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "live": self._live,
+                "stuck": self._stuck,
+                "queued": self._pending,
+                "active": {k: v for k, v in self._active.items() if v},
+                "parked": {k: len(v) for k, v in self._parked.items() if v},
+            }
+
+    def close(self) -> None:
+        """Stop idle workers; calls already running finish on their own."""
+        with self._lock:
+            self._closed = True
+            live = self._live
+            parked = [job for jobs in self._parked.values() for job in jobs]
+            self._parked.clear()
+        for job in parked:
+            job.future.cancel()
+        for _ in range(live):
+            self._queue.put(None)
+
+    def _spawn_locked(self) -> None:
+        want = self.workers + min(self._stuck, self.max_stuck)
+        while self._live < want:
+            self._live += 1
+            threading.Thread(
+                target=self._worker, name=f"tyni-tool-{self._live}", daemon=True
+            ).start()
+
+    def _unstick(self, _: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._stuck -= 1
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                with self._lock:
+                    self._live -= 1
+                return
+            with self._lock:
+                self._pending -= 1
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn())
+                except BaseException as e:
+                    job.future.set_exception(e)
+            with self._lock:
+                self._active[job.name] -= 1
+                parked = self._parked.get(job.name)
+                if parked:
+                    self._active[job.name] += 1
+                    self._queue.put(parked.popleft())
+                # Retire surplus threads once written-off calls have finished.
+                if self._live > self.workers + self._stuck:
+                    self._live -= 1
+                    return
+
+
+def _child_main(conn: Any, tool: Tool, args: Dict[str, Any]) -> None:
+    try:
+        conn.send(("ok", tool(**args)))
+    except BaseException as e:
+        conn.send(("err", str(e)))
+    finally:
+        conn.close()
+
+
+def _run_isolated(tool: Tool, args: Dict[str, Any], timeout_secs: float) -> str:
+    import multiprocessing
+
+    # Never plain fork: this process runs executor, trace and config threads, and a
+    # forked child can inherit a lock one of them held. A forkserver forks from a
+    # clean single-threaded server, so it stays cheap after the first call.
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child_main, args=(child, tool, args), daemon=True)
+    proc.start()
+    child.close()
+    try:
+        if not parent.poll(timeout_secs):
+            raise TimeoutError(f"timed out after {timeout_secs}s (process killed)")
+        status, value = parent.recv()
+    except EOFError:
+        raise ToolError(f"{tool.name}: isolated process died (exit code {proc.exitcode})") from None
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        parent.close()
+    if status != "ok":
+        raise ToolError(value)
+    return value
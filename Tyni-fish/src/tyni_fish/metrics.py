@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import atexit
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Histogram:
+    """Cumulative latency histogram (Prometheus-style buckets, in seconds)."""
+
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list, init=False)
+    total: float = field(default=0.0, init=False)
+    n: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+    def render(self, name: str, labels: Labels = ()) -> List[str]:
+        prefix = "".join(f'{k}="{v}",' for k, v in labels)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts[:-1], strict=True):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.n}')
+        lines.append(f"{name}_sum{_fmt_labels(labels)} {self.total:.6f}")
+        lines.append(f"{name}_count{_fmt_labels(labels)} {self.n}")
+        return lines
+
+
+def _fmt_labels(labels: Labels) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+
+@dataclass(eq=False)
+class MetricsRegistry:
+    """Thread-safe in-process counters and histograms, rendered as Prometheus text."""
+
+    counters: Dict[Tuple[str, Labels], float] = field(default_factory=dict)
+    histograms: Dict[Tuple[str, Labels], Histogram] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, secs: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(secs)
+
+    @contextmanager
+    def span(self, name: str, **labels: str) -> Iterator[None]:
+        """Time a block with the monotonic clock into histogram `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda kv: kv[0])
+            lines: List[str] = []
+            typed = set()
+            for (name, labels), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+            for (name, labels), hist in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                lines += hist.render(name, labels)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+@dataclass
+class RunTimings:
+    """Where one run spent its time (seconds, monotonic clock)."""
+
+    provider_secs: float = 0.0
+    provider_calls: int = 0
+    tool_secs: float = 0.0
+    tool_calls: int = 0
+    tool_errors: int = 0
+    tool_cache_hits: int = 0
+    trace_secs: float = 0.0
+    steps: List[Dict[str, float]] = field(default_factory=list)
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self._t0
+        return {
+            "wall_secs": round(wall, 6),
+            "provider_secs": round(self.provider_secs, 6),
+            "provider_calls": self.provider_calls,
+            "tool_secs": round(self.tool_secs, 6),
+            "tool_calls": self.tool_calls,
+            "tool_errors": self.tool_errors,
+            "tool_cache_hits": self.tool_cache_hits,
+            "trace_secs": round(self.trace_secs, 6),
+            "other_secs": round(
+                max(0.0, wall - self.provider_secs - self.tool_secs - self.trace_secs), 6
+            ),
+            "steps": self.steps,
+        }
+
+
+class SamplingProfiler:
+    """Samples every thread's stack every `interval_secs`; dumps collapsed stacks.
+
+    The output (`frame;frame;frame count` per line) feeds flamegraph tools.
+    """
+
+    def __init__(self, path: str, interval_secs: float = 0.005) -> None:
+        self.path = path
+        self.interval_secs = interval_secs
+        self.samples: "collections.Counter[str]" = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="tyni-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _loop(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_secs):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+
+_profiler_lock = threading.Lock()
+_profiler_started = False
+
+
+def start_profiler_from_env() -> Optional[str]:
+    """Start a process-wide profiler once, per `TYNI_PROFILE`; dumped at exit.
+
+    `TYNI_PROFILE=cprofile[:path]` (pstats file, default `tyni.prof`; covers
+    the thread that starts it, i.e. the event loop) or `sample[:path]`
+    (collapsed stacks of all threads, default `tyni.stacks`).
+    """
+    global _profiler_started
+    spec = os.getenv("TYNI_PROFILE", "")
+    if not spec:
+        return None
+    with _profiler_lock:
+        if _profiler_started:
+            return spec
+        _profiler_started = True
+    kind, _, path = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind == "cprofile":
+        import cProfile
+
+        prof = cProfile.Profile()
+        prof.enable()
+        atexit.register(lambda: (prof.disable(), prof.dump_stats(path or "tyni.prof")))
+    elif kind == "sample":
+        sampler = SamplingProfiler(path or "tyni.stacks")
+        sampler.start()
+        atexit.register(sampler.stop)
+    else:
+        raise ValueError(f"Unknown TYNI_PROFILE: {spec}")
+    return spec
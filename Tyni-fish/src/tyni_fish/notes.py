@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import atexit
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only.
+    fcntl = None  # type: ignore[assignment]
+
+_TAG = re.compile(r"^[\w.-]+$")
+
+
+@dataclass(frozen=True)
+class Note:
+    id: int
+    ts: float
+    text: str
+    tags: Tuple[str, ...] = ()
+
+    def format(self) -> str:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.ts))
+        tags = f" [{','.join(self.tags)}]" if self.tags else ""
+        return f"#{self.id} {stamp}{tags} {self.text}"
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(eq=False)
+class NoteStore:
+    """Append-only note log (`notes.jsonl`) with in-memory indexes.
+
+    - One append handle stays open; each note is a single `write` under an
+      exclusive `flock`, so concurrent threads and processes never interleave.
+    - `fsync`: `always` (every note), `batch` or `never`. In `batch` mode a
+      note is synced within `fsync_interval_secs`: by a later append, or by a
+      timer when none comes. Pending notes are also synced on flush/close and
+      at interpreter exit.
+    - Lookups use indexes built incrementally from the file (catching up on
+      notes appended by other processes): time (bisect), tags, and a trigram
+      index for case-insensitive substring search. Only matching notes are
+      read back from disk.
+
+    A legacy `notes.txt` next to the store is imported once, one note per line.
+    """
+
+    path: str
+    fsync: str = "batch"
+    fsync_interval_secs: float = 1.0
+
+    _fd: Optional[int] = field(default=None, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    _offsets: List[int] = field(default_factory=list, init=False, repr=False)
+    _ts: List[float] = field(default_factory=list, init=False, repr=False)
+    _tags: Dict[str, List[int]] = field(default_factory=dict, init=False, repr=False)
+    _grams: Dict[str, List[int]] = field(default_factory=dict, init=False, repr=False)
+    _indexed: int = field(default=0, init=False, repr=False)
+    _last_fsync: float = field(default=0.0, init=False, repr=False)
+    _dirty: bool = field(default=False, init=False, repr=False)
+    _timer: Optional[threading.Timer] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.fsync not in {"always", "batch", "never"}:
+            raise ValueError(f"Unknown fsync policy: {self.fsync}")
+
+    def append(self, text: str, tags: Iterable[str] = ()) -> Note:
+        text = " ".join(str(text).split())
+        if not text:
+            raise ValueError("note text is empty")
+        tags = tuple(sorted({t.strip().lower() for t in tags if t.strip()}))
+        for tag in tags:
+            if not _TAG.match(tag):
+                raise ValueError(f"invalid tag: {tag!r}")
+        with self._lock, self._flock(exclusive=True):
+            self._catch_up()
+            note = Note(id=len(self._offsets), ts=time.time(), text=text, tags=tags)
+            line = (
+                json.dumps({"ts": note.ts, "text": text, "tags": list(tags)}, ensure_ascii=False)
+                + "\n"
+            )
+            os.write(self._fd, line.encode("utf-8"))
+            self._index(note, self._indexed)
+            self._indexed += len(line.encode("utf-8"))
+            self._dirty = True
+            now = time.monotonic()
+            if self.fsync == "always" or (
+                self.fsync == "batch" and now - self._last_fsync >= self.fsync_interval_secs
+            ):
+                os.fsync(self._fd)
+                self._last_fsync = now
+                self._dirty = False
+            elif self.fsync == "batch" and self._timer is None:
+                # The tail of a burst would otherwise wait for the next append.
+                self._timer = threading.Timer(self.fsync_interval_secs, self._deferred_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return note
+
+    def get(self, note_id: int) -> Note:
+        with self._lock:
+            self._refresh()
+            if not 0 <= note_id < len(self._offsets):
+                raise KeyError(note_id)
+            return self._read(note_id)
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    def search(
+        self,
+        query: str = "",
+        *,
+        tag: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 20,
+    ) -> Tuple[List[Note], int]:
+        """Newest-first matches as (page, total matches)."""
+        with self._lock:
+            self._refresh()
+            lo = bisect.bisect_left(self._ts, since) if since is not None else 0
+            hi = bisect.bisect_right(self._ts, until) if until is not None else len(self._ts)
+            candidates: Optional[Set[int]] = None
+            if tag is not None:
+                candidates = set(self._tags.get(tag.strip().lower(), ()))
+            needle = " ".join(query.split()).lower()
+            # Shorter needles have no trigrams and fall back to scanning the range.
+            for gram in _trigrams(needle):
+                ids = set(self._grams.get(gram, ()))
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            if candidates is None:
+                ordered: Iterable[int] = range(hi - 1, lo - 1, -1)
+            else:
+                ordered = sorted((i for i in candidates if lo <= i < hi), reverse=True)
+            matches: List[Note] = []
+            total = 0
+            for i in ordered:
+                if needle:
+                    note = self._read(i)
+                    if needle not in note.text.lower():
+                        continue
+                else:
+                    note = None
+                if offset <= total < offset + limit:
+                    matches.append(note or self._read(i))
+                total += 1
+            return matches, total
+
+    def tail(self, limit: int = 10, *, before: Optional[int] = None) -> List[Note]:
+        """The last `limit` notes (oldest first), optionally before note id `before`."""
+        with self._lock:
+            self._refresh()
+            end = len(self._offsets) if before is None else max(0, min(before, len(self._offsets)))
+            return [self._read(i) for i in range(max(0, end - limit), end)]
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._fd is not None and self._dirty:
+                os.fsync(self._fd)
+                self._last_fsync = time.monotonic()
+                self._dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.flush()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _deferred_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+            self.flush()
+
+    def _refresh(self) -> None:
+        with self._flock(exclusive=False):
+            self._catch_up()
+
+    def _open(self) -> None:
+        if self._fd is not None:
+            return
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        legacy = os.path.join(parent, "notes.txt")
+        fresh = not os.path.exists(self.path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        if fresh and os.path.exists(legacy):
+            self._import_legacy(legacy)
+
+    def _import_legacy(self, legacy: str) -> None:
+        with self._flock(exclusive=True):
+            if os.fstat(self._fd).st_size:
+                return
+            ts = os.path.getmtime(legacy)
+            with open(legacy, "r", encoding="utf-8") as f:
+                lines = [
+                    json.dumps(
+                        {"ts": ts, "text": " ".join(line.split()), "tags": []}, ensure_ascii=False
+                    )
+                    + "\n"
+                    for line in f
+                    if line.strip()
+                ]
+            os.write(self._fd, "".join(lines).encode("utf-8"))
+
+    @contextmanager
+    def _flock(self, *, exclusive: bool) -> Iterator[None]:
+        self._open()
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _catch_up(self) -> None:
+        """Index lines appended (by anyone) since the last pass."""
+        size = os.fstat(self._fd).st_size
+        if size <= self._indexed:
+            return
+        data = os.pread(self._fd, size - self._indexed, self._indexed)
+        pos = 0
+        while True:
+            nl = data.find(b"\n", pos)
+            if nl < 0:
+                break
+            record = json.loads(data[pos:nl])
+            note = Note(
+                len(self._offsets),
+                float(record["ts"]),
+                record["text"],
+                tuple(record.get("tags", ())),
+            )
+            self._index(note, self._indexed + pos)
+            pos = nl + 1
+        self._indexed += pos
+
+    def _index(self, note: Note, offset: int) -> None:
+        self._offsets.append(offset)
+        self._ts.append(note.ts)
+        for tag in note.tags:
+            self._tags.setdefault(tag, []).append(note.id)
+        for gram in _trigrams(note.text):
+            self._grams.setdefault(gram, []).append(note.id)
+
+    def _read(self, note_id: int) -> Note:
+        start = self._offsets[note_id]
+        end = self._offsets[note_id + 1] if note_id + 1 < len(self._offsets) else self._indexed
+        record = json.loads(os.pread(self._fd, end - start, start))
+        return Note(note_id, float(record["ts"]), record["text"], tuple(record.get("tags", ())))
+
+
+_stores: Dict[str, NoteStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str, **kwargs: object) -> NoteStore:
+    """Process-wide store per path, so every tool and runner shares one handle and index."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = NoteStore(path=key, **kwargs)  # type: ignore[arg-type]
+        return store
+
+
+@atexit.register
+def _flush_stores() -> None:
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
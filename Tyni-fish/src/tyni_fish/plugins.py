@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from .providers.base import Provider
+    from .tools.base import Tool
+
+PROVIDER_GROUP = "tyni_fish.providers"
+TOOL_GROUP = "tyni_fish.tools"
+
+# Built-in providers, as entry-point style "module:attr" targets. Nothing is
+# imported until a name is selected, so unused providers cost no startup time.
+BUILTIN_PROVIDERS: Dict[str, str] = {
+    "dummy": "tyni_fish.providers.dummy:DummyProvider",
+    "test": "tyni_fish.providers.dummy:DummyProvider",
+    "mock": "tyni_fish.providers.mock:MockProvider.from_env",
+    "openai": "tyni_fish.providers.openai_compat:OpenAICompatProvider",
+    "openai-compat": "tyni_fish.providers.openai_compat:OpenAICompatProvider",
+    "oai": "tyni_fish.providers.openai_compat:OpenAICompatProvider",
+    "router": "tyni_fish.providers.router:RouterProvider.from_env",
+    "replay": "tyni_fish.providers.replay:ReplayProvider.from_env",
+}
+
+
+def load_target(target: str) -> Any:
+    """Resolve a `module:attr.attr` reference (the entry-point value syntax)."""
+    module, _, attrs = target.partition(":")
+    obj: Any = importlib.import_module(module)
+    for attr in filter(None, attrs.split(".")):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def find_entry_point(group: str, name: str) -> Optional[Any]:
+    """The installed entry point `name` in `group`, or None."""
+    from importlib.metadata import entry_points
+
+    for ep in entry_points(group=group):
+        if ep.name == name:
+            return ep
+    return None
+
+
+def load_provider(name: str) -> Provider:
+    """Build a provider by name: built-ins first, then `tyni_fish.providers` entry points.
+
+    A plugin entry point refers to a zero-argument factory (usually the
+    provider class) that reads its settings from the environment.
+    """
+    key = name.strip().lower()
+    target = BUILTIN_PROVIDERS.get(key)
+    if target is not None:
+        return load_target(target)()
+    ep = find_entry_point(PROVIDER_GROUP, key)
+    if ep is None:
+        raise ValueError(f"Unknown provider: {name}")
+    return ep.load()()
+
+
+def load_tool(name: str, *, workspace_dir: str) -> Optional[Tool]:
+    """Build the `tyni_fish.tools` plugin `name`, or None if none is installed.
+
+    A tool entry point refers to a factory called as `factory(workspace_dir=...)`.
+    """
+    ep = find_entry_point(TOOL_GROUP, name)
+    if ep is None:
+        return None
+    return ep.load()(workspace_dir=workspace_dir)
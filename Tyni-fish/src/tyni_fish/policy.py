@@ -1,31 +1,108 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Iterable, Set
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Set
 
 
 @dataclass(frozen=True)
 class Policy:
     """Guardrails for the agent runtime.
 
-    Keep this small and enforceable. You can add more later (token budgets, etc.).
+    Keep this small and enforceable.
+
+    Per-run budgets (`None` = unlimited; see `budget.RunBudget`):
+    `max_input_tokens` / `max_output_tokens` cap the tokens billed across all
+    provider calls (reported usage, else estimated), `max_run_secs` caps
+    wall-clock time and `max_tool_secs` the total time spent in tools. An
+    exhausted budget stops the run with `BudgetExceeded`.
+
+    `tool_concurrency` caps simultaneous calls per tool name (across all runs
+    sharing a runner); `isolate_tools` run in a killable child process.
+
+    `max_context_tokens` bounds the (estimated) history sent to the provider:
+    old turns are collapsed to fit. `max_tool_output_tokens` truncates large
+    tool results before they enter the history. `None` means unlimited.
+
+    `max_read_bytes` caps what one `read_file` call returns; larger files
+    need a range, head/tail or grep.
     """
 
     max_steps: int = 8
     tool_timeout_secs: int = 5
-    allow_tools: Set[str] = field(default_factory=lambda: {"calc", "note_append", "read_file", "write_file", "echo"})
+    allow_tools: Set[str] = field(
+        default_factory=lambda: {
+            "calc",
+            "note_append",
+            "note_search",
+            "note_tail",
+            "read_file",
+            "write_file",
+            "echo",
+        }
+    )
+    tool_concurrency: Dict[str, int] = field(default_factory=dict)
+    isolate_tools: Set[str] = field(default_factory=set)
+    max_context_tokens: Optional[int] = None
+    max_tool_output_tokens: Optional[int] = None
+    max_read_bytes: int = 1 << 20
+    max_input_tokens: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    max_run_secs: Optional[float] = None
+    max_tool_secs: Optional[float] = None
 
     def with_overrides(self, *, max_steps: int | None = None) -> "Policy":
-        return Policy(
+        return replace(
+            self,
             max_steps=max_steps if max_steps is not None else self.max_steps,
-            tool_timeout_secs=self.tool_timeout_secs,
             allow_tools=set(self.allow_tools),
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe view of the policy (used by tracing)."""
+        return {
+            "max_steps": self.max_steps,
+            "tool_timeout_secs": self.tool_timeout_secs,
+            "allow_tools": sorted(self.allow_tools),
+            "tool_concurrency": dict(self.tool_concurrency),
+            "isolate_tools": sorted(self.isolate_tools),
+            "max_context_tokens": self.max_context_tokens,
+            "max_tool_output_tokens": self.max_tool_output_tokens,
+            "max_read_bytes": self.max_read_bytes,
+            "max_input_tokens": self.max_input_tokens,
+            "max_output_tokens": self.max_output_tokens,
+            "max_run_secs": self.max_run_secs,
+            "max_tool_secs": self.max_tool_secs,
+        }
+
     @staticmethod
     def from_env() -> "Policy":
         import os
 
         max_steps = int(os.getenv("TYNI_MAX_STEPS", "8"))
         tool_timeout = int(os.getenv("TYNI_TOOL_TIMEOUT_SECS", "5"))
-        return Policy(max_steps=max_steps, tool_timeout_secs=tool_timeout)
+        # e.g. TYNI_TOOL_CONCURRENCY="read_file=2,calc=8"
+        concurrency = {}
+        for item in os.getenv("TYNI_TOOL_CONCURRENCY", "").split(","):
+            name, _, limit = item.partition("=")
+            if name.strip() and limit.strip():
+                concurrency[name.strip()] = int(limit)
+        isolate = {n.strip() for n in os.getenv("TYNI_ISOLATE_TOOLS", "").split(",") if n.strip()}
+        max_context = os.getenv("TYNI_MAX_CONTEXT_TOKENS")
+        max_tool_output = os.getenv("TYNI_MAX_TOOL_OUTPUT_TOKENS")
+        max_input = os.getenv("TYNI_MAX_INPUT_TOKENS")
+        max_output = os.getenv("TYNI_MAX_OUTPUT_TOKENS")
+        max_run = os.getenv("TYNI_MAX_RUN_SECS")
+        max_tool = os.getenv("TYNI_MAX_TOOL_SECS")
+        return Policy(
+            max_steps=max_steps,
+            tool_timeout_secs=tool_timeout,
+            tool_concurrency=concurrency,
+            isolate_tools=isolate,
+            max_context_tokens=int(max_context) if max_context else None,
+            max_tool_output_tokens=int(max_tool_output) if max_tool_output else None,
+            max_read_bytes=int(os.getenv("TYNI_MAX_READ_BYTES", str(1 << 20))),
+            max_input_tokens=int(max_input) if max_input else None,
+            max_output_tokens=int(max_output) if max_output else None,
+            max_run_secs=float(max_run) if max_run else None,
+            max_tool_secs=float(max_tool) if max_tool else None,
+        )
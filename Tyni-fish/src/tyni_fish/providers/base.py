@@ -1,26 +1,214 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Protocol
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class Usage:
+    """Tokens billed for one provider call."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+@dataclass(frozen=True, slots=True)
 class ToolAction:
     type: str
     name: str
     args: Dict[str, Any]
+    # Wire JSON, computed once by `action_json` (actions are immutable).
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    # Tokens the provider reported for the call that produced this action.
+    usage: Optional[Usage] = field(default=None, init=False, repr=False, compare=False)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FinalAction:
     type: str
     content: str
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    usage: Optional[Usage] = field(default=None, init=False, repr=False, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class ToolBatchAction:
+    """Several independent tool calls issued in one step (run concurrently)."""
+
+    type: str
+    calls: Tuple[ToolAction, ...]
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    usage: Optional[Usage] = field(default=None, init=False, repr=False, compare=False)
+
+
+Action = ToolAction | FinalAction | ToolBatchAction
+
+
+def with_usage(action: Action, usage: Optional[Usage]) -> Action:
+    """Attach provider-reported `usage` to `action` (returns the same object)."""
+    object.__setattr__(action, "usage", usage)
+    return action
+
+
+def action_to_dict(action: Action) -> Dict[str, Any]:
+    if isinstance(action, ToolAction):
+        return {"type": "tool", "name": action.name, "args": action.args}
+    if isinstance(action, ToolBatchAction):
+        return {"type": "tools", "calls": [{"name": c.name, "args": c.args} for c in action.calls]}
+    return {"type": "final", "content": action.content}
+
+
+def action_json(action: Action) -> str:
+    """`json.dumps(action_to_dict(action))`, serialized once per action and reused
+    for the assistant message, the trace event and provider requests."""
+    raw = action._json
+    if raw is None:
+        raw = json.dumps(action_to_dict(action))
+        object.__setattr__(action, "_json", raw)
+    return raw
+
+
+class Message(dict):
+    """A chat message: a plain `{"role": ..., "content": ...}` dict (providers
+    may treat it as one) that caches its JSON encoding for request builders."""
+
+    __slots__ = ("_json",)
+
+    def __init__(self, role: str, content: str) -> None:
+        super().__init__(role=role, content=content)
+        self._json: Optional[str] = None
+
+    @staticmethod
+    def of(message: Dict[str, str]) -> "Message":
+        if type(message) is Message:
+            return message
+        return Message(str(message.get("role", "")), str(message.get("content", "")))
+
+    def __setitem__(self, key: str, value: str) -> None:
+        super().__setitem__(key, value)
+        self._json = None
+
+    def __reduce__(self) -> Any:
+        return (Message, (self.get("role", ""), self.get("content", "")))
 
 
-Action = ToolAction | FinalAction
+def message_json(message: Dict[str, str]) -> str:
+    """JSON for one message, cached on `Message` instances."""
+    if type(message) is Message:
+        raw = message._json
+        if raw is None:
+            raw = message._json = json.dumps(message)
+        return raw
+    return json.dumps(message)
+
+
+def action_from_dict(obj: Dict[str, Any] | List[Any]) -> Action:
+    """Decode the wire shape (`{"type": "tool"|"tools"|"final", ...}`) into an Action.
+
+    A bare JSON list of tool calls is accepted as shorthand for `tools`.
+    """
+    if isinstance(obj, list):
+        obj = {"type": "tools", "calls": obj}
+    if obj.get("type") == "tool":
+        return ToolAction(
+            type="tool", name=str(obj.get("name", "")), args=obj.get("args", {}) or {}
+        )
+    if obj.get("type") == "tools":
+        calls = tuple(
+            ToolAction(type="tool", name=str(c.get("name", "")), args=c.get("args", {}) or {})
+            for c in obj.get("calls", [])
+            if isinstance(c, dict)
+        )
+        return ToolBatchAction(type="tools", calls=calls)
+    content = obj.get("content", "")
+    return FinalAction(
+        type="final", content=content if isinstance(content, str) else json.dumps(content)
+    )
+
+
+def action_from_text(text: str) -> Action:
+    """Decode a model reply into an Action.
+
+    Anything that is not an action (invalid JSON, a scalar, or an object with
+    neither a tool `type` nor `content`, e.g. `{"answer": ...}`) is taken as a
+    plain-text final answer. Both the buffered and the streamed paths of
+    `OpenAICompatProvider` use this, so they agree on every reply.
+    """
+    try:
+        obj = json.loads(text)
+    except ValueError:
+        return FinalAction(type="final", content=text)
+    if isinstance(obj, list):
+        return action_from_dict(obj)
+    if not isinstance(obj, dict):
+        return FinalAction(type="final", content=text)
+    if obj.get("type") not in {"tool", "tools"} and "content" not in obj:
+        return FinalAction(type="final", content=text)
+    return action_from_dict(obj)
 
 
 class Provider(Protocol):
     name: str
 
     def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action: ...
+
+
+class AsyncProvider(Provider, Protocol):
+    """Provider with a native coroutine path.
+
+    The runner prefers `anext_action` when present; sync-only providers are
+    driven from a worker thread instead.
+    """
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action: ...
+
+
+TokenCallback = Callable[[str], None]
+
+
+class StreamingProvider(Provider, Protocol):
+    """Provider that can stream a `final` answer token by token.
+
+    `on_token` receives decoded content fragments of a final action; tool
+    actions are returned as soon as they are complete.
+    """
+
+    def stream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action: ...
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action: ...
+
+
+def can_stream(provider: Provider) -> bool:
+    return hasattr(provider, "astream_action") or hasattr(provider, "stream_action")
+
+
+async def call_provider(
+    provider: Provider,
+    *,
+    system: str,
+    messages: List[Dict[str, str]],
+    on_token: Optional[TokenCallback] = None,
+) -> Action:
+    """Await the best path a provider offers: async stream, sync stream, async, then sync.
+
+    Sync methods run in a worker thread so the event loop never blocks.
+    """
+    if on_token is not None:
+        astream_action = getattr(provider, "astream_action", None)
+        if astream_action is not None:
+            return await astream_action(system=system, messages=messages, on_token=on_token)
+        stream_action = getattr(provider, "stream_action", None)
+        if stream_action is not None:
+            return await asyncio.to_thread(
+                stream_action, system=system, messages=messages, on_token=on_token
+            )
+    anext_action = getattr(provider, "anext_action", None)
+    if anext_action is not None:
+        return await anext_action(system=system, messages=messages)
+    return await asyncio.to_thread(provider.next_action, system=system, messages=messages)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .base import (
+    Action,
+    FinalAction,
+    Provider,
+    TokenCallback,
+    Usage,
+    action_from_dict,
+    action_to_dict,
+    call_provider,
+    can_stream,
+    with_usage,
+)
+
+
+def request_key(provider: Provider, *, system: str, messages: List[Dict[str, str]]) -> str:
+    """Stable hash of a canonicalized request (provider identity and endpoint + prompt)."""
+    payload = {
+        "provider": getattr(provider, "name", ""),
+        "base_url": getattr(provider, "base_url", ""),
+        "model": getattr(provider, "model", ""),
+        "temperature": getattr(provider, "temperature", None),
+        "system": system,
+        "messages": messages,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(eq=False)
+class SqliteStore:
+    """On-disk cache store (stdlib sqlite3, WAL mode; safe across threads and processes)."""
+
+    path: str
+
+    def __post_init__(self) -> None:
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, created REAL)"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, value: str, created: float) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, value, created)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+@dataclass(eq=False)
+class ResponseCache:
+    """In-memory LRU with optional TTL, backed by an optional on-disk store."""
+
+    max_entries: int = 1024
+    ttl_secs: Optional[float] = None
+    store: Optional[SqliteStore] = None
+
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    evictions: int = field(default=0, init=False)
+    expired: int = field(default=0, init=False)
+    _mem: "OrderedDict[str, Tuple[str, float]]" = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if self._fresh(entry[1], now):
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(entry[0])
+                del self._mem[key]
+                self.expired += 1
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                if self._fresh(stored[1], now):
+                    with self._lock:
+                        self.hits += 1
+                        self._insert(key, stored)
+                    return json.loads(stored[0])
+                self.store.delete(key)
+                with self._lock:
+                    self.expired += 1
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        entry = (json.dumps(value, ensure_ascii=False), time.time())
+        with self._lock:
+            self._insert(key, entry)
+        if self.store is not None:
+            self.store.put(key, *entry)
+
+    def resize(self, max_entries: int) -> None:
+        """Change the in-memory capacity (the on-disk store is not trimmed)."""
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "size": len(self._mem),
+            }
+
+    def _fresh(self, created: float, now: float) -> bool:
+        return self.ttl_secs is None or now - created <= self.ttl_secs
+
+    def _insert(self, key: str, entry: Tuple[str, float]) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def from_spec(spec: str) -> "ResponseCache":
+        """`memory` for an in-process cache, otherwise a sqlite file path."""
+        max_entries = int(os.getenv("TYNI_CACHE_SIZE", "1024"))
+        ttl = os.getenv("TYNI_CACHE_TTL_SECS")
+        ttl_secs = float(ttl) if ttl else None
+        store = None if spec == "memory" else SqliteStore(path=spec)
+        return ResponseCache(max_entries=max_entries, ttl_secs=ttl_secs, store=store)
+
+
+@dataclass
+class CachingProvider:
+    """Wraps any Provider and serves byte-identical requests from a cache.
+
+    Set `bypass` (or `max_temperature` below the inner provider's temperature)
+    when responses are not meant to be deterministic. Hits carry a zero
+    `Usage` (nothing was billed), so they do not count against token budgets.
+    """
+
+    inner: Provider
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    bypass: bool = False
+    max_temperature: Optional[float] = None
+    name: str = ""
+    bypassed: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.name = self.name or f"cached:{getattr(self.inner, 'name', 'unknown')}"
+
+    def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        key = self._key(system, messages)
+        if key is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return with_usage(action_from_dict(hit), Usage())
+        action = self.inner.next_action(system=system, messages=messages)
+        self._store(key, action)
+        return action
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        key = self._key(system, messages)
+        if key is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return with_usage(action_from_dict(hit), Usage())
+        action = await call_provider(self.inner, system=system, messages=messages)
+        self._store(key, action)
+        return action
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: TokenCallback
+    ) -> Action:
+        key = self._key(system, messages)
+        if key is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                action = with_usage(action_from_dict(hit), Usage())
+                if isinstance(action, FinalAction):
+                    on_token(action.content)
+                return action
+        action = await call_provider(
+            self.inner, system=system, messages=messages, on_token=on_token
+        )
+        if isinstance(action, FinalAction) and not can_stream(self.inner):
+            on_token(action.content)
+        self._store(key, action)
+        return action
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.cache.stats(), "bypassed": self.bypassed}
+
+    def _key(self, system: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        temperature = getattr(self.inner, "temperature", None)
+        if self.bypass or (
+            self.max_temperature is not None
+            and temperature is not None
+            and temperature > self.max_temperature
+        ):
+            self.bypassed += 1
+            return None
+        return request_key(self.inner, system=system, messages=messages)
+
+    def _store(self, key: Optional[str], action: Action) -> None:
+        if key is not None:
+            self.cache.put(key, action_to_dict(action))
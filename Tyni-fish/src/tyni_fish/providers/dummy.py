@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Callable, Dict, List
 
-from .base import FinalAction, ToolAction, Action
+from .base import Action, FinalAction, ToolAction, ToolBatchAction
+
+_MATH = re.compile(r"[0-9\s\+\-\*\/\(\)\.]+")
 
 
 @dataclass
@@ -12,27 +14,65 @@ class DummyProvider:
     """Deterministic provider for tests and smoke runs.
 
     Rules:
+    - If the last message is a tool result, answer with it (final); results of a
+      batched step are joined with '; '.
+    - If the last user message is several ';'-separated math expressions, call
+      calc for all of them in one batched step.
     - If the last user message looks like math, call calc.
     - If it contains 'write note:' call note_append.
+    - If it asks to 'read notes', call note_tail.
     - Else: final echo summary.
     """
 
     name: str = "dummy"
 
     def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
-        last = messages[-1]["content"] if messages else ""
-        text = last.strip()
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+        text = last["content"].strip()
+
+        if last.get("role") == "tool":
+            results = []
+            for msg in reversed(messages):
+                if msg.get("role") != "tool":
+                    break
+                results.append(msg["content"].strip())
+            return FinalAction(type="final", content="; ".join(reversed(results)))
+
+        parts = [p.strip() for p in text.split(";")]
+        if len(parts) > 1 and all(
+            _MATH.fullmatch(p) and any(ch.isdigit() for ch in p) for p in parts
+        ):
+            calls = tuple(ToolAction(type="tool", name="calc", args={"expr": p}) for p in parts)
+            return ToolBatchAction(type="tools", calls=calls)
 
         m = re.search(r"write note\s*:\s*(.+)$", text, re.IGNORECASE)
         if m:
             return ToolAction(type="tool", name="note_append", args={"line": m.group(1).strip()})
 
         # Very naive math detection for demos.
-        if re.fullmatch(r"[0-9\s\+\-\*\/\(\)\.]+", text) and any(ch.isdigit() for ch in text):
+        if _MATH.fullmatch(text) and any(ch.isdigit() for ch in text):
             return ToolAction(type="tool", name="calc", args={"expr": text})
 
         # If the user asks to read notes
         if re.search(r"read\s+notes", text, re.IGNORECASE):
-            return ToolAction(type="tool", name="read_file", args={"path": "notes.txt"})
+            return ToolAction(type="tool", name="note_tail", args={"n": 10})
 
         return FinalAction(type="final", content=f"I can help. Try math like '19*7' or 'write note: ...'. You said: {text}")
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        # Pure CPU work: no point hopping to a thread.
+        return self.next_action(system=system, messages=messages)
+
+    def stream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action:
+        action = self.next_action(system=system, messages=messages)
+        if isinstance(action, FinalAction):
+            for token in re.findall(r"\s*\S+", action.content):
+                on_token(token)
+        return action
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action:
+        return self.stream_action(system=system, messages=messages, on_token=on_token)
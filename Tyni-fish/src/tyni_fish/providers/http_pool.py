@@ -0,0 +1,589 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import http.client
+import ssl
+import threading
+import time
+import urllib.parse
+import weakref
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+# Statuses worth retrying: rate limiting and transient upstream failures.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Errors that mean "the connection died", typically a stale keep-alive socket.
+_RESET_ERRORS = (
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+    http.client.RemoteDisconnected,
+    asyncio.IncompleteReadError,
+)
+
+HostKey = Tuple[str, str, int]
+
+
+class HTTPError(RuntimeError):
+    def __init__(self, status: int, body: bytes) -> None:
+        super().__init__(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.body = body
+
+
+@dataclass
+class HTTPResult:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+def _split(url: str) -> Tuple[HostKey, str]:
+    parts = urllib.parse.urlsplit(url)
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return (parts.scheme, parts.hostname or "", port), path
+
+
+def _retry_delay(attempt: int, backoff_secs: float, headers: Dict[str, str]) -> float:
+    retry_after = headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return backoff_secs * (2**attempt)
+
+
+@dataclass
+class _HostStats:
+    created: int = 0
+    reused: int = 0
+    evicted: int = 0
+    retries: int = 0
+    errors: int = 0
+    in_use: int = 0
+    idle: int = 0
+
+
+@dataclass
+class HTTPPool:
+    """Keep-alive connection pool on top of `http.client`.
+
+    - at most `max_per_host` live connections per (scheme, host, port)
+    - idle connections older than `idle_timeout_secs` are closed on checkout
+    - connection resets and 429/5xx are retried with exponential backoff
+      (`Retry-After` wins when the server sends one)
+
+    `timeout=` on `request`/`stream` overrides `timeout_secs` (the socket
+    timeout) for one call, so providers sharing the pool keep their own.
+
+    Thread-safe; share one instance across providers.
+    """
+
+    max_per_host: int = 8
+    idle_timeout_secs: float = 60.0
+    max_retries: int = 2
+    backoff_secs: float = 0.2
+    timeout_secs: float = 30.0
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _idle: Dict[HostKey, List[Tuple[http.client.HTTPConnection, float]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _slots: Dict[HostKey, threading.BoundedSemaphore] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _stats: Dict[HostKey, _HostStats] = field(default_factory=dict, init=False, repr=False)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> HTTPResult:
+        key, conn, resp = self._open(method, url, body, headers or {}, timeout)
+        try:
+            data = resp.read()
+        except BaseException:
+            self.discard(key, conn)
+            raise
+        self._release(key, conn, resp)
+        return HTTPResult(
+            status=resp.status, headers={k.lower(): v for k, v in resp.getheaders()}, body=data
+        )
+
+    @contextlib.contextmanager
+    def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """Like `request`, but hands out the open response for incremental reads.
+
+        Retries only happen before the response is yielded. A response the
+        caller stops reading early has its connection closed, not pooled.
+        """
+        key, conn, resp = self._open(method, url, body, headers or {}, timeout)
+        try:
+            yield resp
+        except BaseException:
+            self.discard(key, conn)
+            raise
+        self._release(key, conn, resp)
+
+    def _open(
+        self,
+        method: str,
+        url: str,
+        body: bytes,
+        headers: Dict[str, str],
+        timeout: Optional[float] = None,
+    ) -> Tuple[HostKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        key, path = _split(url)
+        stats = self._host_stats(key)
+
+        for attempt in range(self.max_retries + 1):
+            conn, reused = self.checkout(key)
+            # Set on every checkout: pooled sockets keep the last call's timeout.
+            conn.timeout = self.timeout_secs if timeout is None else timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except _RESET_ERRORS:
+                self.discard(key, conn)
+                with self._lock:
+                    stats.errors += 1
+                if attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    stats.retries += 1
+                # A stale keep-alive socket is expected; retry it without sleeping.
+                if not reused:
+                    time.sleep(self.backoff_secs * (2**attempt))
+                continue
+            except BaseException:
+                self.discard(key, conn)
+                raise
+
+            if resp.status in RETRY_STATUSES and attempt < self.max_retries:
+                resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+                try:
+                    resp.read()
+                except BaseException:
+                    self.discard(key, conn)
+                    raise
+                self._release(key, conn, resp)
+                with self._lock:
+                    stats.retries += 1
+                time.sleep(_retry_delay(attempt, self.backoff_secs, resp_headers))
+                continue
+            return key, conn, resp
+
+        raise AssertionError("unreachable")
+
+    def _release(
+        self, key: HostKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse
+    ) -> None:
+        # Only a fully drained keep-alive response leaves the socket reusable.
+        if resp.isclosed() and not resp.will_close:
+            self.checkin(key, conn)
+        else:
+            self.discard(key, conn)
+
+    def checkout(self, key: HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        """Borrow a connection (blocks while the host is at `max_per_host`)."""
+        with self._lock:
+            slots = self._slots.setdefault(key, threading.BoundedSemaphore(self.max_per_host))
+        if not slots.acquire(timeout=self.timeout_secs):
+            raise TimeoutError(f"HTTP pool exhausted for {key[1]}:{key[2]}")
+
+        stats = self._host_stats(key)
+        now = time.monotonic()
+        stale: List[http.client.HTTPConnection] = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used > self.idle_timeout_secs:
+                    stale.append(candidate)
+                    stats.evicted += 1
+                    continue
+                conn = candidate
+                break
+            stats.idle = len(idle)
+            stats.in_use += 1
+            if conn is not None:
+                stats.reused += 1
+            else:
+                stats.created += 1
+        for c in stale:
+            c.close()
+
+        if conn is not None:
+            return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout_secs, context=ssl.create_default_context()
+            ), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout_secs), False
+
+    def checkin(self, key: HostKey, conn: http.client.HTTPConnection) -> None:
+        stats = self._host_stats(key)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append((conn, time.monotonic()))
+            stats.idle = len(idle)
+            stats.in_use -= 1
+        self._slots[key].release()
+
+    def discard(self, key: HostKey, conn: http.client.HTTPConnection) -> None:
+        conn.close()
+        with self._lock:
+            self._stats[key].in_use -= 1
+        self._slots[key].release()
+
+    def evict_idle(self) -> int:
+        """Close idle connections past `idle_timeout_secs`; returns how many."""
+        now = time.monotonic()
+        closed: List[http.client.HTTPConnection] = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = [(c, t) for c, t in idle if now - t <= self.idle_timeout_secs]
+                closed += [c for c, t in idle if now - t > self.idle_timeout_secs]
+                self._stats[key].evicted += len(idle) - len(keep)
+                self._stats[key].idle = len(keep)
+                self._idle[key] = keep
+        for c in closed:
+            c.close()
+        return len(closed)
+
+    def close(self) -> None:
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c, _ in idle]
+            self._idle.clear()
+            for stats in self._stats.values():
+                stats.idle = 0
+        for c in conns:
+            c.close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-host counters, keyed "scheme://host:port"."""
+        with self._lock:
+            return {f"{s}://{h}:{p}": dict(vars(st)) for (s, h, p), st in self._stats.items()}
+
+    def _host_stats(self, key: HostKey) -> _HostStats:
+        with self._lock:
+            return self._stats.setdefault(key, _HostStats())
+
+
+@dataclass
+class _AsyncConn:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    last_used: float = 0.0
+
+
+@dataclass
+class _LoopState:
+    idle: Dict[HostKey, List[_AsyncConn]] = field(default_factory=dict)
+    slots: Dict[HostKey, asyncio.Semaphore] = field(default_factory=dict)
+    watcher: Optional[AsyncIterator[None]] = None
+
+
+@dataclass
+class AsyncHTTPPool:
+    """asyncio counterpart of `HTTPPool` (same knobs, same stats shape).
+
+    Streams belong to the event loop that opened them, so idle connections
+    are kept per loop: reuse happens within a loop (e.g. all steps of one
+    `arun`, or every session of a server), never across loops. When a loop
+    shuts down (`asyncio.run` returning, `loop.shutdown_asyncgens()`), its
+    idle connections are closed and its state dropped.
+    """
+
+    max_per_host: int = 8
+    idle_timeout_secs: float = 60.0
+    max_retries: int = 2
+    backoff_secs: float = 0.2
+    timeout_secs: float = 30.0
+
+    _loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = field(
+        default_factory=weakref.WeakKeyDictionary, init=False, repr=False
+    )
+    _stats: Dict[HostKey, _HostStats] = field(default_factory=dict, init=False, repr=False)
+
+    async def request(
+        self, method: str, url: str, *, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+    ) -> HTTPResult:
+        key, conn, resp = await self._open(method, url, body, headers or {})
+        try:
+            data = await resp.body.read()
+        except BaseException:
+            self.discard(key, conn)
+            raise
+        self._release(key, conn, resp)
+        return HTTPResult(status=resp.status, headers=resp.headers, body=data)
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self, method: str, url: str, *, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[AsyncResponse]:
+        """Async counterpart of `HTTPPool.stream`; iterate `resp.body` for chunks."""
+        key, conn, resp = await self._open(method, url, body, headers or {})
+        try:
+            yield resp
+        except BaseException:
+            self.discard(key, conn)
+            raise
+        self._release(key, conn, resp)
+
+    async def _open(
+        self, method: str, url: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[HostKey, _AsyncConn, AsyncResponse]:
+        key, path = _split(url)
+        stats = self._stats.setdefault(key, _HostStats())
+        head = _request_head(method, path, key, body, headers)
+
+        for attempt in range(self.max_retries + 1):
+            conn, reused = await self.checkout(key)
+            try:
+                conn.writer.write(head + body)
+                await conn.writer.drain()
+                status, resp_headers = await read_head(conn.reader)
+            except _RESET_ERRORS:
+                self.discard(key, conn)
+                stats.errors += 1
+                if attempt >= self.max_retries:
+                    raise
+                stats.retries += 1
+                if not reused:
+                    await asyncio.sleep(self.backoff_secs * (2**attempt))
+                continue
+            except BaseException:
+                self.discard(key, conn)
+                raise
+
+            resp = AsyncResponse(
+                status=status, headers=resp_headers, body=AsyncBody(conn.reader, resp_headers)
+            )
+            if status in RETRY_STATUSES and attempt < self.max_retries:
+                try:
+                    await resp.body.read()
+                except BaseException:
+                    self.discard(key, conn)
+                    raise
+                self._release(key, conn, resp)
+                stats.retries += 1
+                await asyncio.sleep(_retry_delay(attempt, self.backoff_secs, resp_headers))
+                continue
+            return key, conn, resp
+
+        raise AssertionError("unreachable")
+
+    def _release(self, key: HostKey, conn: _AsyncConn, resp: AsyncResponse) -> None:
+        if (
+            resp.body.done
+            and resp.body.reusable
+            and resp.headers.get("connection", "").lower() != "close"
+        ):
+            self.checkin(key, conn)
+        else:
+            self.discard(key, conn)
+
+    async def checkout(self, key: HostKey) -> Tuple[_AsyncConn, bool]:
+        state = self._state()
+        if state.watcher is None:
+            # Finalized by the loop's shutdown_asyncgens(), while the loop can still close sockets.
+            state.watcher = self._watch_loop(asyncio.get_running_loop(), state)
+            await state.watcher.__anext__()
+        stats = self._stats.setdefault(key, _HostStats())
+        slots = state.slots.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        await asyncio.wait_for(slots.acquire(), timeout=self.timeout_secs)
+
+        now = time.monotonic()
+        idle = state.idle.get(key, [])
+        while idle:
+            conn = idle.pop()
+            if now - conn.last_used > self.idle_timeout_secs or conn.reader.at_eof():
+                conn.writer.close()
+                stats.evicted += 1
+                continue
+            stats.idle = len(idle)
+            stats.in_use += 1
+            stats.reused += 1
+            return conn, True
+
+        scheme, host, port = key
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    host, port, ssl=ssl.create_default_context() if scheme == "https" else None
+                ),
+                timeout=self.timeout_secs,
+            )
+        except BaseException:
+            slots.release()
+            raise
+        stats.idle = len(idle)
+        stats.in_use += 1
+        stats.created += 1
+        return _AsyncConn(reader=reader, writer=writer), False
+
+    def checkin(self, key: HostKey, conn: _AsyncConn) -> None:
+        state = self._state()
+        conn.last_used = time.monotonic()
+        idle = state.idle.setdefault(key, [])
+        idle.append(conn)
+        stats = self._stats[key]
+        stats.idle = len(idle)
+        stats.in_use -= 1
+        state.slots[key].release()
+
+    def discard(self, key: HostKey, conn: _AsyncConn) -> None:
+        conn.writer.close()
+        self._stats[key].in_use -= 1
+        self._state().slots[key].release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {f"{s}://{h}:{p}": dict(vars(st)) for (s, h, p), st in self._stats.items()}
+
+    async def _watch_loop(
+        self, loop: asyncio.AbstractEventLoop, state: _LoopState
+    ) -> AsyncIterator[None]:
+        try:
+            yield
+        finally:
+            if self._loops.get(loop) is state:
+                del self._loops[loop]
+            for key, idle in state.idle.items():
+                for conn in idle:
+                    conn.writer.close()
+                self._stats[key].idle = 0
+            state.idle.clear()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState()
+        return state
+
+
+def _request_head(
+    method: str, path: str, key: HostKey, body: bytes, headers: Dict[str, str]
+) -> bytes:
+    scheme, host, port = key
+    default_port = 443 if scheme == "https" else 80
+    lines = [
+        f"{method} {path} HTTP/1.1",
+        f"Host: {host}" if port == default_port else f"Host: {host}:{port}",
+        f"Content-Length: {len(body)}",
+    ]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = (await reader.readline()).decode("latin-1")
+    if not status_line:
+        raise ConnectionResetError("connection closed before response")
+    status = int(status_line.split(" ", 2)[1])
+    headers: Dict[str, str] = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").rstrip("\r\n")
+        if not line:
+            break
+        k, _, v = line.partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return status, headers
+
+
+class AsyncBody:
+    """Response body read incrementally from a pooled stream.
+
+    Handles chunked and Content-Length framing; `done` flips once the body
+    has been consumed to its end.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> None:
+        self._reader = reader
+        self._chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        self._remaining = int(headers["content-length"]) if "content-length" in headers else None
+        self.reusable = self._chunked or self._remaining is not None
+        self.done = False
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._chunks()
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self])
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        reader = self._reader
+        if self._chunked:
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                data = await reader.readexactly(size)
+                await reader.readline()
+                yield data
+        elif self._remaining is not None:
+            # Tracked on the instance so a second reader picks up where the first stopped.
+            while self._remaining:
+                data = await reader.read(min(self._remaining, 65536))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", self._remaining)
+                self._remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                yield data
+        self.done = True
+
+
+@dataclass
+class AsyncResponse:
+    status: int
+    headers: Dict[str, str]
+    body: AsyncBody
+
+
+_default_lock = threading.Lock()
+_default_pool: Optional[HTTPPool] = None
+_default_async_pool: Optional[AsyncHTTPPool] = None
+
+
+def default_pool() -> HTTPPool:
+    """Process-wide pool shared by providers that don't bring their own."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = HTTPPool()
+        return _default_pool
+
+
+def default_async_pool() -> AsyncHTTPPool:
+    global _default_async_pool
+    with _default_lock:
+        if _default_async_pool is None:
+            _default_async_pool = AsyncHTTPPool()
+        return _default_async_pool
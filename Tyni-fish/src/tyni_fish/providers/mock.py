@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from .base import Action, action_from_dict
+
+# Exercises every builtin tool, including one batched step, then answers.
+DEFAULT_SCRIPT: List[Any] = [
+    {"type": "tool", "name": "calc", "args": {"expr": "19*7"}},
+    {
+        "type": "tool",
+        "name": "write_file",
+        "args": {"path": "bench/scratch.txt", "content": "tyni " * 200},
+    },
+    {"type": "tool", "name": "read_file", "args": {"path": "bench/scratch.txt"}},
+    {
+        "type": "tools",
+        "calls": [
+            {"name": "echo", "args": {"text": "a"}},
+            {"name": "calc", "args": {"expr": "2+2"}},
+        ],
+    },
+    {"type": "final", "content": "done"},
+]
+
+
+@dataclass
+class MockProvider:
+    """Scripted provider with injected latency, jitter and errors (for benchmarks).
+
+    Step N of a run returns `script[N]` (N = assistant turns so far); the last
+    entry repeats. `injected_secs` accumulates the latency added, so callers
+    can subtract it from wall time.
+    """
+
+    name: str = "mock"
+    script: List[Any] = field(default_factory=lambda: list(DEFAULT_SCRIPT))
+    latency_secs: float = 0.0
+    jitter_secs: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    injected_secs: float = field(default=0.0, init=False)
+    calls: int = field(default=0, init=False)
+
+    @staticmethod
+    def from_env() -> "MockProvider":
+        return MockProvider(
+            latency_secs=float(os.getenv("TYNI_MOCK_LATENCY_MS", "0")) / 1000,
+            jitter_secs=float(os.getenv("TYNI_MOCK_JITTER_MS", "0")) / 1000,
+            error_rate=float(os.getenv("TYNI_MOCK_ERROR_RATE", "0")),
+        )
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        delay, fail = self._draw()
+        if delay:
+            time.sleep(delay)
+        return self._respond(messages, fail)
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        delay, fail = self._draw()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(messages, fail)
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            delay = max(
+                0.0, self.latency_secs + self._rng.uniform(-self.jitter_secs, self.jitter_secs)
+            )
+            fail = self._rng.random() < self.error_rate
+            self.injected_secs += delay
+            self.calls += 1
+        return delay, fail
+
+    def _respond(self, messages: List[Dict[str, str]], fail: bool) -> Action:
+        if fail:
+            raise RuntimeError("mock provider: injected error")
+        step = sum(1 for m in messages if m.get("role") == "assistant")
+        return action_from_dict(self.script[min(step, len(self.script) - 1)])
@@ -1,12 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-import urllib.request
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from .base import Action, FinalAction, ToolAction
+from .base import (
+    Action,
+    ToolAction,
+    ToolBatchAction,
+    Usage,
+    action_from_text,
+    message_json,
+    with_usage,
+)
+from .http_pool import (
+    AsyncBody,
+    AsyncHTTPPool,
+    HTTPError,
+    HTTPPool,
+    default_async_pool,
+    default_pool,
+)
+from .stream_parser import ActionStreamParser
 
 
 def _env(name: str, default: str = "") -> str:
@@ -18,7 +36,9 @@ def _env(name: str, default: str = "") -> str:
 class OpenAICompatProvider:
     """OpenAI-compatible Chat Completions provider.
 
-    This implementation is intentionally dependency-free (urllib).
+    This implementation is intentionally dependency-free: requests go through a
+    keep-alive `HTTPPool` (http.client) or `AsyncHTTPPool` (asyncio streams),
+    shared process-wide unless you pass your own.
     Endpoint must support:
       POST {base_url}/chat/completions
     and return a standard OpenAI response.
@@ -31,37 +51,176 @@ class OpenAICompatProvider:
     base_url: str = ""
     api_key: str = ""
     model: str = ""
+    timeout_secs: float = 30.0
+    temperature: float = 0.2
+    pool: Optional[HTTPPool] = None
+    async_pool: Optional[AsyncHTTPPool] = None
 
     def __post_init__(self) -> None:
         self.base_url = self.base_url or _env("OPENAI_BASE_URL", "https://api.openai.com/v1")
         self.api_key = self.api_key or _env("OPENAI_API_KEY", "")
         self.model = self.model or _env("OPENAI_MODEL", "gpt-4o-mini")
+        self.pool = self.pool or default_pool()
+        self.async_pool = self.async_pool or default_async_pool()
 
     def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        url, data, headers = self._build_request(system, messages)
+        resp = self.pool.request("POST", url, body=data, headers=headers, timeout=self.timeout_secs)
+        if resp.status >= 400:
+            raise HTTPError(resp.status, resp.body)
+        return _parse_completion(resp.body.decode("utf-8"))
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        url, data, headers = self._build_request(system, messages)
+        resp = await asyncio.wait_for(
+            self.async_pool.request("POST", url, body=data, headers=headers),
+            timeout=self.timeout_secs,
+        )
+        if resp.status >= 400:
+            raise HTTPError(resp.status, resp.body)
+        return _parse_completion(resp.body.decode("utf-8"))
+
+    def stream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action:
+        """SSE variant of `next_action`; see `_SSEConsumer` for when it stops reading."""
+        url, data, headers = self._build_request(system, messages, stream=True)
+        sse = _SSEConsumer(on_token)
+        with self.pool.stream(
+            "POST", url, body=data, headers=headers, timeout=self.timeout_secs
+        ) as resp:
+            if resp.status >= 400:
+                raise HTTPError(resp.status, resp.read())
+            for line in iter(resp.readline, b""):
+                if sse.feed_line(line):
+                    if sse.done:
+                        resp.read()
+                    # Otherwise the connection is dropped, cutting off trailing output.
+                    break
+        return sse.result()
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: Callable[[str], None]
+    ) -> Action:
+        url, data, headers = self._build_request(system, messages, stream=True)
+        sse = _SSEConsumer(on_token)
+
+        async def consume() -> None:
+            async with self.async_pool.stream("POST", url, body=data, headers=headers) as resp:
+                if resp.status >= 400:
+                    raise HTTPError(resp.status, await resp.body.read())
+                async for line in _aiter_lines(resp.body):
+                    if sse.feed_line(line):
+                        if sse.done:
+                            await resp.body.read()
+                        return
+
+        await asyncio.wait_for(consume(), timeout=self.timeout_secs)
+        return sse.result()
+
+    def _build_request(
+        self, system: str, messages: List[Dict[str, str]], *, stream: bool = False
+    ) -> Tuple[str, bytes, Dict[str, str]]:
         url = self.base_url.rstrip("/") + "/chat/completions"
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "system", "content": system}] + messages,
-            "temperature": 0.2,
-        }
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data, method="POST")
-        req.add_header("Content-Type", "application/json")
+        payload = {"model": self.model, "temperature": self.temperature}
+        if stream:
+            payload["stream"] = True
+            payload["stream_options"] = {"include_usage": True}
+        # Messages keep their serialized form between steps, so a long history
+        # is spliced into the body instead of being re-encoded every call.
+        encoded = [_system_json(system)] + [message_json(m) for m in messages]
+        body = f'{json.dumps(payload)[:-1]}, "messages": [{", ".join(encoded)}]}}'
+        headers = {"Content-Type": "application/json"}
         if self.api_key:
-            req.add_header("Authorization", f"Bearer {self.api_key}")
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return url, body.encode("utf-8"), headers
+
+
+@lru_cache(maxsize=16)
+def _system_json(system: str) -> str:
+    return json.dumps({"role": "system", "content": system})
+
+
+def _parse_completion(raw: str) -> Action:
+    obj = json.loads(raw)
+    content = obj["choices"][0]["message"].get("content", "")
+    return with_usage(action_from_text(content), _parse_usage(obj))
+
+
+def _parse_usage(obj: Dict[str, Any]) -> Optional[Usage]:
+    """The response's `usage` block (`prompt_tokens` / `completion_tokens`), if any."""
+    usage = obj.get("usage")
+    if not isinstance(usage, dict):
+        return None
+    return Usage(
+        input_tokens=int(usage.get("prompt_tokens") or 0),
+        output_tokens=int(usage.get("completion_tokens") or 0),
+    )
+
+
+_DONE = object()
+
+# Model output tolerated after a final answer closes while waiting for the usage chunk.
+_MAX_TRAILING_CHARS = 256
+
+
+class _SSEConsumer:
+    """Feeds SSE lines to an `ActionStreamParser` and keeps the `usage` chunk.
+
+    A tool call stops reading as soon as its object closes, so the tools run
+    while the model is still producing trailing output; that step's budget
+    falls back to estimates. With `stream_options.include_usage` the usage
+    arrives in a last chunk with no choices, so after a final answer reading
+    goes on until it (or `[DONE]`) arrives. Trailing model output is not
+    forwarded, and past `_MAX_TRAILING_CHARS` of it the stream is cut short.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]) -> None:
+        self.parser = ActionStreamParser(on_token)
+        self.usage: Optional[Usage] = None
+        self.done = False
+        self._trailing = 0
+
+    def feed_line(self, line: bytes) -> bool:
+        """Consume one line; True once reading should stop (`done`: the stream ended)."""
+        chunk = _sse_chunk(line)
+        if chunk is _DONE:
+            self.done = True
+            return True
+        if not isinstance(chunk, dict):
+            return False
+        self.usage = _parse_usage(chunk) or self.usage
+        choices = chunk.get("choices") or []
+        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+        if not delta:
+            return False
+        if self.parser.action is None:
+            action = self.parser.feed(delta)
+            return isinstance(action, (ToolAction, ToolBatchAction))
+        self._trailing += len(delta)
+        return self._trailing > _MAX_TRAILING_CHARS
+
+    def result(self) -> Action:
+        return with_usage(self.parser.finish(), self.usage)
 
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            raw = resp.read().decode("utf-8")
 
-        obj = json.loads(raw)
-        content = obj["choices"][0]["message"].get("content", "")
+def _sse_chunk(line: bytes) -> object:
+    """JSON chunk carried by one SSE line, `_DONE`, or None."""
+    line = line.strip()
+    if not line.startswith(b"data:"):
+        return None
+    data = line[5:].strip()
+    if data == b"[DONE]":
+        return _DONE
+    return json.loads(data)
 
-        # Expect JSON action in content (tool/final).
-        try:
-            action = json.loads(content)
-        except Exception:
-            return FinalAction(type="final", content=content)
 
-        if action.get("type") == "tool":
-            return ToolAction(type="tool", name=action.get("name", ""), args=action.get("args", {}) or {})
-        return FinalAction(type="final", content=action.get("content", content))
+async def _aiter_lines(body: AsyncBody) -> AsyncIterator[bytes]:
+    buf = b""
+    async for chunk in body:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line
+    if buf:
+        yield buf
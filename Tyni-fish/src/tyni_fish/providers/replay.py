@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional
+
+from .base import (
+    Action,
+    FinalAction,
+    Provider,
+    TokenCallback,
+    Usage,
+    action_from_dict,
+    action_to_dict,
+    call_provider,
+    can_stream,
+    message_json,
+    with_usage,
+)
+
+CASSETTE_VERSION = 1
+
+
+class ReplayMiss(RuntimeError):
+    """The cassette has no recording for a request (and there is no fallback)."""
+
+
+def cassette_key(*, system: str, messages: List[Dict[str, str]]) -> str:
+    """Hash of the prompt alone, so a cassette replays under any provider name."""
+    h = hashlib.sha256(json.dumps(system).encode("utf-8"))
+    for m in messages:
+        h.update(b"\n")
+        h.update(message_json(m).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    """Text handle on a cassette; `.gz` paths are gzip streams."""
+    if path.endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+_live_recorders: "weakref.WeakSet[RecordingProvider]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all() -> None:
+    for recorder in list(_live_recorders):
+        recorder.close()
+
+
+@dataclass(eq=False)
+class RecordingProvider:
+    """Wraps a provider and appends every call to a cassette file.
+
+    A cassette is JSONL (gzip when the path ends in `.gz`): a header line
+    per recording session, then one line per call with the request hash
+    (`cassette_key`), the provider's wall time, and the action, its usage or
+    the error. When the last message is from the user its text is kept as
+    `input`, so a replay can drive the same workload again.
+    """
+
+    inner: Provider
+    path: str
+    name: str = ""
+    recorded: int = field(default=0, init=False)
+    _f: Optional[IO[str]] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.name = self.name or f"recording:{getattr(self.inner, 'name', 'unknown')}"
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._f = _open(self.path, "a")
+        header = {
+            "cassette": CASSETTE_VERSION,
+            "provider": getattr(self.inner, "name", ""),
+            "model": getattr(self.inner, "model", ""),
+            "created": time.time(),
+        }
+        self._write(header)
+        _live_recorders.add(self)
+
+    def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        t0 = time.perf_counter()
+        try:
+            action = self.inner.next_action(system=system, messages=messages)
+        except Exception as e:
+            self._record(system, messages, time.perf_counter() - t0, error=e)
+            raise
+        self._record(system, messages, time.perf_counter() - t0, action=action)
+        return action
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        return await self._acall(system, messages, None)
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: TokenCallback
+    ) -> Action:
+        action = await self._acall(system, messages, on_token)
+        if isinstance(action, FinalAction) and not can_stream(self.inner):
+            on_token(action.content)
+        return action
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    async def _acall(
+        self, system: str, messages: List[Dict[str, str]], on_token: Optional[TokenCallback]
+    ) -> Action:
+        t0 = time.perf_counter()
+        try:
+            action = await call_provider(
+                self.inner, system=system, messages=messages, on_token=on_token
+            )
+        except Exception as e:
+            self._record(system, messages, time.perf_counter() - t0, error=e)
+            raise
+        self._record(system, messages, time.perf_counter() - t0, action=action)
+        return action
+
+    def _record(
+        self,
+        system: str,
+        messages: List[Dict[str, str]],
+        secs: float,
+        *,
+        action: Optional[Action] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        entry: Dict[str, Any] = {
+            "key": cassette_key(system=system, messages=messages),
+            "secs": round(secs, 6),
+        }
+        if action is not None:
+            entry["action"] = action_to_dict(action)
+            if action.usage is not None:
+                entry["usage"] = [action.usage.input_tokens, action.usage.output_tokens]
+        else:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        if messages and messages[-1].get("role") == "user":
+            entry["input"] = messages[-1].get("content", "")
+        self._write(entry)
+        self.recorded += 1
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        line = json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._f is None:
+                raise RuntimeError(f"recording to {self.path} is closed")
+            self._f.write(line)
+            self._f.flush()
+
+
+@dataclass(frozen=True, slots=True)
+class _Take:
+    """One recorded response: an action or an error, and how long it took."""
+
+    secs: float
+    action: Optional[Action] = None
+    error: Optional[str] = None
+
+
+@dataclass(eq=False)
+class ReplayProvider:
+    """Serves recorded responses from a cassette, offline.
+
+    Requests are looked up by `cassette_key` in an in-memory index built at
+    load time (actions are decoded once and shared). A request recorded
+    several times replays its takes in turn. Each response waits its
+    recorded latency times `latency_scale` (0 answers at once); recorded
+    errors are raised again. Unknown requests go to `fallback` if set, else
+    raise `ReplayMiss`.
+    """
+
+    path: str
+    latency_scale: float = 1.0
+    fallback: Optional[Provider] = None
+    name: str = "replay"
+
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    _index: Dict[str, List[_Take]] = field(default_factory=dict, init=False, repr=False)
+    _cursor: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _inputs: List[str] = field(default_factory=list, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        with _open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "cassette" in entry:
+                    if entry["cassette"] > CASSETTE_VERSION:
+                        raise ValueError(
+                            f"{self.path}: cassette version {entry['cassette']} is not supported"
+                        )
+                    continue
+                self._index.setdefault(entry["key"], []).append(_take(entry))
+                if "input" in entry:
+                    self._inputs.append(entry["input"])
+
+    @staticmethod
+    def from_env() -> "ReplayProvider":
+        """`TYNI_REPLAY_CASSETTE`, `TYNI_REPLAY_LATENCY_SCALE` (default 1) and
+        `TYNI_REPLAY_FALLBACK` (a provider name)."""
+        path = os.getenv("TYNI_REPLAY_CASSETTE", "")
+        if not path:
+            raise ValueError("replay: set TYNI_REPLAY_CASSETTE to a recorded cassette")
+        from ..plugins import load_provider
+
+        fallback = os.getenv("TYNI_REPLAY_FALLBACK")
+        return ReplayProvider(
+            path=path,
+            latency_scale=float(os.getenv("TYNI_REPLAY_LATENCY_SCALE", "1")),
+            fallback=load_provider(fallback) if fallback else None,
+        )
+
+    def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        take = self._lookup(system, messages)
+        if take is None:
+            return self.fallback.next_action(system=system, messages=messages)
+        if take.secs and self.latency_scale:
+            time.sleep(take.secs * self.latency_scale)
+        return _result(take)
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        take = self._lookup(system, messages)
+        if take is None:
+            return await call_provider(self.fallback, system=system, messages=messages)
+        if take.secs and self.latency_scale:
+            await asyncio.sleep(take.secs * self.latency_scale)
+        return _result(take)
+
+    def inputs(self) -> List[str]:
+        """User inputs seen while recording, in order (to drive a replayed workload)."""
+        return list(self._inputs)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": len(self._index),
+            "takes": sum(len(takes) for takes in self._index.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _lookup(self, system: str, messages: List[Dict[str, str]]) -> Optional[_Take]:
+        key = cassette_key(system=system, messages=messages)
+        with self._lock:
+            takes = self._index.get(key)
+            if takes is None:
+                self.misses += 1
+                if self.fallback is None:
+                    raise ReplayMiss(f"replay: no recording for request {key[:12]} in {self.path}")
+                return None
+            self.hits += 1
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return takes[i % len(takes)]
+
+
+def _take(entry: Dict[str, Any]) -> _Take:
+    if "error" in entry:
+        return _Take(secs=float(entry["secs"]), error=str(entry["error"]))
+    action = action_from_dict(entry["action"])
+    usage = entry.get("usage")
+    if usage is not None:
+        with_usage(action, Usage(input_tokens=int(usage[0]), output_tokens=int(usage[1])))
+    return _Take(secs=float(entry["secs"]), action=action)
+
+
+def _result(take: _Take) -> Action:
+    if take.error is not None:
+        raise RuntimeError(f"replayed error: {take.error}")
+    assert take.action is not None
+    return take.action
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from .base import Action, Provider, TokenCallback, call_provider
+from .http_pool import HTTPError
+from .openai_compat import OpenAICompatProvider
+
+
+def backend_failed(error: BaseException) -> bool:
+    """True for errors that say something about the backend's health.
+
+    Connection errors, timeouts, 408/429 and 5xx count; other HTTP 4xx are
+    caused by the request itself and would fail the same way anywhere.
+    """
+    if isinstance(error, HTTPError):
+        return error.status in (408, 429) or error.status >= 500
+    return isinstance(error, (OSError, EOFError, asyncio.TimeoutError))
+
+
+@dataclass(eq=False)
+class Backend:
+    """One routed provider with its latency/error estimates and circuit breaker."""
+
+    provider: Provider
+    name: str = ""
+    ewma_secs: Optional[float] = None
+    error_rate: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    wins: int = 0
+    state: str = "closed"  # closed | open | half_open | probing
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100), repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.name:
+            base = getattr(self.provider, "name", "provider")
+            url = getattr(self.provider, "base_url", "")
+            model = getattr(self.provider, "model", "")
+            self.name = base + (f"@{url}" if url else "") + (f"#{model}" if model else "")
+
+    def p95(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "ewma_ms": None if self.ewma_secs is None else round(self.ewma_secs * 1000, 2),
+            "p95_ms": None if self.p95() is None else round(self.p95() * 1000, 2),
+            "error_rate": round(self.error_rate, 4),
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "wins": self.wins,
+        }
+
+
+@dataclass(eq=False)
+class RouterProvider:
+    """Routes each request across several providers (e.g. OpenAI-compatible
+    endpoints with different base URLs or models).
+
+    - Selection: healthy backends ranked by EWMA latency, penalized by their
+      EWMA error rate; backends never tried yet go first.
+    - Hedging: if the chosen backend has not answered after its p95 latency
+      (or `hedge_after_secs`), the request is also sent to the next backend;
+      the first success wins and the other request is cancelled. Failures
+      fail over to the next backend immediately.
+    - Only backend failures (`backend_failed`) count against a backend and
+      fail over; a client error such as HTTP 400 is raised to the caller.
+    - Circuit breaker: `failure_threshold` consecutive failures eject a
+      backend for `cooldown_secs`; then one probe request decides whether it
+      comes back.
+
+    Streaming requests are not hedged (tokens cannot be taken back); they
+    fail over only if nothing was streamed yet.
+    """
+
+    backends: List[Backend]
+    name: str = "router"
+    alpha: float = 0.2
+    error_penalty: float = 4.0
+    hedge: bool = True
+    hedge_after_secs: Optional[float] = None
+    hedge_min_secs: float = 0.01
+    hedge_initial_secs: float = 1.0
+    min_samples: int = 5
+    failure_threshold: int = 5
+    cooldown_secs: float = 30.0
+
+    hedges: int = field(default=0, init=False)
+    failovers: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        if not self.backends:
+            raise ValueError("RouterProvider needs at least one backend")
+        self.backends = [
+            b if isinstance(b, Backend) else Backend(provider=b) for b in self.backends
+        ]
+
+    @staticmethod
+    def from_env() -> "RouterProvider":
+        """`TYNI_ROUTER_BACKENDS="url[#model],url[#model],..."` (OpenAI-compatible endpoints)."""
+        spec = os.getenv("TYNI_ROUTER_BACKENDS", "")
+        backends: List[Backend] = []
+        for entry in spec.split(","):
+            url, _, model = entry.strip().partition("#")
+            if url:
+                backends.append(Backend(provider=OpenAICompatProvider(base_url=url, model=model)))
+        if not backends:
+            raise ValueError(
+                "router: set TYNI_ROUTER_BACKENDS to a comma-separated list of base URLs"
+            )
+        hedge_ms = os.getenv("TYNI_ROUTER_HEDGE_MS")
+        return RouterProvider(
+            backends=backends,
+            hedge=hedge_ms != "off",
+            hedge_after_secs=float(hedge_ms) / 1000 if hedge_ms and hedge_ms != "off" else None,
+        )
+
+    def next_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        return asyncio.run(self.anext_action(system=system, messages=messages))
+
+    async def anext_action(self, *, system: str, messages: List[Dict[str, str]]) -> Action:
+        order = self._ranked()
+        tasks: Dict["asyncio.Task[Action]", Backend] = {}
+        launched = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal launched
+            backend = order[launched]
+            launched += 1
+            task = asyncio.ensure_future(self._call(backend, system, messages, None))
+            tasks[task] = backend
+
+        launch()
+        try:
+            while tasks:
+                # At most one hedge: a second backend races the first one.
+                can_hedge = self.hedge and launched == 1 and len(order) > 1
+                timeout = self._hedge_delay(order[0]) if can_hedge else None
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self.hedges += 1
+                    launch()
+                    continue
+                for task in done:
+                    backend = tasks.pop(task)
+                    if task.exception() is None:
+                        backend.wins += 1
+                        return task.result()
+                    last_error = task.exception()
+                    if not backend_failed(last_error):
+                        raise last_error
+                if not tasks and launched < len(order):
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        raise last_error if last_error is not None else RuntimeError("router: no backend answered")
+
+    async def astream_action(
+        self, *, system: str, messages: List[Dict[str, str]], on_token: TokenCallback
+    ) -> Action:
+        streamed = False
+
+        def relay(token: str) -> None:
+            nonlocal streamed
+            streamed = True
+            on_token(token)
+
+        last_error: Optional[BaseException] = None
+        for i, backend in enumerate(self._ranked()):
+            if i:
+                self.failovers += 1
+            try:
+                action = await self._call(backend, system, messages, relay)
+            except Exception as e:
+                if streamed or not backend_failed(e):
+                    raise
+                last_error = e
+                continue
+            backend.wins += 1
+            return action
+        raise last_error if last_error is not None else RuntimeError("router: no backend answered")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "backends": [b.stats() for b in self.backends],
+        }
+
+    def _ranked(self) -> List[Backend]:
+        """Usable backends, best first; raises if every breaker is open."""
+        now = time.monotonic()
+        usable = []
+        for b in self.backends:
+            if b.state == "open" and now - b.opened_at >= self.cooldown_secs:
+                b.state = "half_open"
+            if b.state in {"closed", "half_open"}:
+                usable.append(b)
+        if not usable:
+            raise RuntimeError("router: all backends are ejected (circuit open)")
+        return sorted(usable, key=self._score)
+
+    def _score(self, b: Backend) -> float:
+        if b.ewma_secs is None:
+            return -1.0 if b.errors == 0 else float("inf")
+        return b.ewma_secs * (1 + self.error_penalty * b.error_rate)
+
+    def _hedge_delay(self, b: Backend) -> float:
+        if self.hedge_after_secs is not None:
+            return self.hedge_after_secs
+        if len(b.latencies) < self.min_samples:
+            return self.hedge_initial_secs
+        return max(self.hedge_min_secs, b.p95() or 0.0)
+
+    async def _call(
+        self,
+        b: Backend,
+        system: str,
+        messages: List[Dict[str, str]],
+        on_token: Optional[TokenCallback],
+    ) -> Action:
+        if b.state == "half_open":
+            b.state = "probing"  # one probe at a time; others skip it until it resolves
+        b.calls += 1
+        t0 = time.perf_counter()
+        try:
+            action = await call_provider(
+                b.provider, system=system, messages=messages, on_token=on_token
+            )
+        except asyncio.CancelledError:
+            b.cancelled += 1
+            # A lost race is a lower bound on this backend's latency.
+            elapsed = time.perf_counter() - t0
+            if b.ewma_secs is None or elapsed > b.ewma_secs:
+                b.ewma_secs = (
+                    elapsed
+                    if b.ewma_secs is None
+                    else b.ewma_secs + self.alpha * (elapsed - b.ewma_secs)
+                )
+            if b.state == "probing":
+                b.state = "half_open"
+            raise
+        except Exception as e:
+            if backend_failed(e):
+                self._record(b, None)
+            elif b.state == "probing":
+                b.state = "half_open"  # the probe proved nothing either way
+            raise
+        self._record(b, time.perf_counter() - t0)
+        return action
+
+    def _record(self, b: Backend, secs: Optional[float]) -> None:
+        failed = secs is None
+        b.error_rate += self.alpha * ((1.0 if failed else 0.0) - b.error_rate)
+        if failed:
+            b.errors += 1
+            b.consecutive_failures += 1
+            if b.state == "probing" or b.consecutive_failures >= self.failure_threshold:
+                b.state = "open"
+                b.opened_at = time.monotonic()
+            return
+        b.latencies.append(secs)
+        b.ewma_secs = (
+            secs if b.ewma_secs is None else b.ewma_secs + self.alpha * (secs - b.ewma_secs)
+        )
+        b.consecutive_failures = 0
+        b.state = "closed"
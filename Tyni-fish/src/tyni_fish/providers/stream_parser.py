@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Callable, List, Optional
+
+from .base import Action, FinalAction, action_from_text
+
+TokenCallback = Callable[[str], None]
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ActionStreamParser:
+    """Incremental parser for a streamed JSON action.
+
+    Feed it content deltas as they arrive. It tracks just enough JSON state to:
+    - return the `Action` the moment the top-level object closes (trailing
+      model output is irrelevant, so callers can stop reading right there);
+    - forward the decoded `content` of a `final` action to `on_token` while it
+      is still being generated.
+
+    Output that does not start with `{` (or `[` for a batch of tool calls) is
+    treated as a plain-text final answer and streamed verbatim.
+    """
+
+    def __init__(self, on_token: Optional[TokenCallback] = None) -> None:
+        self.on_token = on_token
+        self.action: Optional[Action] = None
+        self._raw: List[str] = []
+        self._plain: Optional[bool] = None
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._uni = ""
+        self._expect_key = False
+        self._str_is_key = False
+        self._key = ""
+        self._cur: List[str] = []
+        self._kind: Optional[str] = None
+        self._pending: List[str] = []
+        self._high = 0
+        self._out: List[str] = []
+
+    def feed(self, chunk: str) -> Optional[Action]:
+        """Consume a delta; returns the action once it is complete."""
+        if self.action is not None or not chunk:
+            return self.action
+        if self._plain is None:
+            stripped = chunk.lstrip()
+            if not stripped:
+                self._raw.append(chunk)
+                return None
+            self._plain = not stripped.startswith(("{", "["))
+        if self._plain:
+            self._raw.append(chunk)
+            self._emit(chunk)
+            return None
+
+        try:
+            for i, ch in enumerate(chunk):
+                if self._step(ch):
+                    self._raw.append(chunk[: i + 1])
+                    self.action = self._complete("".join(self._raw))
+                    return self.action
+            self._raw.append(chunk)
+            return None
+        finally:
+            self._flush()
+
+    def finish(self) -> Action:
+        """End of stream: best-effort action from whatever arrived."""
+        if self.action is not None:
+            return self.action
+        text = "".join(self._raw)
+        if self._plain:
+            return FinalAction(type="final", content=text)
+        self.action = self._complete(text)
+        return self.action
+
+    def _complete(self, text: str) -> Action:
+        action = action_from_text(text)
+        if isinstance(action, FinalAction) and self._kind != "final":
+            # Not streamed as it arrived (e.g. `{"answer": ...}`): deliver it in one piece.
+            self._flush()
+            self._emit(action.content)
+        return action
+
+    def _step(self, ch: str) -> bool:
+        if self._in_str:
+            self._string_char(ch)
+            return False
+        if ch == '"':
+            self._in_str = True
+            self._str_is_key = self._depth == 1 and self._expect_key
+            self._cur = []
+        elif ch in "{[":
+            self._depth += 1
+            self._expect_key = self._depth == 1 and ch == "{"
+        elif ch in "}]":
+            self._depth -= 1
+            return self._depth == 0
+        elif self._depth == 1 and ch == ",":
+            self._expect_key = True
+        elif self._depth == 1 and ch == ":":
+            self._expect_key = False
+        return False
+
+    def _string_char(self, ch: str) -> None:
+        if self._uni:
+            self._uni += ch
+            if len(self._uni) == 5:
+                code = int(self._uni[1:], 16)
+                self._uni = ""
+                if 0xD800 <= code < 0xDC00:
+                    self._high = code
+                elif 0xDC00 <= code < 0xE000 and self._high:
+                    self._decoded(chr(0x10000 + ((self._high - 0xD800) << 10) + (code - 0xDC00)))
+                    self._high = 0
+                else:
+                    self._decoded(chr(code))
+            return
+        if self._esc:
+            self._esc = False
+            if ch == "u":
+                self._uni = "u"
+            else:
+                self._decoded(_ESCAPES.get(ch, ch))
+            return
+        if ch == "\\":
+            self._esc = True
+            return
+        if ch == '"':
+            self._in_str = False
+            if self._depth == 1:
+                value = "".join(self._cur)
+                if self._str_is_key:
+                    self._key = value
+                elif self._key == "type":
+                    self._kind = value
+                    if value == "final":
+                        self._out.extend(self._pending)
+                    self._pending = []
+            return
+        self._decoded(ch)
+
+    def _decoded(self, ch: str) -> None:
+        if self._depth != 1:
+            return
+        self._cur.append(ch)
+        if self._str_is_key or self._key != "content":
+            return
+        if self._kind == "final":
+            self._out.append(ch)
+        elif self._kind is None:
+            self._pending.append(ch)
+
+    def _flush(self) -> None:
+        if self._out:
+            self._emit("".join(self._out))
+            self._out = []
+
+    def _emit(self, text: str) -> None:
+        if self.on_token is not None and text:
+            self.on_token(text)
+
@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .agent import AgentRunner
+from .metrics import Histogram
+from .session import SessionStore
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(eq=False)
+class AgentServer:
+    """Minimal asyncio HTTP/JSON server around an `AgentRunner`.
+
+    Endpoints:
+    - `POST /v1/run` `{"input": ..., "max_steps"?: int, "stream"?: bool, "session_id"?: str}`
+    - `GET /healthz`
+    - `GET /metrics` (Prometheus text format)
+
+    At most `max_concurrency` runs execute at once; up to `max_queue` more wait
+    (for at most `queue_timeout_secs`). Anything beyond that is shed with a
+    503 and `Retry-After` instead of piling up.
+    """
+
+    runner: AgentRunner
+    host: str = "127.0.0.1"
+    port: int = 8080
+    max_concurrency: int = 16
+    max_queue: int = 64
+    queue_timeout_secs: float = 30.0
+    max_steps_cap: int = 64
+    max_body_bytes: int = 1 << 20
+    sessions: Optional[SessionStore] = None
+
+    waiting: int = field(default=0, init=False)
+    inflight: int = field(default=0, init=False)
+    shed: int = field(default=0, init=False)
+    responses: Dict[int, int] = field(default_factory=dict, init=False)
+    latency: Histogram = field(default_factory=Histogram, init=False)
+    queue_wait: Histogram = field(default_factory=Histogram, init=False)
+    _sem: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+    # Slots to retire (instead of releasing) after `set_limits` lowered the concurrency.
+    _retire: int = field(default=0, init=False, repr=False)
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, init=False, repr=False)
+    _server: Optional[asyncio.AbstractServer] = field(default=None, init=False, repr=False)
+    _session_locks: Dict[str, List[Any]] = field(default_factory=dict, init=False, repr=False)
+
+    async def start(self) -> asyncio.AbstractServer:
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self) -> None:
+        server = self._server or await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        if self.sessions is not None:
+            self.sessions.close()
+
+    def set_limits(
+        self,
+        *,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout_secs: Optional[float] = None,
+    ) -> None:
+        """Change admission limits while serving (callable from any thread).
+
+        Raising the concurrency admits waiting requests at once; lowering it
+        lets running requests finish and retires their slots as they do.
+        """
+        loop = self._loop
+        if loop is not None and not _on_loop(loop):
+            loop.call_soon_threadsafe(
+                lambda: self.set_limits(
+                    max_concurrency=max_concurrency,
+                    max_queue=max_queue,
+                    queue_timeout_secs=queue_timeout_secs,
+                )
+            )
+            return
+        if max_queue is not None:
+            self.max_queue = max_queue
+        if queue_timeout_secs is not None:
+            self.queue_timeout_secs = queue_timeout_secs
+        if max_concurrency is None or max_concurrency == self.max_concurrency:
+            return
+        delta = max(1, max_concurrency) - self.max_concurrency
+        self.max_concurrency += delta
+        if self._sem is None:
+            return
+        # Growing first cancels pending retirements, then adds free slots.
+        while delta > 0 and self._retire:
+            self._retire -= 1
+            delta -= 1
+        for _ in range(delta):
+            self._sem.release()
+        self._retire += max(0, -delta)
+
+    def metrics_text(self) -> str:
+        lines = [
+            "# TYPE tyni_queue_depth gauge",
+            f"tyni_queue_depth {self.waiting}",
+            "# TYPE tyni_inflight gauge",
+            f"tyni_inflight {self.inflight}",
+            "# TYPE tyni_shed_total counter",
+            f"tyni_shed_total {self.shed}",
+            "# TYPE tyni_responses_total counter",
+        ]
+        lines += [
+            f'tyni_responses_total{{code="{code}"}} {n}'
+            for code, n in sorted(self.responses.items())
+        ]
+        lines.append("# TYPE tyni_request_latency_seconds histogram")
+        lines += self.latency.render("tyni_request_latency_seconds")
+        lines.append("# TYPE tyni_queue_wait_seconds histogram")
+        lines += self.queue_wait.render("tyni_queue_wait_seconds")
+        return "\n".join(lines) + "\n" + self.runner.metrics.render()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader, self.max_body_bytes)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if not await self._dispatch(writer, method, path, body, keep_alive):
+                    break
+        except _HTTPError as e:
+            await self._reply_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(
+        self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes, keep_alive: bool
+    ) -> bool:
+        """Answer one request; False when the connection must be closed afterwards."""
+        if path == "/healthz":
+            await self._reply_json(writer, 200, {"ok": True}, keep_alive)
+        elif path == "/metrics":
+            data = self.metrics_text().encode("utf-8")
+            await self._reply(writer, 200, data, "text/plain; version=0.0.4", keep_alive)
+        elif path == "/v1/run":
+            if method != "POST":
+                await self._reply_json(writer, 405, {"error": "use POST"}, keep_alive)
+                return keep_alive
+            try:
+                req = self._parse_run(body)
+                await self._run(writer, req, keep_alive)
+            except _HTTPError as e:
+                extra = "Retry-After: 1\r\n" if e.status == 503 else ""
+                await self._reply_json(writer, e.status, {"error": str(e)}, keep_alive, extra)
+                return keep_alive
+            # Streamed replies are sent with `Connection: close`.
+            return keep_alive and not req["stream"]
+        else:
+            await self._reply_json(writer, 404, {"error": f"no route for {path}"}, keep_alive)
+        return keep_alive
+
+    def _parse_run(self, body: bytes) -> Dict[str, Any]:
+        try:
+            obj = json.loads(body or b"{}")
+        except ValueError:
+            raise _HTTPError(400, "body must be JSON") from None
+        if not isinstance(obj, dict) or not isinstance(obj.get("input"), str):
+            raise _HTTPError(400, "'input' (string) is required")
+        max_steps = obj.get("max_steps")
+        if max_steps is not None and (
+            not isinstance(max_steps, int) or not 0 < max_steps <= self.max_steps_cap
+        ):
+            raise _HTTPError(400, f"'max_steps' must be an integer in 1..{self.max_steps_cap}")
+        session_id = obj.get("session_id")
+        if session_id is not None:
+            if self.sessions is None:
+                raise _HTTPError(400, "sessions are not enabled on this server")
+            if (
+                not isinstance(session_id, str)
+                or not session_id
+                or "/" in session_id
+                or session_id.startswith(".")
+            ):
+                raise _HTTPError(400, "'session_id' must be a plain non-empty string")
+        return {
+            "input": obj["input"],
+            "max_steps": max_steps,
+            "stream": bool(obj.get("stream")),
+            "session_id": session_id,
+        }
+
+    async def _run(
+        self, writer: asyncio.StreamWriter, req: Dict[str, Any], keep_alive: bool
+    ) -> None:
+        t0 = time.perf_counter()
+        if not self._sem.locked():
+            await self._sem.acquire()
+        elif self.waiting >= self.max_queue:
+            self.shed += 1
+            raise _HTTPError(503, "server busy, retry later")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), timeout=self.queue_timeout_secs)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise _HTTPError(503, "server busy, retry later") from None
+            finally:
+                self.waiting -= 1
+        self.queue_wait.observe(time.perf_counter() - t0)
+        self.inflight += 1
+        try:
+            if req["stream"]:
+                await self._run_streaming(writer, req)
+            else:
+                try:
+                    result = await self._execute(req, None)
+                    await self._reply_json(writer, 200, result, keep_alive)
+                except Exception as e:
+                    await self._reply_json(
+                        writer, 500, {"error": f"{type(e).__name__}: {e}"}, keep_alive
+                    )
+        finally:
+            self.inflight -= 1
+            if self._retire:
+                self._retire -= 1
+            else:
+                self._sem.release()
+            self.latency.observe(time.perf_counter() - t0)
+
+    async def _execute(self, req: Dict[str, Any], on_token: Any) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        session_id = req["session_id"]
+        if session_id:
+            # Turns of one session run one at a time; the lock lives while anyone uses it.
+            entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    # Paging sessions in and out is file I/O; keep it off the event loop.
+                    session = await asyncio.to_thread(self.sessions.acquire, session_id)
+                    try:
+                        res = await session.asend_result(
+                            req["input"], max_steps=req["max_steps"], on_token=on_token
+                        )
+                    finally:
+                        await asyncio.to_thread(self.sessions.release, session)
+            finally:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._session_locks[session_id]
+        else:
+            res = await self.runner.arun_result(
+                req["input"], max_steps=req["max_steps"], on_token=on_token
+            )
+        return {
+            "output": res.output,
+            "steps": res.steps,
+            "tool_calls": res.tool_calls,
+            "run_id": res.run_id,
+            "latency_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
+
+    async def _run_streaming(self, writer: asyncio.StreamWriter, req: Dict[str, Any]) -> None:
+        """NDJSON over chunked encoding: `{"token": ...}` lines, then the result."""
+        loop = asyncio.get_running_loop()
+        q: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+        def on_token(token: str) -> None:
+            loop.call_soon_threadsafe(q.put_nowait, token)
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n"
+        )
+        self._count(200)
+        task = asyncio.ensure_future(self._execute(req, on_token))
+        task.add_done_callback(lambda _: loop.call_soon_threadsafe(q.put_nowait, None))
+        try:
+            while True:
+                token = await q.get()
+                if token is None:
+                    break
+                await _write_chunk(writer, {"token": token})
+            try:
+                await _write_chunk(writer, {"done": True, **task.result()})
+            except Exception as e:
+                await _write_chunk(writer, {"done": True, "error": f"{type(e).__name__}: {e}"})
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            task.cancel()
+
+    async def _reply_json(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict[str, Any],
+        keep_alive: bool,
+        extra: str = "",
+    ) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._reply(writer, status, data, "application/json", keep_alive, extra)
+
+    async def _reply(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        data: bytes,
+        content_type: str,
+        keep_alive: bool,
+        extra: str = "",
+    ) -> None:
+        self._count(status)
+        connection = "keep-alive" if keep_alive else "close"
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: {connection}\r\n{extra}\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    def _count(self, status: int) -> None:
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+async def _read_request(
+    reader: asyncio.StreamReader, max_body: int
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _HTTPError(400, "malformed request line") from None
+    headers: Dict[str, str] = {}
+    while True:
+        raw = await reader.readline()
+        if raw in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = raw.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raw_length = headers.get("content-length", "") or "0"
+    if not (raw_length.isascii() and raw_length.isdigit()):
+        raise _HTTPError(400, "invalid Content-Length")
+    length = int(raw_length)
+    if length > max_body:
+        raise _HTTPError(413, f"body larger than {max_body} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+async def _write_chunk(writer: asyncio.StreamWriter, obj: Dict[str, Any]) -> None:
+    data = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+    writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+    await writer.drain()
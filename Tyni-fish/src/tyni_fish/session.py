@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .agent import AgentRunner, RunResult
+from .context import ContextWindow
+from .providers.base import TokenCallback
+from .tracing import TraceWriter
+
+
+@dataclass(eq=False)
+class Session:
+    """Multi-turn conversation on top of a shared `AgentRunner`.
+
+    History is kept incrementally (with its token estimate) across turns, and
+    every turn goes to the same trace file (`run_id` = `session_id`). Blocking
+    calls (`send`) run on one event loop owned by the session, so async HTTP
+    connections stay warm between turns. Tools and the executor are the
+    runner's and are shared by all sessions.
+    """
+
+    runner: AgentRunner
+    session_id: str = ""
+    context: Optional[ContextWindow] = None
+    turns: int = 0
+    last_active: float = field(default_factory=time.time)
+    _trace: Optional[TraceWriter] = field(default=None, init=False, repr=False)
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, init=False, repr=False)
+    # Holders via `SessionStore.acquire`; a held session is never paged out.
+    _users: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.session_id:
+            self.session_id = uuid.uuid4().hex
+        if self.context is None:
+            self.context = self.runner.new_context()
+
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        return self.context.messages
+
+    def send(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(
+            self.asend_result(user_input, max_steps=max_steps, on_token=on_token)
+        ).output
+
+    async def asend(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> str:
+        return (await self.asend_result(user_input, max_steps=max_steps, on_token=on_token)).output
+
+    async def asend_result(
+        self,
+        user_input: str,
+        *,
+        max_steps: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> RunResult:
+        if self._trace is None and self.runner.tracing:
+            self._trace = self.runner.new_trace(run_id=self.session_id)
+        self.last_active = time.time()
+        try:
+            return await self.runner.arun_result(
+                user_input,
+                max_steps=max_steps,
+                on_token=on_token,
+                context=self.context,
+                trace=self._trace,
+            )
+        finally:
+            self.turns += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "last_active": self.last_active,
+            "context": self.context.to_dict(),
+        }
+
+    @staticmethod
+    def from_dict(runner: AgentRunner, data: Dict[str, Any]) -> "Session":
+        return Session(
+            runner=runner,
+            session_id=str(data["session_id"]),
+            context=ContextWindow.from_dict(data.get("context", {})),
+            turns=int(data.get("turns", 0)),
+            last_active=float(data.get("last_active", time.time())),
+        )
+
+    def suspend(self, path: str) -> None:
+        """Write the session to `path` (atomically) and release its event loop."""
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.close()
+
+    @staticmethod
+    def resume(runner: AgentRunner, path: str) -> "Session":
+        with open(path, "r", encoding="utf-8") as f:
+            return Session.from_dict(runner, json.load(f))
+
+    def close(self) -> None:
+        if self._loop is not None:
+            # Lets loop-bound resources (pooled HTTP connections) clean up first.
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+            self._loop = None
+
+
+@dataclass(eq=False)
+class SessionStore:
+    """Keeps at most `max_live` sessions in memory; the rest live in `directory`.
+
+    The least recently used idle session is suspended to disk when the
+    limit is reached and paged back in by `get`; sessions held through
+    `acquire` stay in memory until released.
+    """
+
+    runner: AgentRunner
+    directory: str = "sessions"
+    max_live: int = 1000
+    paged_out: int = field(default=0, init=False)
+    paged_in: int = field(default=0, init=False)
+    _live: "OrderedDict[str, Session]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def create(self, session_id: str = "") -> Session:
+        with self._lock:
+            return self._create(session_id)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Live or suspended session by id; `None` if it does not exist."""
+        with self._lock:
+            return self._get(session_id)
+
+    def get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            return self._get(session_id) or self._create(session_id)
+
+    def acquire(self, session_id: str) -> Session:
+        """`get_or_create`, and keep the session in memory until `release`.
+
+        A session with a turn in flight must not be paged out: its result
+        would be lost and the copy on disk would be stale. Both calls may do
+        file I/O (async callers run them in a thread).
+        """
+        with self._lock:
+            session = self._get(session_id) or self._create(session_id)
+            session._users += 1
+            return session
+
+    def release(self, session: Session) -> None:
+        with self._lock:
+            session._users -= 1
+            self._evict()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            session = self._live.pop(session_id, None)
+            if session is not None:
+                session.close()
+            path = self._path(session_id)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"live": len(self._live), "paged_out": self.paged_out, "paged_in": self.paged_in}
+
+    def close(self) -> None:
+        """Suspend every live session to disk."""
+        with self._lock:
+            while self._live:
+                _, session = self._live.popitem(last=False)
+                session.suspend(self._path(session.session_id))
+
+    def _create(self, session_id: str) -> Session:
+        session = Session(runner=self.runner, session_id=session_id)
+        self._path(session.session_id)
+        self._admit(session)
+        return session
+
+    def _get(self, session_id: str) -> Optional[Session]:
+        session = self._live.get(session_id)
+        if session is not None:
+            self._live.move_to_end(session_id)
+            return session
+        path = self._path(session_id)
+        if not os.path.exists(path):
+            return None
+        session = Session.resume(self.runner, path)
+        os.remove(path)
+        self.paged_in += 1
+        self._admit(session)
+        return session
+
+    def _admit(self, session: Session) -> None:
+        self._live[session.session_id] = session
+        self._live.move_to_end(session.session_id)
+        self._evict(keep=session)
+
+    def _evict(self, keep: Optional[Session] = None) -> None:
+        """Page out least recently used idle sessions beyond `max_live`.
+
+        Busy ones are skipped, so the store can run over the limit until
+        they are released.
+        """
+        excess = len(self._live) - self.max_live
+        if excess <= 0:
+            return
+        idle = [s for s in self._live.values() if s._users == 0 and s is not keep][:excess]
+        for old in idle:
+            del self._live[old.session_id]
+            old.suspend(self._path(old.session_id))
+            self.paged_out += 1
+
+    def _path(self, session_id: str) -> str:
+        if not session_id or os.sep in session_id or session_id.startswith("."):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return os.path.join(self.directory, f"{session_id}.json")
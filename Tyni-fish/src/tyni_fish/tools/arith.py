@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import decimal
+import operator
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+MAX_EXPR_CHARS = 1000
+MAX_NUMBER_CHARS = 100
+# Bound on the size of any integer (or Fraction numerator/denominator) produced.
+MAX_INT_BITS = 4096
+DECIMAL_PRECISION = 28
+MODES = ("float", "decimal", "fraction")
+
+Number = Union[int, float, decimal.Decimal, Fraction]
+# Postfix program: numbers stay as source text, operators as symbols.
+Program = Tuple[Tuple[str, str], ...]
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*|\.\d+)|(\*\*|//|[-+*/%()]))")
+
+# Unary minus sits between `**` and `*`, as in Python: -2**2 == -4, 2**-1 == 0.5.
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "//": 2, "%": 2, "neg": 3, "pos": 3, "**": 4}
+_RIGHT = {"**", "neg", "pos"}
+
+_BINARY: Dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+
+
+class ArithError(ValueError):
+    pass
+
+
+def tokenize(expr: str) -> List[Tuple[str, str]]:
+    """`(kind, text)` pairs with kind `num` or `op`."""
+    if len(expr) > MAX_EXPR_CHARS:
+        raise ArithError(f"expression longer than {MAX_EXPR_CHARS} characters")
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    end = len(expr.rstrip())
+    while pos < end:
+        m = _TOKEN.match(expr, pos)
+        if m is None:
+            raise ArithError(f"invalid character at position {pos}: {expr[pos]!r}")
+        num, op = m.groups()
+        if num is not None:
+            if len(num) > MAX_NUMBER_CHARS:
+                raise ArithError("number literal too long")
+            tokens.append(("num", num))
+        else:
+            tokens.append(("op", op))
+        pos = m.end()
+    return tokens
+
+
+@lru_cache(maxsize=1024)
+def compile_expr(expr: str) -> Program:
+    """Shunting-yard: infix source to a postfix program (cached per expression)."""
+    out: List[Tuple[str, str]] = []
+    stack: List[str] = []
+    expect_operand = True
+    for kind, text in tokenize(expr):
+        if kind == "num":
+            if not expect_operand:
+                raise ArithError(f"unexpected number {text}")
+            out.append(("num", text))
+            expect_operand = False
+        elif text == "(":
+            if not expect_operand:
+                raise ArithError("unexpected '('")
+            stack.append(text)
+        elif text == ")":
+            if expect_operand:
+                raise ArithError("unexpected ')'")
+            while stack and stack[-1] != "(":
+                out.append(("op", stack.pop()))
+            if not stack:
+                raise ArithError("unbalanced ')'")
+            stack.pop()
+        elif expect_operand:
+            if text not in ("-", "+"):
+                raise ArithError(f"unexpected operator {text}")
+            stack.append("neg" if text == "-" else "pos")
+        else:
+            prec = _PRECEDENCE[text]
+            while stack and stack[-1] != "(":
+                top = _PRECEDENCE[stack[-1]]
+                if top > prec or (top == prec and text not in _RIGHT):
+                    out.append(("op", stack.pop()))
+                else:
+                    break
+            stack.append(text)
+            expect_operand = True
+    if expect_operand:
+        raise ArithError("incomplete expression")
+    while stack:
+        op = stack.pop()
+        if op == "(":
+            raise ArithError("unbalanced '('")
+        out.append(("op", op))
+    return tuple(out)
+
+
+def evaluate(expr: str, mode: str = "float") -> Number:
+    """Evaluate `expr` in `float` (Python semantics), `decimal` or `fraction` mode."""
+    if mode not in MODES:
+        raise ArithError(f"unknown mode {mode!r} (use {', '.join(MODES)})")
+    program = compile_expr(expr.strip())
+    if mode == "decimal":
+        with decimal.localcontext() as ctx:
+            ctx.prec = DECIMAL_PRECISION
+            return _run(program, mode)
+    return _run(program, mode)
+
+
+def evaluate_many(exprs: Iterable[str], mode: str = "float") -> List[Union[Number, ArithError]]:
+    """Evaluate each expression; failures are returned in place, not raised."""
+    out: List[Union[Number, ArithError]] = []
+    for expr in exprs:
+        try:
+            out.append(evaluate(expr, mode))
+        except ArithError as e:
+            out.append(e)
+    return out
+
+
+def format_number(value: Number) -> str:
+    if isinstance(value, decimal.Decimal):
+        return format(value.normalize(), "f") if value == value.to_integral_value() else str(value)
+    return str(value)
+
+
+def _run(program: Program, mode: str) -> Number:
+    stack: List[Number] = []
+    try:
+        for kind, text in program:
+            if kind == "num":
+                stack.append(_number(text, mode))
+            elif text == "neg":
+                stack.append(-stack.pop())
+            elif text == "pos":
+                stack.append(+stack.pop())
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(
+                    _check(_pow(left, right) if text == "**" else _binary(text, left, right))
+                )
+    except ZeroDivisionError:
+        raise ArithError("division by zero") from None
+    except (OverflowError, decimal.Overflow):
+        raise ArithError("result too large") from None
+    except decimal.InvalidOperation as e:
+        raise ArithError(f"invalid operation: {e}") from None
+    return stack[0]
+
+
+def _number(text: str, mode: str) -> Number:
+    if mode == "decimal":
+        return decimal.Decimal(text)
+    if mode == "fraction":
+        return Fraction(text)
+    return float(text) if "." in text else int(text)
+
+
+def _binary(op: str, left: Number, right: Number) -> Number:
+    if op == "*" and isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_INT_BITS:
+            raise ArithError("result too large")
+    return _BINARY[op](left, right)
+
+
+def _pow(base: Number, exp: Number) -> Number:
+    if isinstance(base, Fraction):
+        if exp.denominator != 1:
+            raise ArithError("fraction mode needs integer exponents")
+        exp = int(exp)
+        bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+    elif isinstance(base, decimal.Decimal):
+        if abs(exp) > 10**6:
+            raise ArithError("exponent too large")
+        return base**exp
+    elif isinstance(base, int) and isinstance(exp, int):
+        bits = base.bit_length()
+    else:
+        return base**exp  # floats overflow (OverflowError) or saturate quickly
+    if bits > 1 and abs(exp) * (bits - 1) > MAX_INT_BITS:
+        raise ArithError("result too large")
+    return base**exp
+
+
+def _check(value: Number) -> Number:
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ArithError("result too large")
+    if isinstance(value, Fraction) and (
+        value.numerator.bit_length() > MAX_INT_BITS or value.denominator.bit_length() > MAX_INT_BITS
+    ):
+        raise ArithError("result too large")
+    if isinstance(value, complex):
+        raise ArithError("complex result")
+    return value
@@ -1,16 +1,38 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Protocol
+from typing import Any, Hashable, Optional, Protocol
 
 
 class Tool(Protocol):
+    """A named callable returning text.
+
+    Optional attributes the runner understands:
+    - `pure = True`: same args always give the same result, so results can be
+      memoized.
+    - `fingerprint(**kwargs)`: hashable snapshot of the external state the
+      result depends on (memoized per snapshot), or `None` to skip caching.
+    """
+
     name: str
     description: str
 
     def __call__(self, **kwargs: Any) -> str: ...
 
 
+class CacheableTool(Tool, Protocol):
+    def fingerprint(self, **kwargs: Any) -> Optional[Hashable]: ...
+
+
+class AsyncTool(Tool, Protocol):
+    """Tool with a native coroutine path (e.g. network-bound tools).
+
+    The runner awaits `acall` when present; plain tools run in a worker thread.
+    """
+
+    async def acall(self, **kwargs: Any) -> str: ...
+
+
 @dataclass
 class ToolError(Exception):
     message: str
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-import math
+import mmap
 import os
+import re
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
 
+from ..notes import Note, NoteStore, open_store
+from . import arith
 from .base import ToolError
 from .registry import ToolRegistry
 
+_RACY_SECS = 1.0
+
 
 def _safe_workspace_path(workspace_dir: str, path: str) -> str:
     # Prevent path traversal: all operations must stay under workspace_dir.
@@ -20,29 +28,46 @@ def _safe_workspace_path(workspace_dir: str, path: str) -> str:
 
 @dataclass
 class CalcTool:
+    """Arithmetic on `+ - * / // % **` and parentheses via `tools.arith`.
+
+    `expr` evaluates one expression; `exprs` (a list) evaluates a batch, one
+    result per line. `mode` is `float` (default, Python semantics), `decimal`
+    or `fraction` for exact results. Operand and exponent sizes are bounded,
+    so `9**9**9` fails fast instead of pinning a worker.
+    """
+
     name: str = "calc"
-    description: str = "Evaluate a simple arithmetic expression (digits and + - * / ( ) .)."
+    description: str = (
+        "Evaluate arithmetic (digits and + - * / // % ** ( ) .). "
+        "Args: expr, or exprs (list) for a batch; optional mode=float|decimal|fraction."
+    )
+    pure: bool = True
 
     def __call__(self, **kwargs: Any) -> str:
+        mode = str(kwargs.get("mode", "") or "float").strip().lower()
+        exprs = kwargs.get("exprs")
+        if exprs is not None:
+            if not isinstance(exprs, (list, tuple)) or not exprs:
+                raise ToolError("calc: 'exprs' must be a non-empty list")
+            results = arith.evaluate_many([str(e) for e in exprs], mode)
+            return "\n".join(
+                f"error: {r}" if isinstance(r, arith.ArithError) else arith.format_number(r)
+                for r in results
+            )
         expr = str(kwargs.get("expr", "")).strip()
         if not expr:
             raise ToolError("calc: missing 'expr'")
-        # Very strict allowlist to avoid code execution.
-        allowed = set("0123456789+-*/(). %")
-        if any(ch not in allowed for ch in expr):
-            raise ToolError("calc: invalid characters in expression.")
-        # Safe eval in restricted namespace.
         try:
-            value = eval(expr, {"__builtins__": {}}, {"math": math})
-        except Exception as e:
-            raise ToolError(f"calc: error: {e}")
-        return str(value)
+            return arith.format_number(arith.evaluate(expr, mode))
+        except arith.ArithError as e:
+            raise ToolError(f"calc: error: {e}") from None
 
 
 @dataclass
 class EchoTool:
     name: str = "echo"
     description: str = "Echo back a message."
+    pure: bool = True
 
     def __call__(self, **kwargs: Any) -> str:
         return str(kwargs.get("text", ""))
@@ -52,34 +77,299 @@ class EchoTool:
 class NoteAppendTool:
     workspace_dir: str
     name: str = "note_append"
-    description: str = "Append a line to workspace/notes.txt."
+    description: str = "Append a note (line, optional tags) to the workspace note store."
 
     def __call__(self, **kwargs: Any) -> str:
         line = str(kwargs.get("line", "")).rstrip("\n")
-        if not line:
+        if not line.strip():
             raise ToolError("note_append: missing 'line'")
-        path = _safe_workspace_path(self.workspace_dir, "notes.txt")
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        try:
+            _note_store(self.workspace_dir).append(line, _tags_arg(kwargs.get("tags")))
+        except ValueError as e:
+            raise ToolError(f"note_append: {e}") from None
         return "ok"
 
 
+@dataclass
+class NoteSearchTool:
+    """Paginated note lookup: substring `query`, `tag`, `since`/`until`
+    (unix seconds or ISO date), newest first, `limit`/`offset`."""
+
+    workspace_dir: str
+    name: str = "note_search"
+    description: str = (
+        "Search notes, newest first. Optional: query (substring), tag, "
+        "since/until (ISO date or unix secs), limit (default 20), offset."
+    )
+
+    def fingerprint(self, **kwargs: Any) -> Optional[Hashable]:
+        return _notes_version(self.workspace_dir)
+
+    def __call__(self, **kwargs: Any) -> str:
+        limit = _int_arg(kwargs, "limit", 20, self.name)
+        offset = _int_arg(kwargs, "offset", 0, self.name)
+        tag = str(kwargs.get("tag", "") or "").strip() or None
+        notes, total = _note_store(self.workspace_dir).search(
+            str(kwargs.get("query", "") or ""),
+            tag=tag,
+            since=_time_arg(kwargs, "since"),
+            until=_time_arg(kwargs, "until"),
+            offset=offset,
+            limit=limit,
+        )
+        if not notes:
+            return f"no notes (total matches: {total})"
+        header = f"{total} matches, showing {offset + 1}-{offset + len(notes)}"
+        if offset + len(notes) < total:
+            header += f"; next: offset={offset + len(notes)}"
+        return "\n".join([header] + [n.format() for n in notes])
+
+
+@dataclass
+class NoteTailTool:
+    """The most recent `n` notes; page back with `before` (a note id)."""
+
+    workspace_dir: str
+    name: str = "note_tail"
+    description: str = (
+        "Show the most recent notes. Optional: n (default 10), before (note id, to page back)."
+    )
+
+    def fingerprint(self, **kwargs: Any) -> Optional[Hashable]:
+        return _notes_version(self.workspace_dir)
+
+    def __call__(self, **kwargs: Any) -> str:
+        n = _int_arg(kwargs, "n", 10, self.name)
+        before = (
+            _int_arg(kwargs, "before", -1, self.name) if kwargs.get("before") is not None else None
+        )
+        notes: List[Note] = _note_store(self.workspace_dir).tail(n, before=before)
+        if not notes:
+            return "no notes"
+        lines = [n.format() for n in notes]
+        if notes[0].id > 0:
+            lines.insert(0, f"[older notes: before={notes[0].id}]")
+        return "\n".join(lines)
+
+
+def _note_store(workspace_dir: str) -> NoteStore:
+    return open_store(_safe_workspace_path(workspace_dir, "notes.jsonl"))
+
+
+def _notes_version(workspace_dir: str) -> Optional[Hashable]:
+    # The log is append-only, so its size identifies its contents.
+    try:
+        return os.stat(_safe_workspace_path(workspace_dir, "notes.jsonl")).st_size
+    except OSError:
+        return None
+
+
+def _tags_arg(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [t for t in value.split(",") if t.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(t) for t in value]
+    raise ToolError("note_append: 'tags' must be a list or comma-separated string")
+
+
+def _time_arg(kwargs: Dict[str, Any], key: str) -> Optional[float]:
+    value = kwargs.get(key)
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ToolError(f"note_search: '{key}' must be an ISO date or unix seconds") from None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
 @dataclass
 class ReadFileTool:
+    """Read a workspace file without loading more of it than needed.
+
+    Args: `path`, plus at most one selector:
+    - `offset` / `length`: a byte range
+    - `start_line` / `end_line`: a 1-based inclusive line range
+    - `mode`: `head` / `tail` (`lines`, default 50) or `grep` (`pattern`
+      regex, `max_matches`, default 100)
+
+    Files are memory-mapped or streamed, so memory stays flat regardless of
+    file size; output is capped at `max_bytes` (see `Policy.max_read_bytes`).
+    """
+
     workspace_dir: str
     name: str = "read_file"
-    description: str = "Read a text file from workspace/."
+    description: str = (
+        "Read a text file from workspace/. Optional: offset+length (bytes), start_line+end_line, "
+        "or mode=head|tail (lines=N) | grep (pattern=regex)."
+    )
+    max_bytes: int = 1 << 20
+
+    def fingerprint(self, **kwargs: Any) -> Optional[Hashable]:
+        """(mtime, size) of the file; `None` if missing or modified too recently.
+
+        Filesystem timestamps are coarse, so a file changed within the last
+        `_RACY_SECS` could change again without a visible mtime change.
+        """
+        try:
+            path = _safe_workspace_path(self.workspace_dir, str(kwargs.get("path", "")).strip())
+            st = os.stat(path)
+        except (ToolError, OSError):
+            return None
+        if time.time() - st.st_mtime < _RACY_SECS:
+            return None
+        return (st.st_mtime_ns, st.st_size)
 
     def __call__(self, **kwargs: Any) -> str:
-        rel = str(kwargs.get("path", "")).strip()
+        path = self._resolve(kwargs.get("path"))
+        mode = str(kwargs.get("mode", "") or "").strip().lower()
+        if mode == "grep":
+            return self._grep(
+                path, str(kwargs.get("pattern", "")), _int_arg(kwargs, "max_matches", 100)
+            )
+        with _mapped(path) as mm:
+            if mode in {"head", "tail"}:
+                count = _int_arg(kwargs, "lines", 50)
+                start, stop = _head(mm, count) if mode == "head" else _tail(mm, count)
+            elif mode:
+                raise ToolError(f"read_file: unknown mode '{mode}'")
+            elif "start_line" in kwargs or "end_line" in kwargs:
+                first = _int_arg(kwargs, "start_line", 1)
+                last = _int_arg(kwargs, "end_line", 0) or None
+                if first < 1 or (last is not None and last < first):
+                    raise ToolError("read_file: need 1 <= start_line <= end_line")
+                start, stop = _line_span(mm, first, last)
+            else:
+                start = min(_int_arg(kwargs, "offset", 0), len(mm))
+                length = _int_arg(kwargs, "length", 0)
+                stop = min(len(mm), start + length) if length else len(mm)
+            # Only the capped slice is ever copied out of the mapping.
+            return self._render(mm[start : min(stop, start + self.max_bytes)], stop - start)
+
+    def iter_chunks(self, path: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        """Yield the file in `chunk_size` byte blocks (for internal consumers)."""
+        with open(self._resolve(path), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _resolve(self, rel: Any) -> str:
+        rel = str(rel or "").strip()
         if not rel:
             raise ToolError("read_file: missing 'path'")
         path = _safe_workspace_path(self.workspace_dir, rel)
-        if not os.path.exists(path):
+        if not os.path.isfile(path):
             raise ToolError("read_file: file not found")
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return path
+
+    def _grep(self, path: str, pattern: str, max_matches: int) -> str:
+        if not pattern:
+            raise ToolError("read_file: grep needs 'pattern'")
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            raise ToolError(f"read_file: bad pattern: {e}") from None
+        out: List[str] = []
+        used = 0
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for lineno, line in enumerate(f, 1):
+                if regex.search(line):
+                    entry = f"{lineno}: {line.rstrip()}"
+                    used += len(entry) + 1
+                    if len(out) >= max_matches or used > self.max_bytes:
+                        out.append("[more matches omitted]")
+                        break
+                    out.append(entry)
+        return "\n".join(out)
+
+    def _render(self, data: bytes, total: int) -> str:
+        text = data.decode("utf-8", errors="replace")
+        if total > self.max_bytes:
+            text += (
+                f"\n[truncated: {total} bytes selected, showing {self.max_bytes}; "
+                "use offset/length, start_line/end_line or mode=head|tail|grep]"
+            )
+        return text
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Any]:
+    """Read-only mmap of `path` (empty files map to b"")."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _head(mm: Any, count: int) -> Tuple[int, int]:
+    """Byte span of the first `count` lines."""
+    pos = 0
+    for _ in range(count):
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            return 0, len(mm)
+        pos = nl + 1
+    return 0, pos
+
+
+def _tail(mm: Any, count: int) -> Tuple[int, int]:
+    """Byte span of the last `count` lines."""
+    end = len(mm)
+    if count <= 0 or end == 0:
+        return end, end
+    pos = end - 1 if mm[end - 1 : end] == b"\n" else end
+    for _ in range(count):
+        nl = mm.rfind(b"\n", 0, pos)
+        if nl < 0:
+            return 0, end
+        pos = nl
+    return pos + 1, end
+
+
+def _line_span(mm: Any, start: int, end: Optional[int]) -> Tuple[int, int]:
+    """Byte span of 1-based inclusive lines `start`..`end` (`None`: to EOF)."""
+    pos = 0
+    for _ in range(start - 1):
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            return len(mm), len(mm)
+        pos = nl + 1
+    if end is None:
+        return pos, len(mm)
+    stop = pos
+    for _ in range(end - start + 1):
+        nl = mm.find(b"\n", stop)
+        if nl < 0:
+            return pos, len(mm)
+        stop = nl + 1
+    return pos, stop
+
+
+def _int_arg(kwargs: Dict[str, Any], key: str, default: int, tool: str = "read_file") -> int:
+    value = kwargs.get(key, default)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ToolError(f"{tool}: '{key}' must be an integer") from None
+    if value < 0:
+        raise ToolError(f"{tool}: '{key}' must be >= 0")
+    return value
 
 
 @dataclass
@@ -100,11 +390,15 @@ class WriteFileTool:
         return "ok"
 
 
-def default_registry(*, workspace_dir: str = "workspace") -> ToolRegistry:
+def default_registry(
+    *, workspace_dir: str = "workspace", max_read_bytes: int = 1 << 20
+) -> ToolRegistry:
     reg = ToolRegistry()
     reg.register(CalcTool())
     reg.register(EchoTool())
     reg.register(NoteAppendTool(workspace_dir=workspace_dir))
-    reg.register(ReadFileTool(workspace_dir=workspace_dir))
+    reg.register(NoteSearchTool(workspace_dir=workspace_dir))
+    reg.register(NoteTailTool(workspace_dir=workspace_dir))
+    reg.register(ReadFileTool(workspace_dir=workspace_dir, max_bytes=max_read_bytes))
     reg.register(WriteFileTool(workspace_dir=workspace_dir))
     return reg
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .base import Tool
+
+CacheKey = Tuple[str, str, Hashable]
+
+
+def tool_cache_key(tool: Tool, args: Dict[str, Any]) -> Optional[CacheKey]:
+    """Cache key for a call, or `None` when the result must not be reused.
+
+    Tools opt in with `pure = True` (result depends only on args) or a
+    `fingerprint(**args)` method returning a hashable snapshot of the state the
+    result depends on (e.g. file mtime and size), or `None` to skip caching.
+    """
+    fingerprint = getattr(tool, "fingerprint", None)
+    if fingerprint is not None:
+        state = fingerprint(**args)
+        if state is None:
+            return None
+    elif getattr(tool, "pure", False):
+        state = None
+    else:
+        return None
+    try:
+        canonical = json.dumps(args, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return (tool.name, canonical, state)
+
+
+@dataclass(eq=False)
+class ToolResultCache:
+    """Bounded LRU of successful tool results, shared by all runs of a runner."""
+
+    max_entries: int = 1024
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    evictions: int = field(default=0, init=False)
+    _entries: "OrderedDict[CacheKey, str]" = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: CacheKey, result: str) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def resize(self, max_entries: int) -> None:
+        with self._lock:
+            self.max_entries = max_entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
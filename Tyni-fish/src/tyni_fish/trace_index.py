@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import itertools
+import json
+import lzma
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, offset INTEGER);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    provider TEXT,
+    started REAL,
+    ended REAL,
+    duration REAL,
+    steps INTEGER DEFAULT 0,
+    status TEXT DEFAULT 'running',
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS tool_calls (
+    run_id TEXT, ts REAL, step INTEGER, idx INTEGER, tool TEXT, error INTEGER,
+    PRIMARY KEY (run_id, ts, step, idx)
+);
+CREATE INDEX IF NOT EXISTS runs_duration ON runs (duration);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status);
+CREATE INDEX IF NOT EXISTS tool_calls_tool ON tool_calls (tool);
+"""
+
+# Plain, rotated (`.1`, `.2`, ...) and compressed JSONL trace files.
+_TRACE_FILE = re.compile(r".*\.jsonl(\.\d+)?(\.(gz|bz2|xz))?$")
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# Scanned paths looked up per query (below SQLite's bound-parameter limit).
+_LOOKUP_BATCH = 500
+
+_DURATION = "COALESCE(duration, ended - started)"
+_ORDERS = {"started": "started DESC", "duration": f"{_DURATION} DESC", "steps": "steps DESC"}
+
+_UPSERT_RUN = """
+INSERT INTO runs (run_id, provider, started, ended, duration, steps, status, error)
+VALUES (:run_id, :provider, :started, :ended, :duration, :steps, :status, :error)
+ON CONFLICT (run_id) DO UPDATE SET
+    provider = COALESCE(excluded.provider, provider),
+    started = MIN(COALESCE(started, excluded.started), COALESCE(excluded.started, started)),
+    ended = MAX(COALESCE(ended, excluded.ended), COALESCE(excluded.ended, ended)),
+    duration = COALESCE(excluded.duration, duration),
+    steps = MAX(steps, excluded.steps),
+    status = CASE WHEN excluded.status = 'running' THEN status ELSE excluded.status END,
+    error = COALESCE(excluded.error, error)
+"""
+
+
+def _new_run(run_id: str) -> Dict[str, Any]:
+    return {
+        "run_id": run_id,
+        "provider": None,
+        "started": None,
+        "ended": None,
+        "duration": None,
+        "steps": 0,
+        "status": "running",
+        "error": None,
+    }
+
+
+@dataclass(eq=False)
+class TraceIndex:
+    """Incremental sqlite index over a traces directory.
+
+    Files are streamed line by line. Plain JSONL files are append-only, so
+    each pass resumes from the byte offset where the previous one stopped;
+    compressed files are re-read when their size or mtime changes. Every
+    update is idempotent, so re-reading (e.g. after rotation) is harmless.
+    """
+
+    trace_dir: str = "traces"
+    db_path: str = ""
+    commit_every: int = 500
+    _db: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.db_path = self.db_path or os.path.join(self.trace_dir, "index.db")
+        parent = os.path.dirname(self.db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def update(self) -> Dict[str, int]:
+        """Index new files and new lines; returns counts for this pass."""
+        stats = {"files_seen": 0, "files_read": 0, "events": 0}
+        pending = 0
+        for path, size, mtime, prev in self._scan_known():
+            stats["files_seen"] += 1
+            if prev is not None and prev[0] == size and prev[1] == mtime:
+                continue
+            compressed = os.path.splitext(path)[1] in _OPENERS
+            offset = prev[2] if prev is not None and not compressed and size >= prev[2] else 0
+            offset, events = self._ingest(path, offset, compressed)
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, size, mtime, offset)
+            )
+            stats["files_read"] += 1
+            stats["events"] += events
+            pending += 1
+            if pending >= self.commit_every:
+                self._db.commit()
+                pending = 0
+        self._db.commit()
+        return stats
+
+    def slowest(self, limit: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        return self.runs(limit=limit, order_by="duration", **filters)
+
+    def runs(
+        self,
+        *,
+        limit: int = 50,
+        order_by: str = "started",
+        status: Optional[str] = None,
+        provider: Optional[str] = None,
+        tool: Optional[str] = None,
+        min_secs: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        if order_by not in _ORDERS:
+            raise ValueError(f"Unsupported order: {order_by}")
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if provider:
+            where.append("provider = ?")
+            params.append(provider)
+        if tool:
+            where.append("run_id IN (SELECT run_id FROM tool_calls WHERE tool = ?)")
+            params.append(tool)
+        if min_secs is not None:
+            where.append(f"{_DURATION} >= ?")
+            params.append(min_secs)
+        sql = (
+            f"SELECT run_id, provider, started, {_DURATION} AS duration, steps, status, error,"
+            " (SELECT COUNT(*) FROM tool_calls t WHERE t.run_id = runs.run_id) AS tool_calls"
+            " FROM runs"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {_ORDERS[order_by]} LIMIT ?"
+        return self._rows(sql, params + [limit])
+
+    def tool_stats(self) -> List[Dict[str, Any]]:
+        return self._rows(
+            "SELECT tool, COUNT(*) AS calls, SUM(error) AS errors,"
+            " ROUND(1.0 * SUM(error) / COUNT(*), 4) AS error_rate"
+            " FROM tool_calls GROUP BY tool ORDER BY calls DESC"
+        )
+
+    def step_distribution(self) -> List[Dict[str, Any]]:
+        return self._rows("SELECT steps, COUNT(*) AS runs FROM runs GROUP BY steps ORDER BY steps")
+
+    def summary(self) -> Dict[str, Any]:
+        row = self._rows(
+            "SELECT COUNT(*) AS runs, SUM(status = 'ok') AS ok, SUM(status = 'error') AS errors,"
+            f" SUM(status = 'running') AS running, AVG({_DURATION}) AS mean_secs FROM runs"
+        )[0]
+        row["tool_calls"] = self._db.execute("SELECT COUNT(*) FROM tool_calls").fetchone()[0]
+        return row
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _rows(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        cur = self._db.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row, strict=True)) for row in cur]
+
+    def _scan_known(self) -> Iterator[Tuple[str, int, float, Optional[Tuple[Any, ...]]]]:
+        """`_scan` entries with their `files` row (size, mtime, offset), if any.
+
+        Rows are fetched only for the paths on disk, a batch at a time, so a
+        pass does not load the whole table.
+        """
+        scan = self._scan()
+        while True:
+            batch = list(itertools.islice(scan, _LOOKUP_BATCH))
+            if not batch:
+                return
+            marks = ", ".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT path, size, mtime, offset FROM files WHERE path IN ({marks})",
+                [e[0] for e in batch],
+            )
+            known = {row[0]: row[1:] for row in rows}
+            for path, size, mtime in batch:
+                yield path, size, mtime, known.get(path)
+
+    def _scan(self) -> Iterator[Tuple[str, int, float]]:
+        stack = [self.trace_dir]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif _TRACE_FILE.match(entry.name):
+                        st = entry.stat()
+                        yield entry.path, st.st_size, st.st_mtime
+
+    def _ingest(self, path: str, offset: int, compressed: bool) -> Tuple[int, int]:
+        runs: Dict[str, Dict[str, Any]] = {}
+        tool_rows: List[Tuple[Any, ...]] = []
+        events = 0
+        opener = _OPENERS.get(os.path.splitext(path)[1], open)
+        with opener(path, "rb") as f:
+            if offset:
+                f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written; pick it up next pass
+                offset += len(line)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                events += 1
+                self._apply(event, runs, tool_rows)
+        if runs:
+            self._db.executemany(_UPSERT_RUN, runs.values())
+        if tool_rows:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO tool_calls VALUES (?, ?, ?, ?, ?, ?)", tool_rows
+            )
+        return (0 if compressed else offset), events
+
+    @staticmethod
+    def _apply(
+        event: Dict[str, Any], runs: Dict[str, Dict[str, Any]], tool_rows: List[Tuple[Any, ...]]
+    ) -> None:
+        run_id = str(event.get("run_id", ""))
+        if not run_id:
+            return
+        run = runs.get(run_id)
+        if run is None:
+            run = runs[run_id] = _new_run(run_id)
+        ts = event.get("ts")
+        if isinstance(ts, (int, float)):
+            run["started"] = ts if run["started"] is None else min(run["started"], ts)
+            run["ended"] = ts if run["ended"] is None else max(run["ended"], ts)
+        kind = event.get("event")
+        step = event.get("step")
+        if isinstance(step, int):
+            run["steps"] = max(run["steps"], step + 1)
+        if kind == "start":
+            run["provider"] = event.get("provider")
+        elif kind == "final":
+            run["status"] = "ok"
+        elif kind == "error":
+            run["status"] = "error"
+            run["error"] = str(event.get("error", ""))[:500]
+        elif kind == "summary" and isinstance(event.get("wall_secs"), (int, float)):
+            run["duration"] = event["wall_secs"]
+        elif kind == "tool_result":
+            result = str(event.get("result", ""))
+            tool_rows.append(
+                (
+                    run_id,
+                    ts,
+                    step,
+                    event.get("index", 0),
+                    event.get("tool"),
+                    int(result.startswith("TOOL_ERROR")),
+                )
+            )
+
+
+def add_traces_args(p) -> None:
+    p.add_argument(
+        "query",
+        nargs="?",
+        default="summary",
+        choices=["index", "summary", "slowest", "runs", "tools", "steps"],
+    )
+    p.add_argument("--dir", default="traces", help="Traces directory (default traces).")
+    p.add_argument("--db", default=None, help="Index database (default <dir>/index.db).")
+    p.add_argument(
+        "--no-update", action="store_true", help="Query the index without scanning for new traces."
+    )
+    p.add_argument("--limit", type=int, default=10, help="Rows for slowest/runs.")
+    p.add_argument("--status", default=None, help="Filter runs: ok | error | running.")
+    p.add_argument("--provider", default=None, help="Filter runs by provider name.")
+    p.add_argument("--tool", default=None, help="Filter runs that called this tool.")
+    p.add_argument("--min-secs", type=float, default=None, help="Filter runs at least this long.")
+    p.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+
+
+def run_from_args(args) -> None:
+    index = TraceIndex(trace_dir=args.dir, db_path=args.db or "")
+    try:
+        updated = index.update() if not args.no_update or args.query == "index" else None
+        filters = {
+            "status": args.status,
+            "provider": args.provider,
+            "tool": args.tool,
+            "min_secs": args.min_secs,
+        }
+        if args.query == "index":
+            result: Any = updated
+        elif args.query == "summary":
+            result = index.summary()
+        elif args.query == "slowest":
+            result = index.slowest(limit=args.limit, **filters)
+        elif args.query == "runs":
+            result = index.runs(limit=args.limit, **filters)
+        elif args.query == "tools":
+            result = index.tool_stats()
+        else:
+            result = index.step_distribution()
+    finally:
+        index.close()
+    if args.json or isinstance(result, dict):
+        print(json.dumps(result, indent=2))
+        return
+    _print_table(result)
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        print("(no rows)")
+        return
+    cols = list(rows[0])
+    cells = [[_fmt(row[c]) for c in cols] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(cols)]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths, strict=True)))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths, strict=True)))
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return "" if value is None else str(value)
@@ -1,27 +1,328 @@
 from __future__ import annotations
 
+import atexit
+import importlib
 import json
 import os
+import threading
 import time
 import uuid
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, Optional
+import weakref
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional, Protocol
+
+from .metrics import REGISTRY
+
+
+class RawJSON:
+    """An already-serialized JSON value; trace encoding splices it in verbatim."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+def _encode(event: Dict[str, Any]) -> str:
+    raw = [k for k, v in event.items() if type(v) is RawJSON]
+    if not raw:
+        return json.dumps(event, ensure_ascii=False) + "\n"
+    head = json.dumps(
+        {k: v for k, v in event.items() if type(v) is not RawJSON}, ensure_ascii=False
+    )
+    tail = ", ".join(f"{json.dumps(k)}: {event[k].text}" for k in raw)
+    return f"{head[:-1]}{', ' if len(head) > 2 else ''}{tail}}}\n"
+
+
+class TraceSink(Protocol):
+    """Receives event dicts in batches. Values may be `RawJSON`; encode events
+    with `_encode` (or unwrap `.text`) rather than `json.dumps` directly."""
+
+    def write_batch(self, events: List[Dict[str, Any]]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class RunFileSink:
+    """One JSONL file per run in `trace_dir` (the classic layout)."""
+
+    trace_dir: str = "traces"
+
+    def __post_init__(self) -> None:
+        os.makedirs(self.trace_dir, exist_ok=True)
+
+    def write_batch(self, events: List[Dict[str, Any]]) -> None:
+        by_run: Dict[str, List[str]] = {}
+        for event in events:
+            by_run.setdefault(str(event.get("run_id", "unknown")), []).append(_encode(event))
+        for run_id, lines in by_run.items():
+            with open(os.path.join(self.trace_dir, f"{run_id}.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class JsonlFileSink:
+    """Single shared JSONL file for many runs, kept open.
+
+    With `max_bytes` > 0 the file rotates to `path.1`, `path.2`, ... keeping
+    `backups` old files.
+    """
+
+    path: str
+    max_bytes: int = 0
+    backups: int = 5
+    _f: Optional[IO[str]] = field(default=None, init=False, repr=False)
+
+    def write_batch(self, events: List[Dict[str, Any]]) -> None:
+        if self._f is None:
+            self._f = self._open()
+        self._f.write("".join(_encode(e) for e in events))
+        self._f.flush()
+        if self.max_bytes and self._f.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def _open(self) -> IO[str]:
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        return open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        self.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+# Codec modules are imported only when a compressed sink is opened.
+_CODECS = {"gzip": "gzip", "bz2": "bz2", "lzma": "lzma"}
+
+
+@dataclass
+class CompressedJsonlSink:
+    """Compressed JSONL stream (gzip, bz2 or lzma from the stdlib).
+
+    Each sink session appends a new compressed member; standard readers
+    (`gzip.open`, `zcat`) see one continuous file.
+    """
+
+    path: str
+    codec: str = "gzip"
+    _f: Optional[IO[str]] = field(default=None, init=False, repr=False)
+
+    def write_batch(self, events: List[Dict[str, Any]]) -> None:
+        if self._f is None:
+            if self.codec not in _CODECS:
+                raise ValueError(f"Unknown trace codec: {self.codec}")
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            codec = importlib.import_module(_CODECS[self.codec])
+            self._f = codec.open(self.path, "at", encoding="utf-8")
+        self._f.write("".join(_encode(e) for e in events))
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def make_sink(spec: str, *, trace_dir: str = "traces") -> TraceSink:
+    """Build a sink from a short spec.
+
+    - `run` (default): one file per run in `trace_dir`
+    - `jsonl[:path]`: one shared file (default `trace_dir/traces.jsonl`)
+    - `gzip|bz2|lzma[:path]`: shared compressed file
+    """
+    kind, _, path = spec.partition(":")
+    kind = kind.strip().lower() or "run"
+    if kind == "run":
+        return RunFileSink(trace_dir=path or trace_dir)
+    if kind == "jsonl":
+        max_bytes = int(os.getenv("TYNI_TRACE_MAX_BYTES", "0"))
+        return JsonlFileSink(
+            path=path or os.path.join(trace_dir, "traces.jsonl"), max_bytes=max_bytes
+        )
+    if kind in _CODECS:
+        ext = {"gzip": "gz", "bz2": "bz2", "lzma": "xz"}[kind]
+        return CompressedJsonlSink(
+            path=path or os.path.join(trace_dir, f"traces.jsonl.{ext}"), codec=kind
+        )
+    raise ValueError(f"Unknown trace sink: {spec}")
+
+
+_live_pipelines: "weakref.WeakSet[TracePipeline]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for pipeline in list(_live_pipelines):
+        pipeline.close()
+
+
+@dataclass(eq=False)
+class TracePipeline:
+    """Buffers trace events and writes them in batches from a background thread.
+
+    Events are flushed every `flush_interval_secs` or once `batch_size` are
+    buffered. Past `max_buffer` pending events new ones are dropped (and
+    counted) rather than blocking the agent. With `flush_on_run_end` the
+    writer thread is woken to flush as each run finishes (or fails); the run
+    itself does not wait for the disk. Pipelines are also flushed at
+    interpreter exit.
+    """
+
+    sink: TraceSink
+    flush_interval_secs: float = 0.5
+    batch_size: int = 256
+    max_buffer: int = 50_000
+    flush_on_run_end: bool = True
+
+    _buf: List[Dict[str, Any]] = field(default_factory=list, init=False, repr=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, init=False, repr=False)
+    _flush_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _closed: bool = field(default=False, init=False)
+    _flush_requested: bool = field(default=False, init=False, repr=False)
+    written: int = field(default=0, init=False)
+    dropped: int = field(default=0, init=False)
+    batches: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="tyni-trace", daemon=True)
+        self._thread.start()
+        _live_pipelines.add(self)
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        with self._cond:
+            if self._closed or len(self._buf) >= self.max_buffer:
+                self.dropped += 1
+                return False
+            self._buf.append(event)
+            if len(self._buf) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self) -> None:
+        """Write everything buffered so far (blocking)."""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._buf = self._buf, []
+            if not batch:
+                return
+            t0 = time.perf_counter()
+            try:
+                self.sink.write_batch(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception:
+                self.errors += 1
+                self.dropped += len(batch)
+            REGISTRY.observe("tyni_trace_flush_seconds", time.perf_counter() - t0)
+            REGISTRY.inc("tyni_trace_events_total", len(batch))
+
+    def request_flush(self) -> None:
+        """Have the writer thread flush now, without waiting for it."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        self.sink.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            buffered = len(self._buf)
+        return {
+            "buffered": buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                idle = not self._closed and not self._flush_requested
+                if idle and len(self._buf) < self.batch_size:
+                    self._cond.wait(self.flush_interval_secs)
+                self._flush_requested = False
+                closed = self._closed
+            if closed:
+                return
+            self.flush()
+
+    @staticmethod
+    def from_env(trace_dir: str = "traces") -> "TracePipeline":
+        return TracePipeline(
+            sink=make_sink(os.getenv("TYNI_TRACE_SINK", "run"), trace_dir=trace_dir),
+            flush_interval_secs=float(os.getenv("TYNI_TRACE_FLUSH_SECS", "0.5")),
+            batch_size=int(os.getenv("TYNI_TRACE_BATCH", "256")),
+            flush_on_run_end=os.getenv("TYNI_TRACE_FLUSH_ON_END", "1") != "0",
+        )
 
 
 @dataclass
 class TraceWriter:
+    """Per-run trace handle.
+
+    With a `pipeline`, events are buffered and written in the background.
+    Without one, each event is appended synchronously to `trace_dir/<run_id>.jsonl`.
+    """
+
     trace_dir: str = "traces"
     run_id: str = ""
+    pipeline: Optional[TracePipeline] = None
+    # Time spent in `write` (caller side), for run summaries.
+    write_secs: float = field(default=0.0, init=False)
 
     def __post_init__(self) -> None:
         if not self.run_id:
             self.run_id = uuid.uuid4().hex
-        os.makedirs(self.trace_dir, exist_ok=True)
+        if self.pipeline is None:
+            os.makedirs(self.trace_dir, exist_ok=True)
         self.path = os.path.join(self.trace_dir, f"{self.run_id}.jsonl")
 
     def write(self, event: Dict[str, Any]) -> None:
+        t0 = time.perf_counter()
         event = dict(event)
         event.setdefault("ts", time.time())
         event.setdefault("run_id", self.run_id)
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        if self.pipeline is not None:
+            self.pipeline.submit(event)
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(_encode(event))
+        self.write_secs += time.perf_counter() - t0
+
+    def flush(self) -> None:
+        if self.pipeline is not None:
+            self.pipeline.flush()
+
+    def end(self) -> None:
+        """Called by the runner when the run is over, successful or not (never blocks on I/O)."""
+        if self.pipeline is not None and self.pipeline.flush_on_run_end:
+            self.pipeline.request_flush()
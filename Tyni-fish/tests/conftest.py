@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubServer:
+    """Local OpenAI-compatible endpoint. `responder(body) -> (status, payload)`.
+
+    A list payload is sent piece by piece: bytes are written and flushed, and a
+    number pauses for that many seconds (to mimic a slow stream).
+    """
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.connections = 0
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                stub.requests += 1
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, payload = stub.responder(body)
+                parts = payload if isinstance(payload, list) else [payload]
+                parts = [json.dumps(p).encode() if isinstance(p, dict) else p for p in parts]
+                size = sum(len(p) for p in parts if isinstance(p, bytes))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                try:
+                    for part in parts:
+                        if isinstance(part, bytes):
+                            self.wfile.write(part)
+                            self.wfile.flush()
+                        else:
+                            time.sleep(part)
+                except OSError:
+                    self.close_connection = True  # the client stopped reading
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def completion(content: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def make(responder):
+        server = StubServer(responder)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.close()
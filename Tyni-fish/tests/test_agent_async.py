@@ -0,0 +1,18 @@
+import asyncio
+
+from tyni_fish.agent import AgentRunner
+
+
+def test_arun_matches_run(tmp_path):
+    runner = AgentRunner.from_config(
+        provider_name="dummy", workspace_dir=str(tmp_path), trace_dir=str(tmp_path / "traces")
+    )
+    assert asyncio.run(runner.arun("19*7")) == runner.run("19*7") == "133"
+
+
+def test_arun_many_multiplexes_sessions(tmp_path):
+    runner = AgentRunner.from_config(provider_name="dummy", workspace_dir=str(tmp_path))
+    runner.tracing = False
+    inputs = [f"{i}*2" for i in range(300)]
+    outs = runner.run_many(inputs, concurrency=50)
+    assert outs == [str(i * 2) for i in range(300)]
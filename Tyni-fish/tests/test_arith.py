@@ -0,0 +1,33 @@
+import pytest
+
+from tyni_fish.tools import arith
+from tyni_fish.tools.base import ToolError
+from tyni_fish.tools.builtins import CalcTool
+
+
+@pytest.mark.parametrize(
+    "expr", ["19*7", "5/2", "-2**2", "2**-1", "2**3**2", "7//2", "-7%3", "0.1+0.2", "(1+2)*-3"]
+)
+def test_matches_python_semantics(expr):
+    assert arith.evaluate(expr) == eval(expr)
+
+
+@pytest.mark.parametrize(
+    "expr", ["9**9**9", "2**5000", "1/0", "(1", "1+", "3 4", "2(3)", "__import__", "1e5"]
+)
+def test_rejects_bad_or_oversized_expressions(expr):
+    with pytest.raises(arith.ArithError):
+        arith.evaluate(expr)
+
+
+def test_exact_modes_and_batch():
+    assert arith.format_number(arith.evaluate("0.1+0.2", "decimal")) == "0.3"
+    assert arith.format_number(arith.evaluate("1/3+1/6", "fraction")) == "1/2"
+    calc = CalcTool()
+    assert calc(exprs=["1+1", "1/0", "2**10"]) == "2\nerror: division by zero\n1024"
+    with pytest.raises(ToolError):
+        calc(expr="9**9**9")
+    before = arith.compile_expr.cache_info().hits
+    calc(expr="19*7")
+    calc(expr="19*7")
+    assert arith.compile_expr.cache_info().hits > before
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from tyni_fish.batch import BatchRunner, load_checkpoint
+
+
+def _inputs(tmp_path, n):
+    path = tmp_path / "in.jsonl"
+    rows = [{"id": f"c{i}", "input": f"{i}*3"} for i in range(n)]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n")
+    return str(path)
+
+
+def _rows(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_process_pool_writes_results_in_input_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    summary = BatchRunner(workers=2, chunk_size=3, tracing=False).run(
+        _inputs(tmp_path, 20), "out.jsonl"
+    )
+    assert summary["done"] == summary["ok"] == 20
+    rows = _rows(tmp_path / "out.jsonl")
+    assert [r["index"] for r in rows] == list(range(20))
+    assert all(r["id"] == f"c{i}" and str(i * 3) in r["output"] for i, r in enumerate(rows))
+
+
+def test_resume_skips_finished_inputs_and_drops_torn_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src = _inputs(tmp_path, 10)
+    out = tmp_path / "out.jsonl"
+    BatchRunner(workers=0, tracing=False).run(src, str(out))
+    lines = out.read_text().splitlines(keepends=True)
+    out.write_text("".join(lines[:4]) + lines[4][:10])  # crash mid-write
+    assert load_checkpoint(str(out)) == {0, 1, 2, 3}
+
+    summary = BatchRunner(workers=2, ordered=False, tracing=False).run(src, str(out))
+    assert summary["skipped"] == 4 and summary["done"] == 6
+    assert sorted(r["index"] for r in _rows(out)) == list(range(10))
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_bad_lines_become_error_rows(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path)
+    src = tmp_path / "in.jsonl"
+    src.write_text('"2*3"\n[1,2]\n{"input": \n{"id": "x"}\n"3*3"\n')
+    summary = BatchRunner(workers=workers, chunk_size=2, tracing=False).run(str(src), "out.jsonl")
+    assert summary["done"] == 5 and summary["ok"] == 2
+    rows = _rows(tmp_path / "out.jsonl")
+    assert [r["ok"] for r in rows] == [True, False, False, False, True]
+    assert rows[1]["error"].startswith("TypeError")
+    assert rows[2]["error"].startswith("JSONDecodeError")
+    assert rows[3]["id"] == "x" and rows[3]["error"].startswith("KeyError")
@@ -0,0 +1,25 @@
+from tyni_fish.bench import BenchConfig, compare, run_bench
+from tyni_fish.providers.mock import MockProvider
+
+
+def test_mock_provider_injects_latency_and_errors():
+    p = MockProvider(latency_secs=0.001, error_rate=1.0)
+    try:
+        p.next_action(system="", messages=[])
+    except RuntimeError as e:
+        assert "injected" in str(e)
+    assert p.calls == 1 and p.injected_secs > 0
+
+
+def test_bench_report_and_regression_check():
+    results = run_bench(
+        BenchConfig(runs=3, concurrency=[1, 4], throughput_latency_ms=1.0, tool_calls=50)
+    )
+    assert results["loop"]["errors"] == 0
+    assert set(results["throughput"]) == {"c1_runs_per_sec", "c4_runs_per_sec"}
+
+    baseline = {"loop": {"per_step_overhead_us": 100.0}, "throughput": {"c1_runs_per_sec": 50.0}}
+    current = {"loop": {"per_step_overhead_us": 130.0}, "throughput": {"c1_runs_per_sec": 45.0}}
+    assert compare(current, baseline, threshold=0.2) == [
+        "loop.per_step_overhead_us: 100.0 -> 130.0 (+30%)"
+    ]
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from tyni_fish.config import ConfigWatcher, apply_config, build_runner, load_config, parse_config
+from tyni_fish.providers.base import FinalAction, ToolAction
+
+REPO_CONFIG = Path(__file__).resolve().parents[1] / "configs" / "tyni_fish.json"
+
+
+def test_repo_config_loads():
+    config = load_config(str(REPO_CONFIG))
+    assert config.provider == "dummy" and config.workspace_dir == "workspace"
+    assert "note_search" in config.policy.allow_tools and config.policy.max_steps == 8
+
+
+def test_bad_config_is_rejected():
+    with pytest.raises(ValueError, match="unknown keys"):
+        parse_config({"polcy": {}})
+    with pytest.raises(ValueError, match="executor.tool_workers"):
+        parse_config({"executor": {"tool_workers": "8"}})
+    with pytest.raises(ValueError, match="unknown policy keys"):
+        parse_config({"policy": {"max_stepz": 3}})
+
+
+class GatedProvider:
+    """Calls `echo` once `gate` is set, then answers with the tool result."""
+
+    name = "gated"
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.waiting = threading.Event()
+
+    def next_action(self, *, system, messages):
+        if messages[-1]["role"] == "tool":
+            return FinalAction(type="final", content=messages[-1]["content"])
+        self.waiting.set()
+        self.gate.wait(5)
+        return ToolAction(type="tool", name="echo", args={"text": "hi"})
+
+
+def _write(path, doc, bump):
+    path.write_text(json.dumps(doc))
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+def test_reload_swaps_policy_and_leaves_inflight_runs_alone(tmp_path):
+    path = tmp_path / "tyni_fish.json"
+    doc = {
+        "policy": {"allow_tools": ["echo", "calc"], "max_steps": 4},
+        "tracing": {"enabled": False},
+        "workspace_dir": str(tmp_path / "ws"),
+        "executor": {"tool_workers": 2},
+        "cache": {"tool_results": 16},
+    }
+    _write(path, doc, 0)
+    config = load_config(str(path))
+    runner = build_runner(config)
+    provider = runner.provider = GatedProvider()
+    watcher = ConfigWatcher(str(path), config, lambda new, old: apply_config(runner, new))
+
+    outputs = []
+    inflight = threading.Thread(target=lambda: outputs.append(runner.run("go")))
+    inflight.start()
+    assert provider.waiting.wait(5)
+
+    old_tools = runner.tools
+    doc["policy"] = {"allow_tools": ["calc"], "max_steps": 2}
+    doc["executor"] = {"tool_workers": 6}
+    doc["cache"] = {"tool_results": 4}
+    _write(path, doc, 10**9)
+    assert watcher.check() and watcher.reloads == 1
+    assert runner.policy.allow_tools == {"calc"} and runner.tools is not old_tools
+    assert runner.executor.workers == 6 and runner.tool_cache.max_entries == 4
+
+    provider.gate.set()
+    inflight.join(5)
+    assert outputs == ["hi"]  # started under the old policy, which allows echo
+    with pytest.raises(RuntimeError, match="not allowed"):
+        runner.run("again")
+
+    path.write_text("{broken")
+    os.utime(path, ns=(0, 3 * 10**18))
+    assert not watcher.check() and watcher.errors == 1
+    assert watcher.config.policy.allow_tools == {"calc"}
+    runner.close()
+
+
+class ReadOnce:
+    name = "read-once"
+
+    def next_action(self, *, system, messages):
+        if messages[-1]["role"] == "tool":
+            return FinalAction(type="final", content=messages[-1]["content"])
+        return ToolAction(type="tool", name="read_file", args={"path": "big.txt"})
+
+
+def test_reload_drops_tool_results_cached_under_old_config(tmp_path):
+    ws = tmp_path / "ws"
+    ws.mkdir()
+    (ws / "big.txt").write_text("x" * 5000)
+    os.utime(ws / "big.txt", (0, 0))  # old enough for read_file's fingerprint to be cached
+    doc = {
+        "policy": {"max_read_bytes": 100},
+        "tracing": {"enabled": False},
+        "workspace_dir": str(ws),
+    }
+    runner = build_runner(parse_config(doc))
+    runner.provider = ReadOnce()
+    assert "truncated" in runner.run("read")
+
+    doc["policy"] = {"max_read_bytes": 10000}
+    apply_config(runner, parse_config(doc))
+    assert runner.run("read") == "x" * 5000
+    runner.close()
@@ -0,0 +1,99 @@
+import json
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.context import ContextWindow, estimate_tokens
+from tyni_fish.policy import Policy
+from tyni_fish.providers.base import FinalAction, ToolAction
+from tyni_fish.providers.mock import MockProvider
+from tyni_fish.session import Session
+from tyni_fish.tools.builtins import default_registry
+
+
+def _turn(i):
+    action = {"type": "tool", "name": "echo", "args": {"text": str(i)}}
+    return [
+        {"role": "assistant", "content": json.dumps(action)},
+        {"role": "tool", "content": "x" * 400},
+    ]
+
+
+def test_large_tool_output_is_truncated():
+    ctx = ContextWindow(max_tool_output_tokens=50, messages=[{"role": "user", "content": "hi"}])
+    ctx.append({"role": "tool", "content": "a" * 1000 + "END"})
+    out = ctx.messages[-1]["content"]
+    assert out.endswith("END") and "[truncated" in out
+    assert estimate_tokens(out) < 70 and ctx.truncated == 1 and ctx.saved_bytes > 700
+
+
+def test_old_turns_collapse_to_fit_budget():
+    ctx = ContextWindow(max_tokens=400, messages=[{"role": "user", "content": "task"}])
+    for i in range(6):
+        ctx.extend(_turn(i))
+        ctx.compact()
+        assert ctx.total_tokens <= 400
+    assert ctx.messages[0]["content"] == "task"
+    assert (
+        ctx.messages[1]["content"].startswith("[context]")
+        and "echo x" in ctx.messages[1]["content"]
+    )
+    assert ctx.messages[-2:] == _turn(5)
+    assert ctx.collapsed > 0 and ctx.saved_tokens > 0
+
+
+def test_runner_traces_context_savings(tmp_path):
+    (tmp_path / "ws").mkdir()
+    (tmp_path / "ws" / "big.txt").write_text("y" * 4000)
+    script = [{"type": "tool", "name": "read_file", "args": {"path": "big.txt"}}] * 3 + [
+        {"type": "final", "content": "ok"}
+    ]
+    runner = AgentRunner(
+        policy=Policy(max_context_tokens=800, max_tool_output_tokens=100),
+        tools=default_registry(workspace_dir=str(tmp_path / "ws")),
+        provider=MockProvider(script=script),
+        workspace_dir=str(tmp_path / "ws"),
+        trace_dir=str(tmp_path / "traces"),
+    )
+    res = runner.run_result("go")
+    assert res.output == "ok"
+    events = [
+        json.loads(line)
+        for line in (tmp_path / "traces" / f"{res.run_id}.jsonl").read_text().splitlines()
+    ]
+    ctx = [e for e in events if e["event"] == "context"][0]
+    assert ctx["truncated"] == 3 and ctx["saved_tokens"] > 2000
+
+
+class EchoThrice:
+    """Three big tool calls per question, then answers; remembers every prompt."""
+
+    name = "echo-thrice"
+
+    def __init__(self):
+        self.prompts = []
+
+    def next_action(self, *, system, messages):
+        self.prompts.append([dict(m) for m in messages])
+        if len(self.prompts) % 4 == 0:
+            question = [m["content"] for m in messages if m["content"].endswith("QUESTION")][-1]
+            return FinalAction(type="final", content=question.lower())
+        return ToolAction(type="tool", name="echo", args={"text": "z" * 600})
+
+
+def test_compaction_keeps_the_current_question_across_turns(tmp_path):
+    provider = EchoThrice()
+    runner = AgentRunner(
+        policy=Policy(max_context_tokens=600),
+        tools=default_registry(workspace_dir=str(tmp_path)),
+        provider=provider,
+        workspace_dir=str(tmp_path),
+        tracing=False,
+    )
+    session = Session(runner=runner)
+    assert session.send("FIRST QUESTION") == "first question"
+    assert session.send("SECOND QUESTION") == "second question"
+    for prompt in provider.prompts[4:]:
+        contents = [m["content"] for m in prompt]
+        assert contents[0] == "FIRST QUESTION" and "SECOND QUESTION" in contents
+    assert session.context.collapsed > 0
+    assert session.messages[1]["content"].startswith("[context]")
+    session.close()
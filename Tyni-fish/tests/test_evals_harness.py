@@ -0,0 +1,29 @@
+import json
+
+from tyni_fish.evals.harness import iter_cases, parse_shard, run_dataset
+
+
+def _dataset(tmp_path, n):
+    path = tmp_path / "cases.jsonl"
+    rows = [{"id": f"c{i}", "input": f"{i}*3", "expected_contains": [str(i * 3)]} for i in range(n)]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n")
+    return str(path)
+
+
+def test_shards_partition_the_dataset(tmp_path):
+    path = _dataset(tmp_path, 10)
+    ids = [c.id for i in range(3) for c in iter_cases(path, shard=parse_shard(f"{i}/3"))]
+    assert sorted(ids) == sorted(c.id for c in iter_cases(path))
+
+
+def test_parallel_run_writes_results_and_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = _dataset(tmp_path, 12)
+    ok = run_dataset(
+        path, workers=4, mode="async", results_path="r.jsonl", report_path="report.json"
+    )
+    assert ok
+    rows = [json.loads(line) for line in (tmp_path / "r.jsonl").read_text().splitlines()]
+    assert len(rows) == 12 and all(r["steps"] == 2 and r["tool_calls"] == 1 for r in rows)
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert report["passed"] == 12 and report["latency_p50"] <= report["latency_p99"]
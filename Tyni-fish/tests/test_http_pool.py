@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from conftest import completion
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.policy import Policy
+from tyni_fish.providers.http_pool import AsyncHTTPPool, HTTPPool
+from tyni_fish.providers.openai_compat import OpenAICompatProvider
+from tyni_fish.tools.builtins import default_registry
+
+FINAL = json.dumps({"type": "final", "content": "hi"})
+
+
+def test_keep_alive_reuses_one_connection(stub_server):
+    server = stub_server(lambda body: (200, completion(FINAL)))
+    pool = HTTPPool()
+    provider = OpenAICompatProvider(base_url=server.base_url, api_key="k", pool=pool)
+    for _ in range(5):
+        assert (
+            provider.next_action(system="s", messages=[{"role": "user", "content": "x"}]).content
+            == "hi"
+        )
+    assert server.connections == 1
+    (stats,) = pool.stats().values()
+    assert stats["created"] == 1 and stats["reused"] == 4 and stats["idle"] == 1
+
+
+def test_retries_on_503(stub_server):
+    statuses = [503, 503, 200]
+    server = stub_server(lambda body: (statuses.pop(0), completion(FINAL)))
+    pool = HTTPPool(backoff_secs=0.0)
+    provider = OpenAICompatProvider(base_url=server.base_url, pool=pool)
+    assert provider.next_action(system="s", messages=[]).content == "hi"
+    assert server.requests == 3
+    assert next(iter(pool.stats().values()))["retries"] == 2
+
+
+def test_async_pool_reuses_within_loop(stub_server):
+    server = stub_server(lambda body: (200, completion(FINAL)))
+    provider = OpenAICompatProvider(base_url=server.base_url, async_pool=AsyncHTTPPool())
+
+    async def steps():
+        for _ in range(4):
+            await provider.anext_action(system="s", messages=[])
+
+    asyncio.run(steps())
+    assert server.connections == 1
+
+
+def test_sync_runs_close_their_loop_connections(stub_server, tmp_path):
+    server = stub_server(lambda body: (200, completion(FINAL)))
+    pool = AsyncHTTPPool()
+    provider = OpenAICompatProvider(base_url=server.base_url, async_pool=pool)
+    ws = str(tmp_path)
+    tools = default_registry(workspace_dir=ws)
+    runner = AgentRunner(
+        policy=Policy(), tools=tools, provider=provider, workspace_dir=ws, tracing=False
+    )
+    runner.run("warm up")
+    fds = len(os.listdir("/proc/self/fd"))
+    for _ in range(100):
+        assert runner.run("x") == "hi"
+    runner.close()
+    assert len(pool._loops) == 0
+    assert len(os.listdir("/proc/self/fd")) <= fds + 10
+    (stats,) = pool.stats().values()
+    assert stats["idle"] == 0 and stats["in_use"] == 0
+
+
+def test_sync_provider_calls_honor_the_provider_timeout(stub_server):
+    server = stub_server(lambda body: (200, [1.0, json.dumps(completion(FINAL)).encode()]))
+    pool = HTTPPool(max_retries=0, timeout_secs=30.0)
+    provider = OpenAICompatProvider(base_url=server.base_url, timeout_secs=0.2, pool=pool)
+    calls = [
+        lambda: provider.next_action(system="s", messages=[]),
+        lambda: provider.stream_action(system="s", messages=[], on_token=lambda _: None),
+    ]
+    for call in calls:
+        t0 = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            call()
+        assert time.perf_counter() - t0 < 0.9
+    assert [s["in_use"] for s in pool.stats().values()] == [0]
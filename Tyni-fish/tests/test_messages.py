@@ -0,0 +1,50 @@
+import json
+
+from tyni_fish.context import ContextWindow
+from tyni_fish.providers.base import (
+    FinalAction,
+    Message,
+    ToolAction,
+    action_json,
+    action_to_dict,
+    message_json,
+)
+from tyni_fish.providers.openai_compat import OpenAICompatProvider
+from tyni_fish.tracing import RawJSON, _encode
+
+
+def test_actions_are_slotted_and_serialized_once():
+    action = ToolAction(type="tool", name="calc", args={"expr": "1+1"})
+    assert not hasattr(action, "__dict__")
+    first = action_json(action)
+    assert first is action_json(action)
+    assert json.loads(first) == action_to_dict(action)
+    assert action == ToolAction(type="tool", name="calc", args={"expr": "1+1"})
+    assert "_json" not in repr(FinalAction(type="final", content="x"))
+
+
+def test_message_cache_and_trace_splicing():
+    msg = Message("tool", "héllo")
+    assert msg == {"role": "tool", "content": "héllo"}
+    assert message_json(msg) is message_json(msg)
+    msg["content"] = "changed"
+    assert json.loads(message_json(msg))["content"] == "changed"
+    assert type(ContextWindow(messages=[{"role": "user", "content": "x"}]).messages[0]) is Message
+
+    action = ToolAction(type="tool", name="echo", args={"text": "ü"})
+    spliced = _encode({"event": "action", "step": 0, "action": RawJSON(action_json(action))})
+    assert json.loads(spliced) == {"event": "action", "step": 0, "action": action_to_dict(action)}
+    assert json.loads(_encode({"action": RawJSON("[1]")})) == {"action": [1]}
+
+
+def test_request_body_matches_plain_encoding():
+    provider = OpenAICompatProvider(base_url="http://127.0.0.1:1/v1", api_key="k", model="m")
+    messages = [Message("user", "hi"), {"role": "assistant", "content": "yo"}]
+    _, body, _ = provider._build_request("sys", messages, stream=True)
+    assert json.loads(body) == {
+        "model": "m",
+        "temperature": 0.2,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+        "messages": [{"role": "system", "content": "sys"}] + [dict(m) for m in messages],
+    }
@@ -0,0 +1,48 @@
+import json
+import time
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.metrics import MetricsRegistry, SamplingProfiler
+
+
+def test_registry_renders_prometheus_text():
+    reg = MetricsRegistry()
+    reg.inc("tyni_things_total", tool="calc")
+    with reg.span("tyni_work_seconds", tool="calc"):
+        pass
+    text = reg.render()
+    assert 'tyni_things_total{tool="calc"} 1' in text
+    assert 'tyni_work_seconds_bucket{tool="calc",le="+Inf"} 1' in text
+    assert 'tyni_work_seconds_count{tool="calc"} 1' in text
+
+
+def test_run_reports_timings_and_metrics(tmp_path):
+    reg = MetricsRegistry()
+    runner = AgentRunner.from_config(
+        workspace_dir=str(tmp_path / "ws"), trace_dir=str(tmp_path / "traces")
+    )
+    runner.metrics = reg
+    res = runner.run_result("6*7")
+    assert res.timings["provider_calls"] == 2 and res.timings["tool_calls"] == 1
+    assert len(res.timings["steps"]) == 2 and res.timings["wall_secs"] >= res.timings["tool_secs"]
+
+    events = [
+        json.loads(line)
+        for line in (tmp_path / "traces" / f"{res.run_id}.jsonl").read_text().splitlines()
+    ]
+    assert events[-1]["event"] == "summary" and events[-1]["trace_secs"] > 0
+    text = reg.render()
+    assert (
+        'tyni_tool_seconds_count{tool="calc"} 1' in text
+        and 'tyni_runs_total{outcome="ok"} 1' in text
+    )
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    path = tmp_path / "stacks.txt"
+    prof = SamplingProfiler(str(path), interval_secs=0.001)
+    prof.start()
+    time.sleep(0.05)
+    prof.stop()
+    lines = path.read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
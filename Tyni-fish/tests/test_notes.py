@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import time
+
+from tyni_fish.notes import NoteStore
+from tyni_fish.tools.builtins import default_registry
+
+
+def _append_many(path, prefix, n):
+    store = NoteStore(path=path, fsync="never")
+    for i in range(n):
+        store.append(f"{prefix} note {i}")
+    store.close()
+
+
+def test_search_tail_and_pagination(tmp_path):
+    store = NoteStore(path=str(tmp_path / "notes.jsonl"))
+    for i in range(30):
+        store.append(
+            f"item {i} {'retry logic' if i % 3 == 0 else 'other'}",
+            tags=["even"] if i % 2 == 0 else [],
+        )
+    page, total = store.search("RETRY", limit=4)
+    assert total == 10
+    assert [n.id for n in page] == [27, 24, 21, 18]
+    page, _ = store.search("retry", offset=8, limit=4)
+    assert [n.id for n in page] == [3, 0]
+    _, total = store.search("retry", tag="even")
+    assert total == 5
+    assert [n.text for n in store.tail(2)] == ["item 28 other", "item 29 other"]
+    assert [n.id for n in store.tail(2, before=5)] == [3, 4]
+    _, total = store.search(since=time.time() + 60)
+    assert total == 0
+    store.close()
+
+
+def test_concurrent_processes_do_not_interleave(tmp_path):
+    path = str(tmp_path / "notes.jsonl")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_append_many, args=(path, f"p{i}", 50)) for i in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    store = NoteStore(path=path)
+    assert store.count() == 150
+    assert store.search("p1 note")[1] == 50
+    store.close()
+
+
+def test_tools_and_legacy_import(tmp_path):
+    (tmp_path / "notes.txt").write_text("old line one\nold line two\n", encoding="utf-8")
+    reg = default_registry(workspace_dir=str(tmp_path))
+    assert reg.get("note_append")(line="fresh idea", tags="ideas,todo") == "ok"
+    assert "old line two" in reg.get("note_tail")(n=5)
+    out = reg.get("note_search")(query="idea", tag="todo")
+    assert out.startswith("1 matches") and "[ideas,todo] fresh idea" in out
+    assert "next: offset=1" in reg.get("note_search")(query="old line", limit=1)
+
+
+def test_batch_fsync_covers_the_last_note(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+    store = NoteStore(path=str(tmp_path / "notes.jsonl"), fsync="batch", fsync_interval_secs=0.05)
+    store.append("first")  # synced at once: nothing synced yet this interval
+    store.append("last")  # no append follows; the timer syncs it
+    assert len(synced) == 1
+    deadline = time.monotonic() + 5
+    while store._dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(synced) == 2 and not store._dirty
+    store.close()
+    assert len(synced) == 2
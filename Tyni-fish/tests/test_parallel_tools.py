@@ -0,0 +1,55 @@
+import json
+import time
+from dataclasses import dataclass
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.policy import Policy
+from tyni_fish.providers.base import ToolBatchAction, action_from_dict
+from tyni_fish.providers.dummy import DummyProvider
+from tyni_fish.tools.registry import ToolRegistry
+
+
+@dataclass
+class SleepTool:
+    name: str = "sleep"
+    description: str = "Sleep then echo."
+
+    def __call__(self, **kwargs):
+        time.sleep(float(kwargs["secs"]))
+        return f"slept {kwargs['secs']}"
+
+
+class BatchOnce:
+    name = "batch-once"
+
+    def next_action(self, *, system, messages):
+        if messages[-1]["role"] == "user":
+            calls = [{"name": "sleep", "args": {"secs": s}} for s in (0.3, 0.1, 5, 0.2)]
+            return action_from_dict({"type": "tools", "calls": calls})
+        return DummyProvider().next_action(system=system, messages=messages)
+
+
+def test_batch_runs_concurrently_in_order_with_per_call_timeout(tmp_path):
+    reg = ToolRegistry()
+    reg.register(SleepTool())
+    policy = Policy(tool_timeout_secs=1, allow_tools={"sleep"})
+    runner = AgentRunner(
+        policy=policy, tools=reg, provider=BatchOnce(), workspace_dir=str(tmp_path), tracing=False
+    )
+
+    t0 = time.monotonic()
+    res = runner.run_result("go")
+    elapsed = time.monotonic() - t0
+    runner.close()
+
+    assert res.output == "slept 0.3; slept 0.1; TOOL_ERROR: timed out after 1s; slept 0.2"
+    assert res.steps == 2 and res.tool_calls == 4
+    assert elapsed < 2.0
+
+
+def test_openai_shapes_decode_to_batch():
+    action = action_from_dict(
+        json.loads('[{"name": "calc", "args": {"expr": "1+1"}}, {"name": "echo", "args": {}}]')
+    )
+    assert isinstance(action, ToolBatchAction)
+    assert [c.name for c in action.calls] == ["calc", "echo"]
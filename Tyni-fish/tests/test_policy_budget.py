@@ -1,7 +1,16 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+
 import pytest
 
 from tyni_fish.agent import AgentRunner
+from tyni_fish.budget import BudgetExceeded
 from tyni_fish.policy import Policy
+from tyni_fish.providers.base import ToolAction
+from tyni_fish.providers.openai_compat import _parse_completion
+from tyni_fish.tools.registry import ToolRegistry
 
 
 def test_max_steps_exceeded():
@@ -9,3 +18,104 @@ def test_max_steps_exceeded():
     runner = AgentRunner.from_config(provider_name="dummy")
     with pytest.raises(RuntimeError):
         runner.run("write note: a", max_steps=0)
+
+
+def _runner(tmp_path, **budgets):
+    return AgentRunner.from_config(
+        provider_name="dummy",
+        policy=Policy(**budgets),
+        workspace_dir=str(tmp_path / "ws"),
+        trace_dir=str(tmp_path / "t"),
+    )
+
+
+def test_usage_is_reported_and_traced(tmp_path):
+    runner = _runner(tmp_path)
+    res = runner.run_result("19*7")
+    runner.close()
+    assert res.usage["provider_calls"] == res.usage["estimated_calls"] == 2
+    assert res.usage["input_tokens"] > res.usage["output_tokens"] > 0
+    events = [json.loads(line) for line in open(tmp_path / "t" / f"{res.run_id}.jsonl")]
+    actions = [e for e in events if e["event"] == "action"]
+    assert actions[-1]["usage"]["input_tokens"] == res.usage["input_tokens"]
+    assert [e for e in events if e["event"] == "summary"][0]["usage"]["output_tokens"] == res.usage[
+        "output_tokens"
+    ]
+
+
+def test_token_budgets_stop_the_run(tmp_path):
+    runner = _runner(tmp_path, max_input_tokens=10)
+    with pytest.raises(BudgetExceeded) as exc:
+        runner.run("19*7")
+    assert exc.value.kind == "input_tokens" and exc.value.usage["provider_calls"] == 0
+
+    runner = _runner(tmp_path, max_output_tokens=1)
+    with pytest.raises(BudgetExceeded) as exc:
+        runner.run("19*7")  # stops before running the calc tool
+    assert exc.value.kind == "output_tokens" and exc.value.usage["provider_calls"] == 1
+    runner.close()
+
+
+class SlowProvider:
+    name = "slow"
+
+    async def anext_action(self, *, system, messages):
+        await asyncio.sleep(5)
+
+
+@dataclass
+class SleepTool:
+    name: str = "sleep"
+    description: str = "Sleep."
+
+    def __call__(self, **kwargs):
+        time.sleep(5)
+        return "slept"
+
+
+class SleepForever:
+    name = "sleep-forever"
+
+    def next_action(self, *, system, messages):
+        return ToolAction(type="tool", name="sleep", args={})
+
+
+def test_time_budgets_cut_provider_and_tool_calls(tmp_path):
+    runner = AgentRunner(
+        policy=Policy(max_run_secs=0.1),
+        tools=ToolRegistry(),
+        provider=SlowProvider(),
+        workspace_dir=str(tmp_path),
+        tracing=False,
+    )
+    t0 = time.monotonic()
+    with pytest.raises(BudgetExceeded) as exc:
+        runner.run("hi")
+    assert exc.value.kind == "run_secs" and time.monotonic() - t0 < 1.0
+
+    reg = ToolRegistry()
+    reg.register(SleepTool())
+    policy = Policy(max_tool_secs=0.1, allow_tools={"sleep"})
+    runner = AgentRunner(
+        policy=policy,
+        tools=reg,
+        provider=SleepForever(),
+        workspace_dir=str(tmp_path),
+        tracing=False,
+    )
+    t0 = time.monotonic()
+    with pytest.raises(BudgetExceeded) as exc:
+        runner.run("hi")
+    assert exc.value.kind == "tool_secs" and time.monotonic() - t0 < 1.0
+    runner.close()
+
+
+def test_openai_usage_is_parsed():
+    raw = {
+        "choices": [{"message": {"content": '{"type":"final","content":"ok"}'}}],
+        "usage": {"prompt_tokens": 120, "completion_tokens": 7, "total_tokens": 127},
+    }
+    action = _parse_completion(json.dumps(raw))
+    assert (action.usage.input_tokens, action.usage.output_tokens) == (120, 7)
+    raw.pop("usage")
+    assert _parse_completion(json.dumps(raw)).usage is None
@@ -0,0 +1,49 @@
+import tracemalloc
+
+import pytest
+
+from tyni_fish.tools.base import ToolError
+from tyni_fish.tools.builtins import ReadFileTool
+
+
+@pytest.fixture
+def reader(tmp_path):
+    lines = "".join(f"line {i}{' ERROR' if i % 250 == 0 else ''}\n" for i in range(1, 1001))
+    (tmp_path / "log.txt").write_text(lines)
+    return ReadFileTool(workspace_dir=str(tmp_path), max_bytes=200)
+
+
+def test_ranges_and_modes(reader):
+    assert reader(path="log.txt", offset=5, length=3) == "1\nl"
+    assert reader(path="log.txt", start_line=10, end_line=11) == "line 10\nline 11\n"
+    assert reader(path="log.txt", mode="head", lines=2) == "line 1\nline 2\n"
+    assert reader(path="log.txt", mode="tail", lines=2) == "line 999\nline 1000 ERROR\n"
+    assert reader(path="log.txt", mode="grep", pattern="ERROR$").splitlines() == [
+        "250: line 250 ERROR",
+        "500: line 500 ERROR",
+        "750: line 750 ERROR",
+        "1000: line 1000 ERROR",
+    ]
+    assert reader(path="log.txt", start_line=2000) == ""
+    with pytest.raises(ToolError):
+        reader(path="log.txt", mode="grep")
+
+
+def test_output_is_capped(reader):
+    out = reader(path="log.txt")
+    assert out.startswith("line 1\n") and "[truncated:" in out and len(out) < 400
+    assert b"".join(reader.iter_chunks("log.txt", chunk_size=4096)).count(b"\n") == 1000
+
+
+def test_large_file_reads_stay_flat(tmp_path):
+    with open(tmp_path / "big.log", "wb") as f:
+        for _ in range(64):
+            f.write(b"x" * 1023 + b"\n" + b"y" * (1 << 20))
+    reader = ReadFileTool(workspace_dir=str(tmp_path), max_bytes=4096)
+    tracemalloc.start()
+    reader(path="big.log")
+    reader(path="big.log", mode="tail", lines=3)
+    reader(path="big.log", mode="grep", pattern="^x+$", max_matches=1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 8 << 20
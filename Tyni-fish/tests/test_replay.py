@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.bench import BenchConfig, bench_replay
+from tyni_fish.policy import Policy
+from tyni_fish.providers.dummy import DummyProvider
+from tyni_fish.providers.mock import MockProvider
+from tyni_fish.providers.replay import RecordingProvider, ReplayMiss, ReplayProvider
+from tyni_fish.tools.builtins import default_registry
+
+INPUTS = ["19*7", "hello there", "2+2; 3*3"]
+
+
+def _runner(tmp_path, provider):
+    ws = str(tmp_path / "ws")
+    return AgentRunner(
+        policy=Policy(),
+        tools=default_registry(workspace_dir=ws),
+        provider=provider,
+        workspace_dir=ws,
+        tracing=False,
+    )
+
+
+def _record(tmp_path, name, inner, inputs=INPUTS):
+    recorder = RecordingProvider(inner=inner, path=str(tmp_path / name))
+    runner = _runner(tmp_path, recorder)
+    outputs = [runner.run(text) for text in inputs]
+    runner.close()
+    recorder.close()
+    return recorder.path, outputs
+
+
+@pytest.mark.parametrize("name", ["calls.jsonl", "calls.jsonl.gz"])
+def test_replay_serves_recorded_runs_offline(tmp_path, name):
+    path, outputs = _record(tmp_path, name, DummyProvider())
+    replay = ReplayProvider(path=path, latency_scale=0)
+    assert replay.inputs() == INPUTS
+    runner = _runner(tmp_path, replay)
+    assert runner.run_many(replay.inputs(), concurrency=8) == outputs
+    assert replay.stats()["misses"] == 0 and replay.hits == 5
+
+    with pytest.raises(ReplayMiss):
+        runner.run("never recorded")
+    replay.fallback = DummyProvider()
+    assert runner.run("never recorded").endswith("never recorded")
+    runner.close()
+
+
+def test_replay_scales_latency_and_replays_errors(tmp_path):
+    path, _ = _record(
+        tmp_path,
+        "slow.jsonl",
+        MockProvider(script=[{"type": "final", "content": "ok"}], latency_secs=0.1),
+        ["hi"],
+    )
+    provider = ReplayProvider(path=path)
+    runner = _runner(tmp_path, provider)
+    t0 = time.monotonic()
+    assert runner.run("hi") == "ok"
+    assert time.monotonic() - t0 >= 0.09
+    provider.latency_scale = 0.1
+    t0 = time.monotonic()
+    runner.run("hi")
+    assert time.monotonic() - t0 < 0.05
+    runner.close()
+
+    recorder = RecordingProvider(
+        inner=MockProvider(error_rate=1.0), path=str(tmp_path / "errors.jsonl")
+    )
+    with pytest.raises(RuntimeError):
+        recorder.next_action(system="s", messages=[{"role": "user", "content": "x"}])
+    recorder.close()
+    with pytest.raises(RuntimeError, match="replayed error"):
+        ReplayProvider(path=recorder.path, latency_scale=0).next_action(
+            system="s", messages=[{"role": "user", "content": "x"}]
+        )
+
+
+def test_runner_records_from_config_and_bench_replays(tmp_path):
+    path = str(tmp_path / "rec.jsonl")
+    runner = AgentRunner.from_config(workspace_dir=str(tmp_path / "ws"), record=path)
+    runner.tracing = False
+    assert runner.run("19*7") == "133"
+    runner.provider.close()
+    runner.close()
+
+    out = bench_replay(
+        BenchConfig(runs=4, concurrency=[1, 4], replay=path, replay_latency_scale=0), str(tmp_path)
+    )
+    assert out["errors"] == 0 and out["misses"] == 0 and out["c4_runs_per_sec"] > 0
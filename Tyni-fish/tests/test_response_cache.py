@@ -0,0 +1,56 @@
+import json
+
+from conftest import completion
+
+from tyni_fish.providers.cache import CachingProvider, ResponseCache, SqliteStore
+from tyni_fish.providers.http_pool import HTTPPool
+from tyni_fish.providers.openai_compat import OpenAICompatProvider
+
+MSGS = [{"role": "user", "content": "hi"}]
+
+
+def test_disk_cache_survives_process_and_skips_network(stub_server, tmp_path):
+    server = stub_server(
+        lambda body: (200, completion(json.dumps({"type": "final", "content": "yo"})))
+    )
+    db = str(tmp_path / "cache.db")
+
+    def provider():
+        inner = OpenAICompatProvider(base_url=server.base_url, pool=HTTPPool())
+        return CachingProvider(inner=inner, cache=ResponseCache(store=SqliteStore(path=db)))
+
+    cold = provider()
+    assert cold.next_action(system="s", messages=MSGS).content == "yo"
+    warm = provider()
+    assert warm.next_action(system="s", messages=MSGS).content == "yo"
+    assert server.requests == 1
+    assert warm.stats()["hits"] == 1
+
+
+def test_lru_eviction_ttl_and_bypass(stub_server):
+    server = stub_server(lambda body: (200, completion(body["messages"][-1]["content"])))
+    inner = OpenAICompatProvider(base_url=server.base_url, pool=HTTPPool(), temperature=0.9)
+    cached = CachingProvider(inner=inner, cache=ResponseCache(max_entries=1))
+    for text in ("a", "b", "a"):
+        cached.next_action(system="s", messages=[{"role": "user", "content": text}])
+    assert cached.stats()["evictions"] == 2 and server.requests == 3
+
+    cached.cache.ttl_secs = -1
+    cached.next_action(system="s", messages=[{"role": "user", "content": "a"}])
+    assert cached.stats()["expired"] == 1
+
+    cached.max_temperature = 0.5
+    cached.next_action(system="s", messages=[{"role": "user", "content": "a"}])
+    assert cached.stats()["bypassed"] == 1 and server.requests == 5
+
+
+def test_endpoints_serving_the_same_model_do_not_share_entries(stub_server, tmp_path):
+    def reply(text):
+        return lambda body: (200, completion(json.dumps({"type": "final", "content": text})))
+
+    store = SqliteStore(path=str(tmp_path / "cache.db"))
+    for server, text in ((stub_server(reply("a")), "a"), (stub_server(reply("b")), "b")):
+        inner = OpenAICompatProvider(base_url=server.base_url, model="m", pool=HTTPPool())
+        provider = CachingProvider(inner=inner, cache=ResponseCache(store=store))
+        assert provider.next_action(system="s", messages=MSGS).content == text
+        assert server.requests == 1
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+from conftest import completion
+
+from tyni_fish.providers.base import FinalAction
+from tyni_fish.providers.http_pool import AsyncHTTPPool, HTTPError, HTTPPool
+from tyni_fish.providers.openai_compat import OpenAICompatProvider
+from tyni_fish.providers.router import RouterProvider
+
+
+def _backend(server, retries=2):
+    return OpenAICompatProvider(
+        base_url=server.base_url, pool=HTTPPool(), async_pool=AsyncHTTPPool(max_retries=retries)
+    )
+
+
+def _ask(router):
+    return asyncio.run(
+        router.anext_action(system="s", messages=[{"role": "user", "content": "hi"}])
+    )
+
+
+def test_hedges_to_second_backend_and_cancels_the_slow_one(stub_server):
+    def slow(body):
+        time.sleep(0.5)
+        return 200, completion("slow")
+
+    slow_server = stub_server(slow)
+    fast_server = stub_server(lambda body: (200, completion("fast")))
+    router = RouterProvider(
+        backends=[_backend(slow_server), _backend(fast_server)], hedge_after_secs=0.05
+    )
+    t0 = time.perf_counter()
+    action = _ask(router)
+    assert isinstance(action, FinalAction) and action.content == "fast"
+    assert time.perf_counter() - t0 < 0.4
+    stats = router.stats()
+    assert stats["hedges"] == 1
+    assert [b["wins"] for b in stats["backends"]] == [0, 1]
+    assert stats["backends"][0]["cancelled"] == 1
+    # The fast backend now has a latency estimate and is ranked first.
+    assert fast_server.base_url in router._ranked()[0].name
+
+
+def test_failover_and_circuit_breaker(stub_server):
+    bad = stub_server(lambda body: (503, {"error": "down"}))
+    good = stub_server(lambda body: (200, completion("ok")))
+    router = RouterProvider(backends=[_backend(bad, retries=0), _backend(good)], hedge=False)
+    assert _ask(router).content == "ok"
+    assert router.failovers == 1
+
+    only_bad = RouterProvider(
+        backends=[_backend(bad, retries=0)], failure_threshold=2, cooldown_secs=60
+    )
+    for _ in range(2):
+        with pytest.raises(HTTPError):
+            _ask(only_bad)
+    before = bad.requests
+    with pytest.raises(RuntimeError, match="ejected"):
+        _ask(only_bad)
+    assert bad.requests == before
+    only_bad.cooldown_secs = 0
+    with pytest.raises(HTTPError):
+        _ask(only_bad)  # half-open probe fails and re-opens the breaker
+    assert only_bad.backends[0].state == "open"
+
+
+def test_client_errors_do_not_trip_the_breaker(stub_server):
+    servers = [stub_server(lambda body: (400, {"error": "prompt too long"})) for _ in range(2)]
+    backends = [_backend(s) for s in servers]
+    router = RouterProvider(backends=backends, hedge=False, failure_threshold=2)
+    for _ in range(3):
+        with pytest.raises(HTTPError) as e:
+            _ask(router)
+        assert e.value.status == 400
+    assert router.failovers == 0
+    assert [s.requests for s in servers] == [3, 0]
+    assert [b["state"] for b in router.stats()["backends"]] == ["closed", "closed"]
+    assert router.stats()["backends"][0]["errors"] == 0
@@ -0,0 +1,154 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.policy import Policy
+from tyni_fish.providers.mock import MockProvider
+from tyni_fish.server import AgentServer
+from tyni_fish.session import SessionStore
+from tyni_fish.tools.builtins import default_registry
+
+
+@pytest.fixture
+def serve(tmp_path):
+    started = []
+
+    def make(runner, **kwargs):
+        loop = asyncio.new_event_loop()
+        server = AgentServer(runner=runner, port=0, **kwargs)
+        loop.run_until_complete(server.start())
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        started.append((server, loop))
+        return server
+
+    yield make
+    for server, loop in started:
+        loop.call_soon_threadsafe(server.close)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def _post(server, payload):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    conn.request(
+        "POST", "/v1/run", body=json.dumps(payload), headers={"Content-Type": "application/json"}
+    )
+    resp = conn.getresponse()
+    return resp.status, resp.read(), resp
+
+
+def test_run_stream_sessions_and_metrics(tmp_path, serve):
+    runner = AgentRunner.from_config(
+        workspace_dir=str(tmp_path / "ws"), trace_dir=str(tmp_path / "traces")
+    )
+    server = serve(
+        runner, sessions=SessionStore(runner=runner, directory=str(tmp_path / "sessions"))
+    )
+
+    status, body, _ = _post(server, {"input": "19*7"})
+    assert status == 200 and json.loads(body)["output"] == "133"
+
+    status, body, _ = _post(server, {"input": "19*7", "max_steps": 1})
+    assert status == 500 and "Max steps" in json.loads(body)["error"]
+    assert _post(server, {"input": "x", "max_steps": 0})[0] == 400
+
+    status, body, _ = _post(server, {"input": "hello there", "stream": True})
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert "".join(line.get("token", "") for line in lines[:-1]).endswith("hello there")
+    assert lines[-1]["done"] and lines[-1]["steps"] == 1
+
+    _post(server, {"input": "2+2", "session_id": "s1"})
+    assert json.loads(_post(server, {"input": "3+3", "session_id": "s1"})[1])["output"] == "6"
+    assert len(server.sessions.get("s1").messages) == 8
+
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    conn.request("GET", "/metrics")
+    text = conn.getresponse().read().decode()
+    assert (
+        'tyni_responses_total{code="200"}' in text and "tyni_request_latency_seconds_count" in text
+    )
+
+
+def test_sheds_load_when_saturated(tmp_path, serve):
+    runner = AgentRunner(
+        policy=Policy(),
+        tools=default_registry(workspace_dir=str(tmp_path / "ws")),
+        provider=MockProvider(script=[{"type": "final", "content": "ok"}], latency_secs=0.3),
+        workspace_dir=str(tmp_path / "ws"),
+        tracing=False,
+    )
+    server = serve(runner, max_concurrency=1, max_queue=1)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(_post(server, {"input": "hi"})))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    statuses = sorted(r[0] for r in results)
+    assert statuses.count(200) == 2 and statuses.count(503) == 2
+    assert all(r[2].getheader("Retry-After") == "1" for r in results if r[0] == 503)
+    assert server.shed == 2
+
+
+def test_set_limits_resizes_a_running_server(tmp_path, serve):
+    runner = AgentRunner(
+        policy=Policy(),
+        tools=default_registry(workspace_dir=str(tmp_path / "ws")),
+        provider=MockProvider(script=[{"type": "final", "content": "ok"}], latency_secs=0.3),
+        workspace_dir=str(tmp_path / "ws"),
+        tracing=False,
+    )
+    server = serve(runner, max_concurrency=1, max_queue=0)
+    server.set_limits(max_concurrency=4)  # from another thread: applied on the server's loop
+    for _ in range(100):
+        if server.max_concurrency == 4:
+            break
+        threading.Event().wait(0.01)
+    statuses = []
+
+    def post():
+        conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+        conn.request("POST", "/v1/run", body=b'{"input": "hi"}', headers={"Connection": "close"})
+        statuses.append(conn.getresponse().status)
+        conn.close()
+
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert statuses == [200] * 4
+
+
+def _raw(server, data):
+    """Send raw bytes and read until the server closes the connection."""
+    with socket.create_connection(("127.0.0.1", server.port), timeout=5) as sock:
+        sock.sendall(data)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def test_bad_content_length_and_streamed_replies_close_the_connection(tmp_path, serve):
+    server = serve(
+        AgentRunner.from_config(workspace_dir=str(tmp_path / "ws"), trace_dir=str(tmp_path))
+    )
+    for length in ("abc", "-5"):
+        reply = _raw(server, f"POST /v1/run HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+        assert reply.startswith(b"HTTP/1.1 400") and b"Content-Length" in reply
+
+    body = json.dumps({"input": "hello", "stream": True}).encode()
+    head = f"POST /v1/run HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+    reply = _raw(server, head + body)  # returns only if the server hangs up after the stream
+    assert b"Connection: close" in reply and reply.endswith(b"0\r\n\r\n")
+
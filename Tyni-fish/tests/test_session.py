@@ -0,0 +1,54 @@
+import json
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.session import Session, SessionStore
+
+
+def _runner(tmp_path):
+    return AgentRunner.from_config(
+        workspace_dir=str(tmp_path / "ws"), trace_dir=str(tmp_path / "traces")
+    )
+
+
+def test_session_keeps_history_and_one_trace(tmp_path):
+    session = Session(runner=_runner(tmp_path))
+    assert session.send("2+3") == "5"
+    assert session.send("hello").endswith("You said: hello")
+    roles = [m["role"] for m in session.messages]
+    assert roles == ["user", "assistant", "tool", "assistant", "user", "assistant"]
+    session.runner.trace_pipeline.flush()
+    events = [
+        json.loads(line)
+        for line in (tmp_path / "traces" / f"{session.session_id}.jsonl").read_text().splitlines()
+    ]
+    assert sum(e["event"] == "start" for e in events) == 2
+    session.close()
+
+
+def test_store_pages_idle_sessions_to_disk(tmp_path):
+    store = SessionStore(runner=_runner(tmp_path), directory=str(tmp_path / "sessions"), max_live=2)
+    first = store.create("a")
+    first.send("6*7")
+    store.create("b")
+    store.create("c")
+    assert store.stats() == {"live": 2, "paged_out": 1, "paged_in": 0}
+    assert (tmp_path / "sessions" / "a.json").exists()
+
+    again = store.get("a")
+    assert again is not first and again.messages == first.messages and again.turns == 1
+    assert again.send("1+1") == "2"
+    assert store.stats()["paged_in"] == 1 and store.get("missing") is None
+
+
+def test_store_keeps_sessions_with_a_turn_in_flight(tmp_path):
+    store = SessionStore(runner=_runner(tmp_path), directory=str(tmp_path / "sessions"), max_live=1)
+    busy = store.acquire("busy")
+    store.create("other")
+    store.create("third")
+    assert store.stats() == {"live": 2, "paged_out": 1, "paged_in": 0}
+    assert not (tmp_path / "sessions" / "busy.json").exists()
+    assert store.get("busy") is busy
+
+    store.release(busy)  # over the limit again: the idle one goes
+    assert store.stats() == {"live": 1, "paged_out": 2, "paged_in": 0}
+    assert (tmp_path / "sessions" / "third.json").exists() and store.get("busy") is busy
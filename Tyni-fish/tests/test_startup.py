@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+import tyni_fish
+from tyni_fish import plugins
+from tyni_fish.bench import BenchConfig, bench_startup
+
+
+def _modules_after(code):
+    cmd = [sys.executable, "-c", code + "; import sys; print(' '.join(sys.modules))"]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def test_package_and_cli_import_lazily():
+    mods = _modules_after("import tyni_fish, tyni_fish.cli")
+    assert "tyni_fish.agent" not in mods
+    assert "asyncio" not in mods
+    assert tyni_fish.AgentRunner.__module__ == "tyni_fish.agent"
+    with pytest.raises(AttributeError):
+        getattr(tyni_fish, "Missing")  # noqa: B009 - goes through __getattr__
+
+
+def test_providers_and_tool_plugins_load_by_name(monkeypatch):
+    assert plugins.load_provider("dummy").name == "dummy"
+    with pytest.raises(ValueError):
+        plugins.load_provider("nope")
+
+    class EP:
+        def load(self):
+            return lambda *, workspace_dir: type(
+                "T", (), {"name": "shout", "__call__": lambda s, **k: "HI"}
+            )()
+
+    monkeypatch.setattr(
+        plugins, "find_entry_point", lambda group, name: EP() if name == "shout" else None
+    )
+    from tyni_fish.agent import AgentRunner
+    from tyni_fish.policy import Policy
+
+    policy = Policy()
+    policy.allow_tools.add("shout")
+    runner = AgentRunner.from_config(policy=policy)
+    assert runner.tools.get("shout")() == "HI"
+    runner.close()
+
+
+def test_startup_bench_reports_import_costs():
+    out = bench_startup(BenchConfig(startup_runs=1))
+    assert 0 < out["package_import_us"] < out["agent_import_us"]
+    assert out["cli_modules"] < out["agent_modules"]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+
+from conftest import completion
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.providers.base import FinalAction, ToolAction
+from tyni_fish.providers.http_pool import AsyncHTTPPool, HTTPPool
+from tyni_fish.providers.openai_compat import OpenAICompatProvider
+from tyni_fish.providers.stream_parser import ActionStreamParser
+
+
+def _sse(*deltas: str) -> bytes:
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': d}}]})}\n\n" for d in deltas]
+    return ("".join(lines) + "data: [DONE]\n\n").encode()
+
+
+def test_parser_streams_final_content_across_chunks():
+    tokens = []
+    parser = ActionStreamParser(tokens.append)
+    chunks = ['{"type": "fi', 'nal", "cont', 'ent": "a\\', 'nb \\u00e9', '!"}', " trailing"]
+    actions = [parser.feed(c) for c in chunks]
+    assert actions[4] == FinalAction(type="final", content="a\nb é!")
+    assert "".join(tokens) == "a\nb é!"
+
+
+def test_parser_returns_tool_call_when_object_closes():
+    tokens = []
+    parser = ActionStreamParser(tokens.append)
+    assert parser.feed('{"type":"tool","name":"calc","args":{"expr":"1+1"}') is None
+    action = parser.feed('} {"ignored": true}')
+    assert action == ToolAction(type="tool", name="calc", args={"expr": "1+1"})
+    assert tokens == []
+
+
+def test_openai_compat_stream_action(stub_server):
+    server = stub_server(lambda body: (200, _sse('{"type":"final",', '"content":"he', 'llo"}')))
+    provider = OpenAICompatProvider(
+        base_url=server.base_url, pool=HTTPPool(), async_pool=AsyncHTTPPool()
+    )
+    tokens = []
+    action = provider.stream_action(system="s", messages=[], on_token=tokens.append)
+    assert action.content == "hello" and "".join(tokens) == "hello"
+
+    tokens.clear()
+    action = asyncio.run(provider.astream_action(system="s", messages=[], on_token=tokens.append))
+    assert action.content == "hello" and "".join(tokens) == "hello"
+
+
+def test_runner_stream_iterator(tmp_path):
+    runner = AgentRunner.from_config(provider_name="dummy", workspace_dir=str(tmp_path))
+    runner.tracing = False
+    tokens = list(runner.stream("Hello there"))
+    assert len(tokens) > 1
+    assert "".join(tokens) == runner.run("Hello there")
+
+
+def _provider(server):
+    return OpenAICompatProvider(
+        base_url=server.base_url, pool=HTTPPool(), async_pool=AsyncHTTPPool()
+    )
+
+
+def test_stream_and_buffered_paths_agree_and_read_usage(stub_server):
+    usage = {"choices": [], "usage": {"prompt_tokens": 11, "completion_tokens": 7}}
+    body = _sse('{"answer": ', '42}')
+    body = body.replace(b"data: [DONE]", f"data: {json.dumps(usage)}\n\ndata: [DONE]".encode())
+    server = stub_server(lambda req: (200, body))
+    provider = _provider(server)
+    tokens = []
+    action = provider.stream_action(system="s", messages=[], on_token=tokens.append)
+    assert action == FinalAction(type="final", content='{"answer": 42}')
+    assert "".join(tokens) == action.content
+    assert (action.usage.input_tokens, action.usage.output_tokens) == (11, 7)
+
+    tokens.clear()
+    action = asyncio.run(provider.astream_action(system="s", messages=[], on_token=tokens.append))
+    assert action.content == '{"answer": 42}' and "".join(tokens) == action.content
+    assert action.usage.output_tokens == 7
+
+    plain = stub_server(lambda req: (200, completion('{"answer": 42}')))
+    assert _provider(plain).next_action(system="s", messages=[]) == action
+
+
+def test_tool_calls_return_before_the_trailing_output(stub_server):
+    head = _sse('{"type": "tool", "name": "calc", ', '"args": {"expr": "1+1"}}')
+    head = head[: head.index(b"data: [DONE]")]
+    tail = _sse(" and some trailing chatter")
+    server = stub_server(lambda req: (200, [head, 1.0, tail]))
+    provider = _provider(server)
+
+    t0 = time.perf_counter()
+    action = provider.stream_action(system="s", messages=[], on_token=lambda _: None)
+    assert time.perf_counter() - t0 < 0.5
+    assert action == ToolAction(type="tool", name="calc", args={"expr": "1+1"})
+    assert action.usage is None  # the step is budgeted from estimates
+
+    t0 = time.perf_counter()
+    call = provider.astream_action(system="s", messages=[], on_token=lambda _: None)
+    assert asyncio.run(call) == action
+    assert time.perf_counter() - t0 < 0.5
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.policy import Policy
+from tyni_fish.providers.mock import MockProvider
+from tyni_fish.tools.builtins import ReadFileTool, WriteFileTool, default_registry
+from tyni_fish.tools.cache import ToolResultCache, tool_cache_key
+
+
+def test_keys_follow_purity_and_fingerprints(tmp_path):
+    reg = default_registry(workspace_dir=str(tmp_path))
+    calc = reg.get("calc")
+    assert tool_cache_key(calc, {"expr": "1+1"}) == tool_cache_key(calc, {"expr": "1+1"})
+    assert tool_cache_key(reg.get("note_append"), {"line": "x"}) is None
+
+    reader = ReadFileTool(workspace_dir=str(tmp_path))
+    path = tmp_path / "a.txt"
+    path.write_text("one")
+    assert tool_cache_key(reader, {"path": "a.txt"}) is None  # just written: too recent to trust
+    old = time.time() - 10
+    os.utime(path, (old, old))
+    key = tool_cache_key(reader, {"path": "a.txt"})
+    assert key is not None
+    path.write_text("two!")
+    os.utime(path, (old + 1, old + 1))
+    assert tool_cache_key(reader, {"path": "a.txt"}) != key
+    assert tool_cache_key(reader, {"path": "missing.txt"}) is None
+
+
+def test_lru_bounds_and_counts():
+    cache = ToolResultCache(max_entries=2)
+    for i in range(3):
+        cache.put(("calc", str(i), None), str(i))
+    assert cache.get(("calc", "0", None)) is None and cache.get(("calc", "2", None)) == "2"
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "size": 2, "hit_rate": 0.5}
+
+
+def test_runner_reuses_results_and_traces_hits(tmp_path):
+    ws = tmp_path / "ws"
+    WriteFileTool(workspace_dir=str(ws))(path="big.txt", content="data")
+    old = time.time() - 10
+    os.utime(ws / "big.txt", (old, old))
+    step = {
+        "type": "tools",
+        "calls": [
+            {"name": "read_file", "args": {"path": "big.txt"}},
+            {"name": "calc", "args": {"expr": "6*7"}},
+        ],
+    }
+    runner = AgentRunner(
+        policy=Policy(),
+        tools=default_registry(workspace_dir=str(ws)),
+        provider=MockProvider(script=[step, step, {"type": "final", "content": "ok"}]),
+        workspace_dir=str(ws),
+        trace_dir=str(tmp_path / "traces"),
+    )
+    res = runner.run_result("go")
+    assert res.timings["tool_cache_hits"] == 2
+    events = [
+        json.loads(line)
+        for line in (tmp_path / "traces" / f"{res.run_id}.jsonl").read_text().splitlines()
+    ]
+    cached = [e for e in events if e["event"] == "tool_result" and e.get("cached")]
+    assert [e["step"] for e in cached] == [1, 1] and cached[0]["result"] == "data"
+    assert events[-1]["tool_cache"]["hit_rate"] == 0.5
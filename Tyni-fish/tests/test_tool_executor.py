@@ -0,0 +1,72 @@
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from tyni_fish.executor import ToolExecutor
+from tyni_fish.tools.base import ToolError
+from tyni_fish.tools.builtins import CalcTool
+
+
+@dataclass
+class SleepTool:
+    name: str = "sleep"
+    description: str = "Sleep then return."
+
+    def __call__(self, **kwargs):
+        time.sleep(float(kwargs.get("secs", 0)))
+        return "done"
+
+
+@dataclass
+class SpinTool:
+    name: str = "spin"
+    description: str = "Never returns."
+
+    def __call__(self, **kwargs):
+        while True:
+            pass
+
+
+def test_timeout_frees_caller_and_keeps_capacity():
+    ex = ToolExecutor(workers=1)
+    t0 = time.monotonic()
+    with pytest.raises(TimeoutError):
+        ex.run(SleepTool(), {"secs": 3}, timeout_secs=0.2)
+    assert time.monotonic() - t0 < 1.0
+    # The only worker is stuck, but a replacement serves the next call.
+    assert ex.run(SleepTool(), {"secs": 0}, timeout_secs=1) == "done"
+    assert ex.stats()["stuck"] == 1
+    ex.close()
+
+
+def test_per_tool_limit_and_backpressure():
+    ex = ToolExecutor(workers=4, max_queue=2)
+    t0 = time.monotonic()
+    futs = [ex.submit(SleepTool(), {"secs": 0.2}, timeout_secs=5, limit=1)]
+    time.sleep(0.05)
+    futs += [ex.submit(SleepTool(), {"secs": 0.2}, timeout_secs=5, limit=1) for _ in range(2)]
+    assert ex.stats()["parked"] == {"sleep": 2}
+    with pytest.raises(ToolError):
+        ex.submit(SleepTool(), {"secs": 0}, timeout_secs=5)
+    assert [f.result() for f in futs] == ["done"] * 3
+    assert time.monotonic() - t0 >= 0.6
+    ex.close()
+
+
+def test_isolated_runaway_tool_is_killed():
+    ex = ToolExecutor(workers=1)
+    with pytest.raises(TimeoutError):
+        ex.run(SpinTool(), {}, timeout_secs=0.3, isolate=True)
+    assert ex.stats()["stuck"] == 0
+    ex.close()
+
+
+def test_isolated_calls_run_alongside_busy_worker_threads():
+    ex = ToolExecutor(workers=2)
+    busy = [ex.submit(SleepTool(), {"secs": 0.3}, timeout_secs=5) for _ in range(2)]
+    assert ex.run(CalcTool(), {"expr": "6*7"}, timeout_secs=30, isolate=True) == "42"
+    with pytest.raises(ToolError):
+        ex.run(CalcTool(), {"expr": "1/0"}, timeout_secs=30, isolate=True)
+    assert [f.result() for f in busy] == ["done"] * 2
+    ex.close()
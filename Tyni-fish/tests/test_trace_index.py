@@ -0,0 +1,62 @@
+import gzip
+import json
+
+from tyni_fish import trace_index
+from tyni_fish.agent import AgentRunner
+from tyni_fish.trace_index import TraceIndex
+
+
+def test_index_is_incremental_and_answers_queries(tmp_path):
+    traces = tmp_path / "traces"
+    runner = AgentRunner.from_config(workspace_dir=str(tmp_path / "ws"), trace_dir=str(traces))
+    for text in ["2*3", "1/0", "hello"]:
+        runner.run(text)
+
+    index = TraceIndex(trace_dir=str(traces))
+    assert index.update()["files_read"] == 3
+    assert index.update()["files_read"] == 0
+    assert index.summary()["runs"] == 3
+
+    # A shared, compressed file is picked up too; a half-written line waits.
+    shared = traces / "shared.jsonl.gz"
+    with gzip.open(shared, "wt") as f:
+        f.write(json.dumps({"run_id": "r1", "event": "start", "provider": "x", "ts": 1.0}) + "\n")
+        f.write(json.dumps({"run_id": "r1", "event": "error", "error": "boom", "ts": 9.0}) + "\n")
+    plain = traces / "live.jsonl"
+    plain.write_text(
+        json.dumps({"run_id": "r2", "event": "start", "provider": "x", "ts": 1.0})
+        + '\n{"run_id": "r2", "ev'
+    )
+    assert index.update()["events"] == 3
+    with plain.open("a") as f:
+        f.write('ent": "final", "step": 4, "ts": 3.0}\n')
+    assert index.update()["events"] == 1
+
+    assert index.slowest(limit=1)[0]["run_id"] == "r1"
+    assert [r["run_id"] for r in index.runs(status="error")] == ["r1"]
+    assert index.runs(provider="x", order_by="steps")[0]["steps"] == 5
+    assert index.tool_stats() == [{"tool": "calc", "calls": 2, "errors": 1, "error_rate": 0.5}]
+    assert {r["steps"]: r["runs"] for r in index.step_distribution()} == {0: 1, 1: 1, 2: 2, 5: 1}
+    index.close()
+
+
+def test_update_looks_up_only_the_scanned_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_index, "_LOOKUP_BATCH", 2)
+    traces = tmp_path / "traces"
+    traces.mkdir()
+    for i in range(5):
+        (traces / f"r{i}.jsonl").write_text(
+            json.dumps({"run_id": f"r{i}", "event": "start", "ts": 1.0}) + "\n"
+        )
+    index = TraceIndex(trace_dir=str(traces))
+    assert index.update()["files_read"] == 5
+    index._db.executemany(
+        "INSERT INTO files VALUES (?, 0, 0, 0)", [(f"gone{i}",) for i in range(100)]
+    )
+
+    statements = []
+    index._db.set_trace_callback(statements.append)
+    assert index.update() == {"files_seen": 5, "files_read": 0, "events": 0}
+    lookups = [s for s in statements if "FROM files" in s]
+    assert len(lookups) == 3 and all("WHERE path IN" in s and "gone" not in s for s in lookups)
+    index.close()
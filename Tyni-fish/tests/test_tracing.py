@@ -0,0 +1,72 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+from tyni_fish.agent import AgentRunner
+from tyni_fish.tracing import CompressedJsonlSink, JsonlFileSink, TracePipeline, TraceWriter
+
+
+def test_pipeline_batches_into_shared_file(tmp_path):
+    path = tmp_path / "all.jsonl"
+    pipeline = TracePipeline(sink=JsonlFileSink(path=str(path)), flush_interval_secs=60)
+    for n, run in enumerate(("a", "b"), 1):
+        trace = TraceWriter(run_id=run, pipeline=pipeline)
+        for i in range(3):
+            trace.write({"event": "action", "step": i})
+        trace.end()  # wakes the writer thread long before flush_interval_secs
+        deadline = time.monotonic() + 5
+        while pipeline.stats()["written"] < 3 * n and time.monotonic() < deadline:
+            time.sleep(0.01)
+    pipeline.close()
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [e["run_id"] for e in events] == ["a"] * 3 + ["b"] * 3
+    assert pipeline.stats()["batches"] == 2
+
+
+def test_pipeline_drops_under_backpressure(tmp_path):
+    pipeline = TracePipeline(
+        sink=JsonlFileSink(path=str(tmp_path / "t.jsonl")), flush_interval_secs=60, max_buffer=5
+    )
+    trace = TraceWriter(run_id="r", pipeline=pipeline)
+    for i in range(8):
+        trace.write({"event": "x", "i": i})
+    assert pipeline.stats()["dropped"] == 3
+    pipeline.close()
+    assert pipeline.stats()["written"] == 5
+
+
+def test_gzip_sink(tmp_path):
+    path = tmp_path / "t.jsonl.gz"
+    pipeline = TracePipeline(sink=CompressedJsonlSink(path=str(path)))
+    TraceWriter(run_id="r", pipeline=pipeline).write({"event": "start"})
+    pipeline.close()
+    with gzip.open(path, "rt") as f:
+        assert json.loads(f.readline())["event"] == "start"
+
+
+class ThreadSink:
+    def __init__(self):
+        self.threads = []
+
+    def write_batch(self, events):
+        self.threads.append(threading.current_thread().name)
+
+    def close(self):
+        pass
+
+
+def test_async_runs_leave_trace_io_to_the_writer_thread(tmp_path):
+    sink = ThreadSink()
+    runner = AgentRunner.from_config(workspace_dir=str(tmp_path / "ws"))
+    runner.trace_pipeline = TracePipeline(sink=sink, flush_interval_secs=60)
+    assert asyncio.run(runner.arun("2+3")) == "5"
+    deadline = time.monotonic() + 5
+    while not sink.threads and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sink.threads == ["tyni-trace"]
+
+    runner.run("1+1")  # blocking callers still get the trace on disk before returning
+    assert len(sink.threads) == 2
+    runner.close()